@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import traceback
+from typing import Callable, Optional
+
+# Qt is not fork-safe: workers are always started from a fresh interpreter
+CONTEXT = multiprocessing.get_context("spawn")
+WORKERS: list[BotWorker] = []
+
+NO_MOVE = ((0, 0), (0, 0))
+
+
+def stop_worker(signum, frame):
+    """``SIGTERM`` handler of the worker: ends the bot, even during a turn, so that its teardown function runs"""
+    sys.exit(0)
+
+
+def worker_main(connection, func: Callable):
+    """
+    Main loop of a bot worker process
+
+    Messages are tuples whose first element is the request:
+
+    - ``("turn", player_sequence, board, time_budget, kwargs)``: call the bot and send back
+      its move and the search result it reported
+    - ``("ponder", player_sequence, board, time_budget)``: start the bot's ponder function,
+      if it registered one, in a thread of the worker
+    - ``("stop",)``: stop pondering, then send back ``None``
+    - ``("close",)``: stop the worker
+
+    The bot's setup function, if it registered one, runs before the worker reports that it is
+    ready, so that it is not charged to the first turn's time budget. Its teardown function
+    runs when the worker stops, including on ``SIGTERM`` during a turn (see ``BotWorker.kill``).
+    A running background search is stopped before any request is handled.
+    The worker leads its own process group, which holds the processes started by the bot.
+    :param connection: The worker's end of the pipe
+    :param func: The bot function
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    signal.signal(signal.SIGTERM, stop_worker)
+
+    from Bots.ChessBotList import PONDER_LIST, SETUP_LIST, TEARDOWN_LIST
+
+    ponder_func = PONDER_LIST.get(func)
+    setup_func = SETUP_LIST.get(func)
+    teardown_func = TEARDOWN_LIST.get(func)
+    if setup_func is not None:
+        try:
+            setup_func()
+        except Exception:
+            traceback.print_exc()
+    ponder_thread: Optional[threading.Thread] = None
+    stop_event = threading.Event()
+    connection.send(("ready",))
+
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+
+            if ponder_thread is not None:
+                stop_event.set()
+                ponder_thread.join()
+                ponder_thread = None
+
+            request = message[0]
+            if request == "turn":
+                _, player_sequence, board, time_budget, kwargs = message
+                results = []
+                try:
+                    move = func(player_sequence, board, time_budget, on_search_result=results.append, **kwargs)
+                except Exception:
+                    traceback.print_exc()
+                    move = NO_MOVE
+                connection.send((move, results[-1] if results else None))
+
+            elif request == "ponder" and ponder_func is not None:
+                _, player_sequence, board, time_budget = message
+                stop_event = threading.Event()
+                ponder_thread = threading.Thread(
+                    target=ponder_func,
+                    args=(player_sequence, board, time_budget, stop_event),
+                    daemon=True,
+                )
+                ponder_thread.start()
+
+            elif request == "stop":
+                connection.send(None)
+
+            elif request == "close":
+                break
+    finally:
+        if ponder_thread is not None:
+            stop_event.set()
+            ponder_thread.join()
+        # Run here rather than at exit: the process waits for its children before running the atexit functions
+        if teardown_func is not None:
+            teardown_func()
+
+
+class BotWorker:
+    """
+    Persistent process running the turns of one player's bot
+
+    The process is started once and reused from one turn to the next, so the bot keeps
+    its globals (search tables, background search result) during the game. The bot does
+    not share the interpreter of the GUI. A bot exceeding its time budget is stopped by
+    killing its process, which is restarted right away for the next turn.
+    """
+
+    STOP_TIMEOUT = 0.5
+
+    def __init__(self, func: Callable):
+        self.func: Callable = func
+        self.process = None
+        self.connection = None
+        self.ready: bool = False
+        self.pondering: bool = False
+        self.start()
+        WORKERS.append(self)
+
+    def start(self):
+        """Start the worker process, without waiting for it to be ready"""
+        self.connection, child_connection = CONTEXT.Pipe()
+        self.process = CONTEXT.Process(target=worker_main, args=(child_connection, self.func), daemon=False)
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+        self.pondering = False
+
+    def wait_ready(self):
+        """Wait until the worker has imported the bot and can play"""
+        if not self.ready:
+            self.connection.recv()
+            self.ready = True
+
+    def play(self, player_sequence, board, time_budget: float, **kwargs):
+        """
+        Ask the bot for its move and wait for the answer
+
+        Called from a thread: the wait does not hold the GIL. If the worker is killed
+        meanwhile, ``EOFError`` or ``OSError`` is raised.
+        :param player_sequence: The current player's sequence
+        :param board: The board in the player's orientation
+        :param time_budget: The time budget of the turn
+        :param kwargs: The keyword arguments of the bot function
+        :return: The move and the search result reported by the bot (``None`` if it did not report one)
+        """
+        self.wait_ready()
+        self.pondering = False
+        self.connection.send(("turn", player_sequence, board, time_budget, kwargs))
+        return self.connection.recv()
+
+    def ponder(self, player_sequence, board, time_budget: float):
+        """
+        Start the bot's background search on the opponent's time, without waiting
+
+        :param player_sequence: The sequence of the player who just moved
+        :param board: The board after its move, in its orientation
+        :param time_budget: The maximal duration of the search
+        """
+        self.connection.send(("ponder", player_sequence, board, time_budget))
+        self.pondering = True
+
+    def stop_pondering(self):
+        """Stop the background search, if any, and wait for it to end"""
+        if self.pondering and self.is_alive():
+            try:
+                self.connection.send(("stop",))
+                self.connection.recv()
+            except (EOFError, OSError):
+                pass
+        self.pondering = False
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def kill(self):
+        """
+        Stop the worker process now, even during a turn
+
+        The worker first receives ``SIGTERM``, which ends the bot with ``SystemExit``: its teardown
+        function stops the processes it started and frees its shared memory. It is killed if it is
+        still alive after ``STOP_TIMEOUT`` seconds. The processes left in its process group are then
+        terminated; the shared memory of a killed worker is only freed by the ``multiprocessing``
+        resource tracker when the arena exits.
+        """
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(self.STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def restart(self):
+        """Kill the worker process and start a new one, which forgets the bot's state"""
+        self.kill()
+        self.connection.close()
+        self.start()
+
+    def close(self):
+        """Stop the worker process"""
+        if self.is_alive():
+            try:
+                self.connection.send(("close",))
+            except OSError:
+                pass
+            self.process.join(1)
+        self.kill()
+        self.connection.close()
+        self.process = None
+        if self in WORKERS:
+            WORKERS.remove(self)
+
+
+@atexit.register
+def close_workers():
+    """Kill the remaining workers, which are not daemons so that bots can start their own processes"""
+    for worker in list(WORKERS):
+        worker.kill()
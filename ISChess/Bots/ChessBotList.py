@@ -1,9 +1,32 @@
 
 CHESS_BOT_LIST = {}
+PONDER_LIST = {}
+SETUP_LIST = {}
+TEARDOWN_LIST = {}
 
 def register_chess_bot(name, function):
     global CHESS_BOT_LIST
     if name in CHESS_BOT_LIST:
         register_chess_bot(name+"_", function)
     else:
-        CHESS_BOT_LIST[name] = function
\ No newline at end of file
+        CHESS_BOT_LIST[name] = function
+
+#   Optional: a background search run by GameManager on the opponent's time (pondering)
+#       ponder_function(player_sequence, board, time_budget, stop_event) is called with the board after the bot's move,
+#       in the bot's orientation. It must return soon after stop_event (a threading.Event) is set.
+def register_ponder(function, ponder_function):
+    global PONDER_LIST
+    PONDER_LIST[function] = ponder_function
+
+#   Optional: a setup run once in the bot's process before its first turn, outside of its time budget
+#       setup_function() starts what the bot keeps from one turn to the next (process pool, shared tables...).
+def register_setup(function, setup_function):
+    global SETUP_LIST
+    SETUP_LIST[function] = setup_function
+
+#   Optional: the end of register_setup, run in the bot's process when it stops, even during a turn
+#       teardown_function() stops and frees what setup_function started. Its processes would otherwise keep the bot's
+#       process alive: multiprocessing waits for them before running the atexit functions.
+def register_teardown(function, teardown_function):
+    global TEARDOWN_LIST
+    TEARDOWN_LIST[function] = teardown_function
\ No newline at end of file
@@ -3,9 +3,22 @@
 # Affiliation   : HES-SO Valais, Algorithmes et Structures de données
 # Date          : 07.01.2026
 
+import os
 import time
+import atexit
+import struct
 import random
-from Bots.ChessBotList import register_chess_bot
+import multiprocessing
+import concurrent.futures
+from multiprocessing import shared_memory
+from Bots.ChessBotList import register_chess_bot, register_ponder, register_setup, register_teardown
+from Bots.Martin_Board import (EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, TYPE_MASK, COLOR_SHIFT,
+                               WHITE, BLACK, PIECE_LETTERS, COLOR_LETTERS, make_piece, color_index,
+                               mailbox_size, to_square, to_coords, board_squares, king_steps, knight_steps,
+                               encode_board)
+from Bots.Martin_Time import TimeManager, allocate_time
+from Bots.Martin_Book import probe_book
+from Bots.Martin_Tablebase import find_tablebase, to_frame
 from dataclasses import dataclass
 
 # Valeurs des pièces
@@ -16,10 +29,36 @@ KNIGHTS_WEIGHT = 3
 BISHOPS_WEIGHT = 3
 PAWNS_WEIGHT = 1
 
+# Poids des pièces par type
+PIECE_VALUES = {
+    'p': PAWNS_WEIGHT,
+    'r': ROOKS_WEIGHT,
+    'n': KNIGHTS_WEIGHT,
+    'b': BISHOPS_WEIGHT,
+    'q': QUEENS_WEIGHT,
+    'k': KINGS_WEIGHT
+}
+TYPE_VALUES = [PIECE_VALUES.get(letter, 0) for letter in PIECE_LETTERS] # TYPE_VALUES[type] : poids d'une pièce du plateau compact
+
 DEPTH = 2
 
 # Carré magique, la zone à contrôler pendant le EARLY / MID game
 MAGIC_SQUARE = [(3, 3), (3, 4), (4, 3), (4, 4)]
+QUEEN_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+
+# Géométrie du plateau compact (voir Martin_Board et init_mailbox), calculée pour la forme du plateau
+ROWS = 0
+COLS = 0
+SQUARES = None # Indices des cases du plateau, sans la bordure sentinelle
+ROW_OF = None # ROW_OF[case] : rangée de la case (-1 pour la bordure)
+KING_STEPS = None # Décalages d'indice dans l'ordre de QUEEN_DIRECTIONS (4 droites puis 4 diagonales)
+ROOK_STEPS = None
+BISHOP_STEPS = None
+KNIGHT_STEPS = None
+MAILBOX_SHAPE = None
+
+CENTER_TABLES = {} # Par forme de plateau : cases du carré magique présentes sur le plateau et cases qui peuvent influencer leur contrôle
 
 # Variables pour le debug et les métriques
 DEBUG = False
@@ -27,7 +66,7 @@ METRICS_ENABLED = True
 METRICS_PRINT = True
 
 METRICS = None  # Dictionnaire pour stocker les métriques de performance
-PERSPECTIVE_COLOR = None  # Couleur du joueur initial (référence pour le sens des pions)
+PERSPECTIVE_COLOR = None  # Couleur (indice de COLOR_LETTERS) du joueur initial (référence pour le sens des pions)
 
 # Constantes pour les heuristiques de la board d'évaluation
 CONTROL_CENTER_BONUS = 0.5
@@ -35,13 +74,74 @@ ADVANCED_PAWN_MULTIPLICATOR_BONUS = 0.2
 ALLIED_KING_NOT_IN_CHECK_BONUS = 3
 ENEMY_KING_IN_CHECK_BONUS = 1
 
-# Constante pour la gestion du budget de temps
-TIMER_PURCENT = 0.80 # Pourcentage du temps total utilisé
-START_TIME = 0
-TIME_LIMIT = 0
-
-BOARD_POSITIONS = None
-PREVIOUS_TABLE_DATA = {}
+# Gestion du budget de temps (voir Martin_Time), un TimeManager par recherche
+TIME_MANAGER = TimeManager(0)
+
+# Livre d'ouvertures (voir Martin_Book) : une position du livre est jouée sans recherche
+OPENING_BOOK = True
+
+# Tables de finales (voir Martin_Tablebase) : une position d'une table est jouée sans recherche, avec le résultat exact
+TABLEBASE = True
+
+# Constantes pour le hachage de Zobrist et la table de transposition
+ZOBRIST_SEED = 0x4D415254 # Graine fixe : les clés sont identiques d'une exécution à l'autre
+ZOBRIST_PIECES = None # ZOBRIST_PIECES[case][code] : clé aléatoire de 64 bits par case et par code de pièce (0 pour une case vide ou un mur)
+ZOBRIST_SIDE = 0 # Clé XOR-ée à chaque changement de joueur
+ZOBRIST_SHAPE = None # Forme du plateau pour laquelle les clés ont été générées
+TT_SIZE_BITS = 18 # La table contient 2^TT_SIZE_BITS entrées, quelle que soit la durée de la partie
+TT_EXACT = 0 # Score exact
+TT_LOWER = 1 # Borne inférieure (coupure beta, le vrai score est >= score)
+TT_UPPER = 2 # Borne supérieure (aucun coup n'a dépassé alpha, le vrai score est <= score)
+
+# Persistance de l'état de recherche (table de transposition, killers, historique) entre les coups d'une même partie
+MAX_SEARCH_STATES = 4 # Nombre de parties (forme du plateau, séquence du joueur) dont l'état est conservé
+HISTORY_AGING_DIVISOR = 4 # L'historique du coup précédent est divisé par ce facteur au lieu d'être effacé
+KILLER_PLY_SHIFT = 2 # La nouvelle racine est deux demi-coups plus bas que la précédente
+SEARCH_STATES = {} # (rows, cols, player_sequence) -> SearchState
+
+# Heuristiques d'ordonnancement des coups
+KILLER_MOVES = [] # KILLER_MOVES[ply] : les deux derniers coups calmes ayant provoqué une coupure à cette profondeur
+HISTORY_TABLE = {} # HISTORY_TABLE[couleur][coup] : somme des depth_remaining² des coupures provoquées par ce coup calme
+
+# Constantes pour l'iterative deepening
+MAX_DEPTH = 32 # Profondeur maximale atteignable par l'iterative deepening
+SEARCH_ABORTED = False # Passe à True quand le temps est dépassé, l'itération en cours est alors abandonnée
+ROOT_DEPTH = 0 # Profondeur de l'itération en cours
+COMPLETED_DEPTH = 0 # Profondeur de la dernière itération terminée
+
+# Réflexion pendant le temps de l'adversaire (voir ponder)
+PONDER_RESULT = None # (hash de la position prédite, séquence du joueur, profondeur terminée, (score, coup))
+PONDER_PREDICTION_DEPTH = 2 # Profondeur de la recherche de la réponse adverse si la table de transposition ne la connaît pas
+
+# Recherche parallèle à la racine sur un pool de processus (le GIL limite les threads à un seul cœur)
+PARALLEL_SEARCH = False # Active la répartition des coups de la racine sur PROCESS_POOL
+PARALLEL_WORKERS = max(1, (os.cpu_count() or 1) - 1) # Le processus principal cherche aussi (premier coup de la racine)
+PARALLEL_MIN_DEPTH = 3 # En dessous, une itération est trop courte pour amortir l'envoi des coups aux processus
+PROCESS_POOL = None # Créé au premier coup joué en parallèle puis réutilisé d'un tour à l'autre
+SHARED_ALPHA = None # Meilleur score trouvé à la racine, partagé entre tous les processus de l'itération en cours
+PLAYER_SEQUENCE = None # Séquence du joueur du coup en cours, identifie l'état de recherche des processus
+SEARCH_ID = 0 # Numéro du coup en cours : un processus ne fait vieillir son état qu'au début d'un nouveau coup
+WORKER_SEARCH_ID = None # Dans un processus du pool, numéro du dernier coup cherché
+
+# Lazy SMP : tous les processus cherchent la même racine à des profondeurs décalées et partagent SHARED_TABLE
+LAZY_SMP = False # Remplace la recherche séquentielle (et la recherche parallèle à la racine) par la recherche Lazy SMP
+SHARED_TABLE = None # Table de transposition en mémoire partagée, créée une seule fois par processus
+SMP_STOP = None # Event multiprocessing levé par le processus principal quand il a terminé (ou interrompu) sa recherche
+PERSPECTIVE_KEYS = [random.Random(0x534D5000 + color).getrandbits(64) for color in range(len(COLOR_LETTERS))] # Sel de SHARED_TABLE par couleur
+PARALLEL_COUNTERS = ("minmax_calls", "quiescence_calls", "moves_made", "moves_generated", "moves_legal",
+                     "moves_illegal_check", "cutoffs", "cutoffs_first_move", "cache_hits", "tt_stores", "pvs_researches",
+                     "null_move_tries", "null_move_cutoffs", "lmr_reductions", "lmr_researches")
+
+# Principal variation search et fenêtres d'aspiration
+PVS_WINDOW = 0.01 # Largeur de la fenêtre nulle, plus petite que le plus petit écart entre deux évaluations (0.1)
+ASPIRATION_MIN_DEPTH = 3 # Les premières itérations sont trop instables pour centrer une fenêtre sur leur score
+ASPIRATION_WINDOW = 1 # Demi-largeur initiale de la fenêtre autour du score de l'itération précédente (un pion)
+ASPIRATION_GROWTH = 4 # Facteur d'élargissement après un échec, la fenêtre devient complète au-delà de ASPIRATION_MAX_WINDOW
+ASPIRATION_MAX_WINDOW = 16
+
+# Constantes pour la recherche de quiescence (captures seulement, une fois la profondeur atteinte)
+QUIESCENCE_MAX_DEPTH = 8 # Nombre maximal de captures enchaînées explorées après l'horizon
+DELTA_MARGIN = 2 # Marge du delta pruning : une capture qui ne peut pas rattraper alpha même avec cette marge est ignorée
 
 EARLY_GAME_PIECE_COUNT_MIN = 20
 MID_GAME_PIECE_COUNT_MIN = 12
@@ -51,82 +151,537 @@ LATE_GAME_DEPTH_BONUS = 2
 ADVANCED_KING_MALUS_MULTIPLICATOR = -0.3
 ADVANCED_QUEEN_MALUS_MULTIPLICATOR = -0.2
 
+# Recherche sélective : coup nul (null-move pruning) et réductions des coups tardifs (late move reductions)
+NULL_MOVE_MIN_DEPTH = 3 # Profondeur restante minimale pour essayer le coup nul
+NULL_MOVE_REDUCTION = 2 # Le coup nul est cherché à depth_remaining - 1 - NULL_MOVE_REDUCTION
+LMR_MIN_DEPTH = 3 # Profondeur restante minimale pour réduire un coup
+LMR_MIN_MOVES = 3 # Les LMR_MIN_MOVES premiers coups (hash move, captures, killers en général) ne sont jamais réduits
+LMR_DEEP_MOVES = 8 # À partir de ce rang, un coup calme est réduit de deux demi-coups au lieu d'un
+
+# Parties à plus de deux joueurs (voir init_players), l'ordre complet des joueurs est donné par GameManager (player_order)
+# Par défaut (partie à deux joueurs ou ordre inconnu), chaque couleur est son propre camp, le camp 0 est celui des blancs
+# et le sens des pions est déduit de PERSPECTIVE_COLOR : negamax est alors utilisé comme avant
+MULTIPLAYER_SEARCH = "paranoid" # "paranoid" : notre équipe contre la coalition des autres, "max-n" : chaque équipe maximise son score
+MULTIPLAYER = False # Plus de deux joueurs : recherche paranoid / max-n sur l'ordre réel des tours
+TEAM_OF = list(range(len(COLOR_LETTERS))) # TEAM_OF[couleur] : équipe de la couleur, on ne capture pas les pièces de son équipe
+SIDE_OF = [0] + [1] * (len(COLOR_LETTERS) - 1) # SIDE_OF[couleur] : camp de l'état d'évaluation (0 pour notre équipe en multijoueur)
+NUM_SIDES = 2 # Nombre de camps
+SIDE_COLORS = [[WHITE], [BLACK]] # SIDE_COLORS[camp] : couleurs du camp dans l'ordre des tours
+NEXT_COLOR = [BLACK] + [WHITE] * (len(COLOR_LETTERS) - 1) # NEXT_COLOR[couleur] : couleur qui joue après elle
+PAWN_STEPS = None # PAWN_STEPS[couleur] : sens de marche des pions de chaque couleur, dans notre orientation
+PROMOTION_SQUARES = None # PROMOTION_SQUARES[couleur] : cases du bord opposé où ses pions deviennent des reines
+TURN_KEYS = [0] * len(COLOR_LETTERS) # Clé XOR-ée au hash dans la table de transposition selon le joueur au trait
+
 @dataclass
 class Board:
     """
         Structure de données permettant de représenter un plateau de jeu
-        data: Matrice 2D représentant le plateau
-        initial_piece_position: Position (x,y) de la pièce initiale bougée
-        next_piece_position: Position (x,y) de la pièce initiale au coup suivant
+        Un seul plateau est utilisé pendant toute la recherche : les coups y sont joués puis annulés en place (make_move / unmake_move)
+        data: Plateau compact (array('b') entouré de cases sentinelles, voir Martin_Board), indexé par numéro de case
+        hash: Clé de Zobrist du plateau (pièces et joueur au trait), mise à jour de façon incrémentale
+    """
+    data: "array"
+    hash: int = 0
+    state: "EvalState" = None
+
+class EvalState:
+    """
+        État d'évaluation mis à jour de façon incrémentale par make_move / unmake_move (add_piece / remove_piece).
+        Chaque compteur est indexé par camp (SIDE_OF) : 0 pour les blancs, 1 pour les autres couleurs à deux joueurs,
+        une entrée par équipe en multijoueur (comme dans board_evaluation).
+        material: Somme des poids des pièces
+        king_count, king_rows, queen_rows, pawn_rows: Nombre de rois, somme des rangées des rois / reines / pions
+        piece_count: Nombre total de pièces, utilisé pour la phase de jeu
+        kings: Case du roi de chaque couleur
+        pieces: Cases occupées par chaque couleur (indexé par couleur), parcourues par la génération de coups au lieu de tout le plateau
+        center_counts: Pour chaque case du carré magique, nombre de pièces de chaque camp qui la contrôlent
+        center_dirty: Une case du carré magique n'est recalculée que si un coup a touché une case qui peut influencer son contrôle
+    """
+    __slots__ = ("material", "king_count", "king_rows", "queen_rows", "pawn_rows", "piece_count",
+                 "kings", "pieces", "center_squares", "center_relevance", "center_counts", "center_dirty")
+
+    def __init__(self, data):
+        self.material = [0] * NUM_SIDES
+        self.king_count = [0] * NUM_SIDES
+        self.king_rows = [0] * NUM_SIDES
+        self.queen_rows = [0] * NUM_SIDES
+        self.pawn_rows = [0] * NUM_SIDES
+        self.piece_count = 0
+        self.kings = {}
+        self.pieces = [set() for _ in COLOR_LETTERS]
+        self.center_squares, self.center_relevance = get_center_tables(ROWS, COLS)
+        self.center_counts = [[0] * NUM_SIDES for _ in self.center_squares]
+        self.center_dirty = [True] * len(self.center_squares)
+
+        for square in SQUARES:
+            if data[square] > 0:
+                self.add_piece(data[square], square)
+
+    def add_piece(self, piece, square):
+        color = piece >> COLOR_SHIFT
+        piece_type = piece & TYPE_MASK
+        side = SIDE_OF[color]
+        self.material[side] += TYPE_VALUES[piece_type]
+        self.piece_count += 1
+        self.pieces[color].add(square)
+        if piece_type == KING:
+            self.king_count[side] += 1
+            self.king_rows[side] += ROW_OF[square]
+            self.kings[color] = square
+        elif piece_type == QUEEN:
+            self.queen_rows[side] += ROW_OF[square]
+        elif piece_type == PAWN:
+            self.pawn_rows[side] += ROW_OF[square]
+        for index in self.center_relevance[square]:
+            self.center_dirty[index] = True
+
+    def remove_piece(self, piece, square):
+        color = piece >> COLOR_SHIFT
+        piece_type = piece & TYPE_MASK
+        side = SIDE_OF[color]
+        self.material[side] -= TYPE_VALUES[piece_type]
+        self.piece_count -= 1
+        self.pieces[color].discard(square)
+        if piece_type == KING:
+            self.king_count[side] -= 1
+            self.king_rows[side] -= ROW_OF[square]
+            if self.kings.get(color) == square:
+                del self.kings[color]
+        elif piece_type == QUEEN:
+            self.queen_rows[side] -= ROW_OF[square]
+        elif piece_type == PAWN:
+            self.pawn_rows[side] -= ROW_OF[square]
+        for index in self.center_relevance[square]:
+            self.center_dirty[index] = True
+
+    def center_control(self, data):
+        # Seules les cases du carré magique marquées comme modifiées sont recalculées
+        control = [0] * NUM_SIDES
+        for index, square in enumerate(self.center_squares):
+            if self.center_dirty[index]:
+                self.center_counts[index] = count_square_control(data, square)
+                self.center_dirty[index] = False
+            for side, count in enumerate(self.center_counts[index]):
+                control[side] += count
+        return control
+
+class TranspositionTable:
+    """
+        Table de transposition de taille fixe (2^size_bits entrées), indexée par les bits de poids faible de la clé de Zobrist.
+        Chaque entrée est un tuple (clé, profondeur, score, type de borne, meilleur coup, génération).
+        La clé complète est conservée pour détecter les collisions d'index.
+        La table est conservée d'un coup à l'autre : chaque recherche commence une nouvelle génération (new_search).
+        Remplacement : on garde l'entrée existante seulement si elle concerne une autre position explorée plus profondément
+        pendant la recherche en cours. Les entrées des coups précédents restent utilisables mais sont toujours remplaçables.
+    """
+    def __init__(self, size_bits: int):
+        self.mask = (1 << size_bits) - 1
+        self.entries = [None] * (1 << size_bits)
+        self.generation = 0
+
+    def clear(self):
+        self.entries = [None] * (self.mask + 1)
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key: int):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, best_move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is not None and entry[0] != key and entry[1] > depth and entry[5] == self.generation:
+            return
+        self.entries[index] = (key, depth, score, bound, best_move, self.generation)
+
+TRANSPOSITION_TABLE = TranspositionTable(TT_SIZE_BITS)
+
+class SharedTranspositionTable:
+    """
+        Table de transposition de taille fixe dans un bloc multiprocessing.shared_memory, partagée par les processus Lazy SMP.
+        Même interface et même politique de remplacement que TranspositionTable.
+        Chaque entrée occupe SLOT_FORMAT (3 mots de 64 bits) : clé ^ score ^ données, score (double), données compactées
+        (profondeur, borne, génération, meilleur coup). Aucun verrou : une entrée écrite en même temps par deux processus
+        peut mélanger leurs mots, mais alors la clé recalculée à la lecture ne correspond plus et l'entrée est ignorée.
+        generation est propre à chaque processus : le processus principal la transmet aux autres à chaque recherche.
+        Les scores dépendent de la couleur du joueur qui cherche (l'évaluation n'est pas symétrique) et la table
+        est partagée par toutes les parties : salt (PERSPECTIVE_KEYS[couleur]) est XOR-é aux clés pour les séparer.
     """
-    data: list[list[str]]
-    initial_piece_position: tuple[int, int]
-    next_piece_position: tuple[int, int]
+    SLOT = struct.Struct('<QQQ')
+    SCORE = struct.Struct('<d')
+    BITS = struct.Struct('<Q')
+
+    def __init__(self, size_bits: int, name: str = None):
+        self.mask = (1 << size_bits) - 1
+        size = (self.mask + 1) * self.SLOT.size
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.name = self.memory.name
+        self.buffer = self.memory.buf
+        self.generation = 0
+        self.salt = 0
+
+    def clear(self):
+        self.buffer[:] = bytes(len(self.buffer))
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key: int):
+        check, score_bits, data = self.SLOT.unpack_from(self.buffer, (key & self.mask) * self.SLOT.size)
+        if check ^ score_bits ^ data != key ^ self.salt or data == 0:
+            return None
+        score = self.SCORE.unpack(self.BITS.pack(score_bits))[0]
+        best_move = (data >> 27 & 0xFFFF, data >> 43 & 0xFFFF) if data >> 26 & 1 else None
+        return (key, data & 0xFF, score, data >> 8 & 3, best_move, data >> 10 & 0xFFFF)
+
+    def store(self, key: int, depth: int, score: int, bound: int, best_move):
+        offset = (key & self.mask) * self.SLOT.size
+        check, score_bits, data = self.SLOT.unpack_from(self.buffer, offset)
+        key ^= self.salt
+        if data != 0 and check ^ score_bits ^ data != key and data & 0xFF > depth and data >> 10 & 0xFFFF == self.generation & 0xFFFF:
+            return
+        # Le bit 59 est toujours levé : des données nulles marquent une entrée vide
+        data = depth & 0xFF | bound << 8 | (self.generation & 0xFFFF) << 10 | 1 << 59
+        if best_move is not None:
+            data |= 1 << 26 | best_move[0] << 27 | best_move[1] << 43
+        score_bits = self.BITS.unpack(self.SCORE.pack(score))[0]
+        self.SLOT.pack_into(self.buffer, offset, key ^ score_bits ^ data, score_bits, data)
+
+    def close(self):
+        self.buffer.release()
+        self.memory.close()
+
+@dataclass
+class SearchResult:
+    """
+        Résultat structuré d'une recherche, transmis à la fonction on_search_result de chess_bot (voir build_search_result)
+        best_move: Coup joué ((x, y), (x, y)), None s'il n'y a pas de coup légal
+        score: Score du coup, du point de vue du joueur
+        pv: Variation principale (suite de coups attendue), extraite de la table de transposition
+        depth, seldepth: Profondeur de la dernière itération terminée, profondeur maximale atteinte (quiescence comprise)
+        nodes, nps: Nœuds visités (negamax et quiescence, tous processus confondus) et nœuds par seconde
+        tt_hit_rate: Part des appels à negamax résolus par la table de transposition
+        cutoffs, first_move_cutoff_rate: Coupures alpha-beta et part de celles provoquées par le premier coup
+        iteration_times: (profondeur, durée en secondes) de chaque itération terminée de l'iterative deepening
+        time: Durée totale de chess_bot en secondes
+    """
+    best_move: tuple
+    score: float
+    pv: list
+    depth: int
+    seldepth: int
+    nodes: int
+    nps: float
+    tt_hit_rate: float
+    cutoffs: int
+    first_move_cutoff_rate: float
+    iteration_times: list
+    time: float
 
-def chess_bot(player_sequence, board, time_budget, **kwargs):
-    global PERSPECTIVE_COLOR, START_TIME, TIME_LIMIT, BOARD_POSITIONS, METRICS, DEBUG, PREVIOUS_TABLE_DATA, DEPTH
+@dataclass
+class SearchState:
+    """
+        État de recherche d'une partie, conservé entre les appels à chess_bot (voir restore_search_state)
+        table: Table de transposition de la partie
+        killers, history: Heuristiques d'ordonnancement des coups (KILLER_MOVES, HISTORY_TABLE)
+        piece_count: Nombre de pièces au dernier coup, pour reconnaître le début d'une nouvelle partie
+    """
+    table: TranspositionTable
+    killers: list
+    history: dict
+    piece_count: int
 
+#=================================================================================================
+# Hachage de Zobrist : une clé aléatoire par (case, pièce) et une clé pour le joueur au trait.
+# Le hash d'un plateau est le XOR des clés de ses pièces, il se met à jour en O(1) à chaque coup.
+def init_zobrist(rows, cols):
+    global ZOBRIST_PIECES, ZOBRIST_SIDE, ZOBRIST_SHAPE
+
+    if ZOBRIST_SHAPE == (rows, cols):
+        return
+
+    rng = random.Random(ZOBRIST_SEED)
+    codes = [make_piece(piece_type, color) for piece_type in range(PAWN, KING + 1) for color in range(len(COLOR_LETTERS))]
+    ZOBRIST_PIECES = []
+    for _ in range(mailbox_size(rows, cols)):
+        keys = [0] * (len(COLOR_LETTERS) << COLOR_SHIFT)
+        for code in codes:
+            keys[code] = rng.getrandbits(64)
+        ZOBRIST_PIECES.append(keys)
+    ZOBRIST_SIDE = rng.getrandbits(64)
+    ZOBRIST_SHAPE = (rows, cols)
+
+# Les pièces ont un code strictement positif, les cases vides valent EMPTY et les murs / la bordure OFFBOARD
+def is_piece(content):
+    return content > 0
+
+# Pièce qui peut être capturée par color (les murs 'XX' et les pièces de son équipe ne le peuvent pas)
+def is_enemy(content, color):
+    return content > 0 and TEAM_OF[content >> COLOR_SHIFT] != TEAM_OF[color]
+
+# Sens de marche des pions d'une couleur (décalage d'indice d'une rangée, ou d'une colonne pour les joueurs
+# assis sur les côtés en multijoueur), dans l'orientation du joueur initial
+def pawn_step(color):
+    if PAWN_STEPS is not None:
+        return PAWN_STEPS[color]
+    return KING_STEPS[1] if color == PERSPECTIVE_COLOR else KING_STEPS[0]
+
+# Décalage latéral des captures d'un pion : une colonne pour un pion qui avance de rangée en rangée,
+# une rangée pour un pion qui avance de colonne en colonne
+def pawn_lateral(step):
+    return KING_STEPS[1] if abs(step) == 1 else 1
+
+# Un pion de cette couleur qui arrive sur target devient-il une reine ? Cases de promotion de sa couleur en multijoueur
+# (y compris les pions qui avancent de colonne en colonne), sinon dernière rangée de son sens de marche
+def is_promotion(color, target):
+    if PROMOTION_SQUARES is not None:
+        return target in PROMOTION_SQUARES[color]
+    return ROW_OF[target] == (ROWS - 1 if color == PERSPECTIVE_COLOR else 0)
 
+#=================================================================================================
+# Lecture de l'ordre complet des joueurs (player_order de GameManager, par exemple "0b01y10w21r3" pour cross.brd) :
+# un triplet (équipe, couleur, rotation du plateau) par joueur, dans l'ordre des tours à partir du joueur au trait.
+# Avec plus de deux joueurs, on en déduit les équipes, les camps de l'évaluation (notre équipe est le camp 0),
+# l'ordre des tours et, à partir de la différence de rotation avec la nôtre, le sens des pions de chaque couleur
+# et leurs cases de promotion dans notre orientation. Sinon (ou sans player_order), les valeurs par défaut sont remises.
+def init_players(player_order, rows, cols):
+    global MULTIPLAYER, TEAM_OF, SIDE_OF, NUM_SIDES, SIDE_COLORS, NEXT_COLOR, PAWN_STEPS, PROMOTION_SQUARES, TURN_KEYS
+
+    players = [] if player_order is None else \
+        [(int(player_order[i]), color_index(player_order[i + 1]), int(player_order[i + 2])) for i in range(0, len(player_order) - 2, 3)]
+
+    if len(players) <= 2:
+        MULTIPLAYER = False
+        TEAM_OF = list(range(len(COLOR_LETTERS)))
+        SIDE_OF = [0] + [1] * (len(COLOR_LETTERS) - 1)
+        NUM_SIDES = 2
+        SIDE_COLORS = [[WHITE], [BLACK]]
+        NEXT_COLOR = [BLACK] + [WHITE] * (len(COLOR_LETTERS) - 1)
+        PAWN_STEPS = None
+        PROMOTION_SQUARES = None
+        TURN_KEYS = [0] * len(COLOR_LETTERS)
+        return
+
+    init_mailbox(rows, cols)
+    MULTIPLAYER = True
+    own_rotation = players[0][2]
+    teams = []
+    TEAM_OF = list(range(len(COLOR_LETTERS)))
+    SIDE_OF = [0] * len(COLOR_LETTERS)
+    NEXT_COLOR = [0] * len(COLOR_LETTERS)
+    PAWN_STEPS = [0] * len(COLOR_LETTERS)
+    PROMOTION_SQUARES = [frozenset()] * len(COLOR_LETTERS)
+
+    for index, (team, color, rotation) in enumerate(players):
+        if team not in teams:
+            teams.append(team)
+        TEAM_OF[color] = team
+        SIDE_OF[color] = teams.index(team)
+        NEXT_COLOR[color] = players[(index + 1) % len(players)][1]
+
+        # Ses pions avancent vers les rangées croissantes de son plateau, tourné (np.rot90) de rotation quarts de tour :
+        # dans le nôtre, la direction est tournée de la différence de rotation dans l'autre sens
+        dx, dy = 1, 0
+        for _ in range((rotation - own_rotation) % 4):
+            dx, dy = dy, -dx
+        PAWN_STEPS[color] = dx * KING_STEPS[1] + dy
+        PROMOTION_SQUARES[color] = frozenset(
+            to_square(x, y, cols) for x in range(rows) for y in range(cols)
+            if not (0 <= x + dx < rows and 0 <= y + dy < cols))
+
+    NUM_SIDES = len(teams)
+    SIDE_COLORS = [[color for _, color, _ in players if SIDE_OF[color] == side] for side in range(NUM_SIDES)]
+    TURN_KEYS = [random.Random(ZOBRIST_SEED + 1 + color).getrandbits(64) for color in range(len(COLOR_LETTERS))]
+
+def create_board(board):
+    """
+        Crée la board de recherche à partir du plateau de chaînes (matrice numpy de ParallelTurn ou liste de listes) :
+        conversion en plateau compact, hash de Zobrist complet et état d'évaluation initial
+    """
+    init_mailbox(len(board), len(board[0]))
+    init_zobrist(len(board), len(board[0]))
+    data = encode_board(board)
+    return Board(data, compute_hash(data), EvalState(data))
+
+def compute_hash(board):
+    key = 0
+    for square in SQUARES:
+        key ^= ZOBRIST_PIECES[square][board[square]]
+    return key
+
+def reset_metrics():
+    """
+        Remet à zéro le dictionnaire des métriques de performance (appelé au début de chaque coup)
+    """
+    global METRICS
+
+    METRICS = {
+        # Temps
+        "t_total": 0.0,
+        "t_search": 0.0,
+        "t_eval": 0.0,
+
+        # Exploration
+        "minmax_calls": 0,
+        "quiescence_calls": 0,
+        "moves_made": 0,
+        "moves_generated": 0,
+        "moves_legal": 0,
+        "moves_illegal_check": 0,
+
+        # Alpha-beta / limites
+        "cutoffs": 0,
+        "cutoffs_first_move": 0,
+        "first_move_cutoff_rate": 0.0,
+        "timeouts": 0,
+        "cache_hits": 0,
+        "tt_stores": 0,
+        "pvs_researches": 0,
+        "aspiration_fail_low": 0,
+        "aspiration_fail_high": 0,
+        "null_move_tries": 0,
+        "null_move_cutoffs": 0,
+        "lmr_reductions": 0,
+        "lmr_researches": 0,
+
+        # Profondeur
+        "max_depth_reached": 0,
+        "completed_depth": 0,
+        "iteration_times": [],
+        "time_hard_limit": 0.0,
+        "time_soft_limit": 0.0,
+        "time_predicted_next": 0.0,
+
+        # Livre d'ouvertures et réflexion pendant le temps de l'adversaire
+        "book_hit": 0,
+        "tablebase_hit": 0,
+        "ponder_hit": 0,
+        "ponder_depth": 0,
+
+        # Recherche parallèle
+        "parallel_iterations": 0,
+        "parallel_busy_time": 0.0,
+        "parallel_wall_time": 0.0,
+        "parallel_speedup": 0.0,
+        "parallel_nodes": 0,
+        "parallel_stale_nodes": 0,
+        "search_overhead": 0.0,
+
+        # Lazy SMP
+        "smp_workers": 0,
+        "smp_nodes": 0,
+        "smp_depth": 0,
+        "smp_nps": 0.0,
+    }
 
-    # Nettoyer le cache pour le nouveau coup
-    # Pas de rétention entre les évaluations
-    PREVIOUS_TABLE_DATA.clear()
+def chess_bot(player_sequence, board, time_budget, on_search_result=None, **kwargs):
+    global PERSPECTIVE_COLOR, TIME_MANAGER, METRICS, DEBUG, PONDER_RESULT, PLAYER_SEQUENCE, SEARCH_ID, COMPLETED_DEPTH
 
-    # Calcul du temps total avec la marge
-    TIME_LIMIT = time_budget * TIMER_PURCENT
-    START_TIME = time.time()
+    # Limites de temps, en tenant compte du temps de grâce laissé par GameManager avant de couper le thread
+    TIME_MANAGER = allocate_time(time_budget, kwargs.get("grace_ratio", 0.0))
     
     # Initialisation des métriques
     if METRICS_ENABLED:
-        METRICS = {
-            # Temps
-            "t_total": 0.0,
-            "t_search": 0.0,
-            "t_eval": 0.0,
-
-            # Exploration
-            "minmax_calls": 0,
-            "boards_generated": 0,
-            "moves_generated": 0,
-            "moves_legal": 0,
-            "moves_illegal_check": 0,
-
-            # Alpha-beta / limites
-            "cutoffs": 0,
-            "timeouts": 0,
-            "cache_hits": 0,
-
-            # Profondeur
-            "max_depth_reached": 0,
-        }
+        reset_metrics()
         _t0_total = time.perf_counter()
+        METRICS["time_hard_limit"] = TIME_MANAGER.hard_limit
+        METRICS["time_soft_limit"] = TIME_MANAGER.soft_limit
     
-    # Génération de la board initiale
-    initial_board = Board([[board[x, y] for y in range(board.shape[1])] for x in range(board.shape[0])], (0, 0), (0, 0))
-    color = player_sequence[1]
+    color = color_index(player_sequence[1])
     PERSPECTIVE_COLOR = color 
-
+    PLAYER_SEQUENCE = player_sequence
+    SEARCH_ID += 1
+
+    # Ordre complet des joueurs (équipes, couleurs et rotations), pour les parties à plus de deux joueurs
+    player_order = kwargs.get("player_order")
+    init_players(player_order, len(board), len(board[0]))
+
+    # Génération de la board compacte initiale, avec son hash de Zobrist et son état d'évaluation
+    initial_board = create_board(board)
+
+    # Position du livre d'ouvertures : le coup a déjà été cherché hors ligne, on le joue immédiatement
+    # (seulement s'il est légal ici, deux positions différentes peuvent avoir la même clé)
+    if kwargs.get("opening_book", OPENING_BOOK):
+        book_move = probe_book(board, player_sequence[1])
+        if book_move is not None:
+            (origin, target), score = book_move
+            move = (to_square(*origin, COLS), to_square(*target, COLS))
+            if move in generate_moves(initial_board, color):
+                return play_without_search(initial_board, color, (score, move), on_search_result, "book",
+                                           _t0_total if METRICS_ENABLED else 0.0)
+
+    # Peu de pièces sur une carte à deux joueurs : la table de finales connaît le résultat exact de chaque coup
+    if kwargs.get("tablebase", TABLEBASE) and not MULTIPLAYER:
+        rotation = int(player_sequence[2])
+        tablebase = find_tablebase(board, color, rotation)
+        score_move = None if tablebase is None else tablebase_move(initial_board, color, tablebase, rotation)
+        if score_move is not None:
+            return play_without_search(initial_board, color, score_move, on_search_result, "tablebase",
+                                       _t0_total if METRICS_ENABLED else 0.0)
+
+    # Reprise de la table de transposition et des heuristiques du coup précédent de cette partie
+    # (en multijoueur, l'ordre complet identifie la partie : les scores de la table dépendent des équipes)
+    restore_search_state(player_order if MULTIPLAYER else player_sequence, initial_board)
+
+    # Si l'adversaire a joué le coup prédit pendant la réflexion (ponder hit), la table est déjà chaude
+    # et le résultat de cette réflexion peut être repris
+    ponder_result = PONDER_RESULT
+    PONDER_RESULT = None
+    ponder_hit = ponder_result is not None and ponder_result[0] == initial_board.hash and ponder_result[1] == player_sequence
+    if METRICS_ENABLED and ponder_hit:
+        METRICS["ponder_hit"] = 1
+        METRICS["ponder_depth"] = ponder_result[2]
+
+    # Profondeur cible de l'iterative deepening (sans modifier la constante globale DEPTH)
+    target_depth = DEPTH
     if get_game_phase(initial_board) == "LATE":
-        DEPTH += LATE_GAME_DEPTH_BONUS
-
-
-    # Création de la matrice 2D de toutes les positions possibles de la board. Utile pour la stochastique en cas de timeout
-    BOARD_POSITIONS = [(x, y) for x in range(board.shape[0]) for y in range(board.shape[1])]
+        target_depth += LATE_GAME_DEPTH_BONUS
 
     if DEBUG:
-        print(f"Bot Martin playing color {color} with time budget {time_budget} s")
+        print(f"Bot Martin playing color {COLOR_LETTERS[color]} with time budget {time_budget} s")
     
     if METRICS_ENABLED:
         _t0_search = time.perf_counter()
     
-    # Tuple[meilleur_score: int, meilleur_board: Board]
-    best_score_board = min_max(DEPTH, initial_board, color, color, -999999, 999999)
+    # Tuple[meilleur_score: int, meilleur_coup: ((x, y), (x, y))]
+    if LAZY_SMP and not MULTIPLAYER:
+        best_score_move = lazy_smp_search(initial_board, color, target_depth)
+    else:
+        best_score_move = iterative_deepening(initial_board, color, target_depth)
+
+    # La réflexion a pu aller plus profond que la recherche de ce tour
+    if ponder_hit and ponder_result[2] > COMPLETED_DEPTH:
+        best_score_move = ponder_result[3]
 
     if METRICS_ENABLED:
         METRICS["t_search"] += (time.perf_counter() - _t0_search)
+        if METRICS["t_search"] > 0:
+            METRICS["smp_nps"] = (METRICS["minmax_calls"] + METRICS["quiescence_calls"]) / METRICS["t_search"]
+        if METRICS["cutoffs"] > 0:
+            METRICS["first_move_cutoff_rate"] = METRICS["cutoffs_first_move"] / METRICS["cutoffs"]
+        if METRICS["parallel_wall_time"] > 0:
+            METRICS["parallel_speedup"] = METRICS["parallel_busy_time"] / METRICS["parallel_wall_time"]
+        if METRICS["parallel_nodes"] > 0:
+            METRICS["search_overhead"] = METRICS["parallel_stale_nodes"] / METRICS["parallel_nodes"]
+
+    # Résultat structuré, seulement si l'appelant le demande (extraction de la variation principale)
+    if on_search_result is not None:
+        if METRICS_ENABLED:
+            METRICS["t_total"] = time.perf_counter() - _t0_total
+        on_search_result(build_search_result(initial_board, color, best_score_move))
 
     # Retourne un coup illégal s'il n'y a pas de coup légal
-    if best_score_board[1] == None:
+    if best_score_move[1] == None:
         return (0, 0), (0, 0)
 
     if METRICS_ENABLED:
@@ -136,499 +691,1382 @@ def chess_bot(player_sequence, board, time_budget, **kwargs):
             print(
                 f"[METRICS] total={METRICS['t_total']:.4f}s "
                 f"search={METRICS['t_search']:.4f}s eval={METRICS['t_eval']:.4f}s | "
-                f"minmax_calls={METRICS['minmax_calls']} boards={METRICS['boards_generated']} | "
+                f"minmax_calls={METRICS['minmax_calls']} quiescence_calls={METRICS['quiescence_calls']} moves_made={METRICS['moves_made']} | "
                 f"moves gen={METRICS['moves_generated']} legal={METRICS['moves_legal']} "
                 f"illegal_check={METRICS['moves_illegal_check']} | "
-                f"cutoffs={METRICS['cutoffs']} timeouts={METRICS['timeouts']} cache_hits={METRICS['cache_hits']} | "
-                f"max_depth={METRICS['max_depth_reached']}"
+                f"cutoffs={METRICS['cutoffs']} first_move_cutoffs={METRICS['first_move_cutoff_rate']:.2f} timeouts={METRICS['timeouts']} cache_hits={METRICS['cache_hits']} | "
+                f"pvs_researches={METRICS['pvs_researches']} aspiration_fail_low={METRICS['aspiration_fail_low']} "
+                f"aspiration_fail_high={METRICS['aspiration_fail_high']} | "
+                f"null_move_cutoffs={METRICS['null_move_cutoffs']}/{METRICS['null_move_tries']} "
+                f"lmr={METRICS['lmr_reductions']} lmr_researches={METRICS['lmr_researches']} | "
+                f"max_depth={METRICS['max_depth_reached']} completed_depth={METRICS['completed_depth']} | "
+                f"time soft={METRICS['time_soft_limit']:.3f}s hard={METRICS['time_hard_limit']:.3f}s "
+                f"predicted_next={METRICS['time_predicted_next']:.3f}s | "
+                f"ponder_hit={METRICS['ponder_hit']} ponder_depth={METRICS['ponder_depth']}"
             )
+            if METRICS["parallel_iterations"] > 0:
+                print(
+                    f"[METRICS] parallel workers={PARALLEL_WORKERS} iterations={METRICS['parallel_iterations']} "
+                    f"speedup={METRICS['parallel_speedup']:.2f} search_overhead={METRICS['search_overhead']:.2f} "
+                    f"nodes={METRICS['parallel_nodes']}"
+                )
+            if METRICS["smp_workers"] > 0:
+                print(
+                    f"[METRICS] lazy_smp workers={METRICS['smp_workers']} worker_nodes={METRICS['smp_nodes']} "
+                    f"worker_depth={METRICS['smp_depth']} nps={METRICS['smp_nps']:.0f}"
+                )
+
+    # Retourne le meilleur coup trouvé, converti en coordonnées du plateau
+    origin, target = best_score_move[1]
+    return to_coords(origin, COLS), to_coords(target, COLS)
+
+
+#=================================================================================================
+# Coup connu sans recherche (livre d'ouvertures, table de finales) : source est le nom de la métrique "<source>_hit"
+def play_without_search(board: Board, color: int, score_move, on_search_result, source: str, t0_total: float):
+    global COMPLETED_DEPTH
+
+    COMPLETED_DEPTH = 0
+    if METRICS_ENABLED:
+        METRICS[f"{source}_hit"] = 1
+        METRICS["t_total"] = time.perf_counter() - t0_total
+    if on_search_result is not None:
+        on_search_result(build_search_result(board, color, score_move))
+    if METRICS_ENABLED and METRICS_PRINT:
+        print(f"[METRICS] {source} move total={METRICS['t_total']:.4f}s score={score_move[0]}")
+    origin, target = score_move[1]
+    return to_coords(origin, COLS), to_coords(target, COLS)
+
+# Meilleur coup d'après la table de finales (voir Martin_Tablebase), pour le plateau tourné de rotation quarts de tour
+# depuis l'orientation de la table : la valeur de la position après chaque coup est lue pour l'adversaire.
+# Une victoire au plus vite, sinon une nulle (départagée par board_evaluation), sinon une défaite au plus tard.
+# Retourne (score, coup), ou None si une position suivante manque à la table ou s'il n'y a aucun coup
+def tablebase_move(board: Board, color: int, tablebase, rotation: int):
+    enemy_color = NEXT_COLOR[color]
+    # Prise du roi, même quand generate_moves ne la produit pas (notre roi resterait attaqué), comme dans negamax
+    king_capture = find_king_capture(board, color, enemy_color)
+    if king_capture is not None:
+        return 999999, king_capture
+
+    best = None
+    for move in generate_moves(board, color):
+        undo = make_move(board, move)
+        pieces = [(board.data[square], to_frame(*to_coords(square, COLS), ROWS, COLS, rotation))
+                  for squares in board.state.pieces for square in squares]
+        value = tablebase.value(pieces, enemy_color)
+        if value is None:
+            unmake_move(board, undo)
+            return None
+        if value < 0:
+            # Adversaire perdu en -value - 1 demi-coups : victoire en -value demi-coups, la plus courte d'abord
+            rank = (2, value)
+        elif value == 0:
+            rank = (1, board_evaluation(board, color))
+        else:
+            # Adversaire gagnant en value demi-coups : la défaite la plus lointaine d'abord
+            rank = (0, value)
+        unmake_move(board, undo)
+
+        if best is None or rank > best[0]:
+            best = (rank, move)
+
+    if best is None:
+        return None
+    result = best[0][0]
+    score = 999999 if result == 2 else 0 if result == 1 else -999999
+    return score, best[1]
+
+#=================================================================================================
+# Construction du SearchResult d'une recherche terminée à partir de METRICS (valeurs nulles si les métriques sont désactivées)
+def build_search_result(board: Board, color: int, score_move) -> SearchResult:
+    score, move = score_move
+    pv = [] if move is None else extract_pv(board, color, move, max(COMPLETED_DEPTH, 1))
+    best_move = pv[0] if pv else None
+    if not METRICS_ENABLED:
+        return SearchResult(best_move, score, pv, COMPLETED_DEPTH, 0, 0, 0.0, 0.0, 0, 0.0, [], 0.0)
+
+    nodes = METRICS["minmax_calls"] + METRICS["quiescence_calls"]
+    probes = METRICS["minmax_calls"] + METRICS["cache_hits"]
+    return SearchResult(
+        best_move=best_move,
+        score=score,
+        pv=pv,
+        depth=COMPLETED_DEPTH,
+        seldepth=METRICS["max_depth_reached"],
+        nodes=nodes,
+        nps=nodes / METRICS["t_search"] if METRICS["t_search"] > 0 else 0.0,
+        tt_hit_rate=METRICS["cache_hits"] / probes if probes > 0 else 0.0,
+        cutoffs=METRICS["cutoffs"],
+        first_move_cutoff_rate=METRICS["first_move_cutoff_rate"],
+        iteration_times=list(METRICS["iteration_times"]),
+        time=METRICS["t_total"],
+    )
+
+# Variation principale : le meilleur coup, puis les meilleurs coups enregistrés dans la table de transposition
+# pour les positions suivantes, tant qu'ils sont légaux (une entrée peut avoir été écrasée), au plus length coups.
+# Les coups sont joués puis annulés sur la board, retournés en coordonnées du plateau
+def extract_pv(board: Board, color: int, move, length: int) -> list:
+    pv = []
+    undos = []
+    seen = {board.hash}
+    while True:
+        undos.append(make_move(board, move))
+        pv.append((to_coords(move[0], COLS), to_coords(move[1], COLS)))
+        color = NEXT_COLOR[color]
+        if len(pv) >= length or board.hash in seen:
+            break
+        seen.add(board.hash)
+
+        entry = TRANSPOSITION_TABLE.probe(board.hash ^ TURN_KEYS[color])
+        if entry is None or entry[4] is None or entry[4] not in generate_moves(board, color):
+            break
+        move = entry[4]
+
+    for undo in reversed(undos):
+        unmake_move(board, undo)
+    return pv
 
-    # Retourne le meilleur coup trouvé
-    return best_score_board[1].initial_piece_position, best_score_board[1].next_piece_position
+# Coups légaux du joueur au trait, en coordonnées du plateau (même génération de coups que la recherche)
+def legal_moves(player_sequence, board, player_order=None) -> list:
+    global PERSPECTIVE_COLOR
 
+    color = color_index(player_sequence[1])
+    PERSPECTIVE_COLOR = color
+    init_players(player_order, len(board), len(board[0]))
+    root = create_board(board)
+    return [(to_coords(origin, COLS), to_coords(target, COLS)) for origin, target in generate_moves(root, color)]
 
-def min_max(depth_remaining: int, board: Board, current_color: str, initial_color: str, alpha: int, beta: int) -> tuple[int, Board]:
+
+#=================================================================================================
+# Réflexion pendant le temps de l'adversaire (pondering), lancée par GameManager après notre coup
+# board est le plateau après notre coup, dans notre orientation, stop_event est levé par GameManager avant notre tour.
+# On prédit la réponse adverse (meilleur coup de la table de transposition, sinon recherche courte),
+# on la joue, puis on cherche notre coup suivant comme le ferait chess_bot. La table de transposition reste chaude
+# et, si l'adversaire joue le coup prédit, chess_bot reprend aussi le résultat de cette recherche (PONDER_RESULT).
+# Retourne la réponse adverse prédite, ou None
+def ponder(player_sequence, board, time_budget, stop_event, **kwargs):
+    global PERSPECTIVE_COLOR, TIME_MANAGER, PONDER_RESULT, ROOT_DEPTH, SEARCH_ABORTED
+
+    # Pas de limite souple : on réfléchit tant que l'adversaire n'a pas joué
+    TIME_MANAGER = TimeManager(time_budget, stop_event=stop_event)
+    PONDER_RESULT = None
+    SEARCH_ABORTED = False
+    if METRICS_ENABLED:
+        reset_metrics()
+
+    color = color_index(player_sequence[1])
+    enemy_color = BLACK if color == WHITE else WHITE
+    PERSPECTIVE_COLOR = color
+
+    # La réflexion ne connaît pas l'ordre complet des joueurs : seulement pour les parties à deux couleurs
+    init_players(None, len(board), len(board[0]))
+    root = create_board(board)
+    if sum(1 for pieces in root.state.pieces if pieces) > 2:
+        return None
+    restore_search_state(player_sequence, root, age=False)
+
+    # C'est à l'adversaire de jouer : même hash que ce nœud dans l'arbre de notre recherche précédente
+    root.hash ^= ZOBRIST_SIDE
+
+    predicted = None
+    entry = TRANSPOSITION_TABLE.probe(root.hash)
+    if entry is not None and entry[4] is not None and entry[1] >= PONDER_PREDICTION_DEPTH and \
+       entry[4] in generate_moves(root, enemy_color):
+        predicted = entry[4]
+    if predicted is None:
+        ROOT_DEPTH = PONDER_PREDICTION_DEPTH
+        predicted = negamax(PONDER_PREDICTION_DEPTH, root, enemy_color, color, -999999, 999999)[1]
+    if predicted is None or SEARCH_ABORTED:
+        return None
+
+    # Après la réponse prédite, le hash est celui que chess_bot calculera pour sa racine
+    make_move(root, predicted)
+
+    target_depth = DEPTH
+    if get_game_phase(root) == "LATE":
+        target_depth += LATE_GAME_DEPTH_BONUS
+    score_move = iterative_deepening(root, color, target_depth, parallel=False)
+    if score_move[1] is not None and COMPLETED_DEPTH > 0:
+        PONDER_RESULT = (root.hash, player_sequence, COMPLETED_DEPTH, score_move)
+
+    return to_coords(predicted[0], COLS), to_coords(predicted[1], COLS)
+
+
+def iterative_deepening(board: Board, color: int, target_depth: int, parallel: bool = None, start_depth: int = 1) -> tuple[int, tuple]:
     """
-        Algorithme récursif de recherche de la board avec le meilleur score.
-        L'objectif est de maximiser le score du joueur avec la initial_color.
-        On part du principe que le joueur adverse va jouer le pire coup pour le joueur de initial_color.
-        Ainsi de suite jusqu'à arriver au cas de base quand depth_remaining arrive à 0
-        L'optimisation se fait avec la mémorisation et le alpha-beta pruning
-        La mémorisation se fait en hashant les boards avec leur couleur et la profondeur restante puis en les stockant dans un dictionnaire {hash, [score, board]}
-        L'alpha et beta pruning permet de couper les branches lesquelles on a la certitude qu'elles ne sont pas prises en compte
-        Alpha   : Représente la meilleure valeur que le joueur MAX peut déjà garantir
-        Beta    : Représente la pire valeur que le joueur MIN peut imposer à MAX
+        Recherche par approfondissement itératif (iterative deepening).
+        On lance negamax à la profondeur start_depth (1 par défaut), puis la suivante... tant que le temps le permet.
+        À partir de ASPIRATION_MIN_DEPTH, la recherche commence avec une fenêtre d'aspiration centrée sur le score
+        de l'itération précédente : si le score sort de la fenêtre, elle est élargie de ce côté et la profondeur est recherchée.
+        Avec parallel (PARALLEL_SEARCH par défaut), les itérations d'au moins PARALLEL_MIN_DEPTH
+        répartissent les coups de la racine sur le pool de processus (parallel_root_search).
+        Avec plus de deux joueurs (MULTIPLAYER), chaque itération est une recherche paranoid ou max-n (multiplayer_search).
+        Seul le résultat de la dernière itération terminée est conservé : une itération
+        interrompue par le timeout est abandonnée, on ne retourne donc jamais un coup à moitié exploré.
+        Une itération n'est lancée que si TIME_MANAGER prédit qu'elle peut se terminer avant la limite dure
+        (durée de la précédente multipliée par le facteur de branchement observé). Au-delà de target_depth,
+        elle doit aussi commencer avant la limite souple.
+        Si aucune itération n'a pu être terminée, on retourne le premier coup légal.
     """
-    # Génération du hash de la board
-    cache_key = (str(board.data), depth_remaining, current_color)
-    
-    # On vérifier si déjà calculé, si oui, on retourne le score et la board en cache
-    if cache_key in PREVIOUS_TABLE_DATA:
+    global SEARCH_ABORTED, ROOT_DEPTH, COMPLETED_DEPTH
+
+    SEARCH_ABORTED = False
+    COMPLETED_DEPTH = 0
+    best_score_move = (-999999, None)
+    if parallel is None:
+        parallel = PARALLEL_SEARCH
+
+    for depth in range(start_depth, MAX_DEPTH + 1):
+        if depth > start_depth and not TIME_MANAGER.can_start_iteration(depth > target_depth):
+            if METRICS_ENABLED:
+                METRICS["time_predicted_next"] = TIME_MANAGER.predict_next_iteration()
+            break
+
+        ROOT_DEPTH = depth
+        iteration_start = time.perf_counter()
+        if MULTIPLAYER:
+            score_move = multiplayer_search(board, color, depth)
+        elif parallel and depth >= PARALLEL_MIN_DEPTH:
+            score_move = parallel_root_search(board, color, depth)
+        elif depth >= ASPIRATION_MIN_DEPTH and best_score_move[1] is not None:
+            score_move = aspiration_search(board, color, depth, best_score_move[0])
+        else:
+            score_move = negamax(depth, board, color, color, -999999, 999999)
+
+        # Itération interrompue, on garde le résultat de la précédente
+        if SEARCH_ABORTED:
+            break
+
+        best_score_move = score_move
+        COMPLETED_DEPTH = depth
+        TIME_MANAGER.record_iteration(time.perf_counter() - iteration_start)
+
+        if METRICS_ENABLED:
+            METRICS["completed_depth"] = depth
+            METRICS["iteration_times"].append((depth, time.perf_counter() - iteration_start))
+
+        # Plus aucun coup légal, ou victoire / défaite forcée trouvée : inutile d'aller plus profond
+        if best_score_move[1] is None or abs(best_score_move[0]) >= 999999:
+            break
+
+    # Aucune itération terminée, on retourne le premier coup légal plutôt qu'un coup illégal
+    if best_score_move[1] is None:
+        for square in sorted(board.state.pieces[color]):
+            legal_moves = possible_mov(square, board)
+            if legal_moves:
+                return -999999, legal_moves[0]
+
+    return best_score_move
+
+#=================================================================================================
+# Recherche de la racine avec une fenêtre d'aspiration autour de previous_score (score de l'itération précédente)
+# Un score hors de la fenêtre n'est qu'une borne : on élargit la fenêtre du côté de l'échec et on recommence
+def aspiration_search(board: Board, color: int, depth: int, previous_score) -> tuple[int, tuple]:
+    window = ASPIRATION_WINDOW
+    alpha, beta = previous_score - window, previous_score + window
+
+    while True:
+        score_move = negamax(depth, board, color, color, alpha, beta)
+        if SEARCH_ABORTED or alpha < score_move[0] < beta or (alpha <= -999999 and beta >= 999999):
+            return score_move
+
+        window *= ASPIRATION_GROWTH
+        if score_move[0] <= alpha:
+            if METRICS_ENABLED:
+                METRICS["aspiration_fail_low"] += 1
+            alpha = previous_score - window if window <= ASPIRATION_MAX_WINDOW else -999999
+        else:
+            if METRICS_ENABLED:
+                METRICS["aspiration_fail_high"] += 1
+            beta = previous_score + window if window <= ASPIRATION_MAX_WINDOW else 999999
+
+
+#=================================================================================================
+# Recherche parallèle à la racine (root splitting, "young brothers wait") :
+# le premier coup de la racine (le meilleur de l'itération précédente) est cherché ici avec la fenêtre complète,
+# son score devient l'alpha partagé, puis les autres coups sont répartis entre les processus du pool.
+# Chaque processus cherche ses coups avec une fenêtre nulle sur l'alpha partagé le plus récent, et ne recherche
+# avec la fenêtre complète que les coups qui le dépassent (principal variation search), puis remonte le nouvel alpha.
+# Métriques : speedup = temps de recherche cumulé de tous les processus / durée réelle des itérations parallèles,
+# search_overhead = part des nœuds cherchés avec un alpha périmé (inférieur au meilleur score final de l'itération).
+def parallel_root_search(board: Board, color: int, depth: int) -> tuple[int, tuple]:
+    global SEARCH_ABORTED
+
+    enemy_color = BLACK if color == WHITE else WHITE
+
+    # Position terminale ou forcée : rien à répartir
+    if find_king_capture(board, color, enemy_color) is not None:
+        return negamax(depth, board, color, color, -999999, 999999)
+
+    entry = TRANSPOSITION_TABLE.probe(board.hash)
+    hash_move = entry[4] if entry is not None else None
+    moves = list(generate_moves(board, color, hash_move, 0))
+    if len(moves) < 2:
+        return negamax(depth, board, color, color, -999999, 999999)
+
+    t0 = time.perf_counter()
+
+    # Premier coup, cherché dans ce processus
+    best_move = moves[0]
+    undo = make_move(board, best_move)
+    best_score = -negamax(depth - 1, board, enemy_color, color, -999999, 999999)[0]
+    unmake_move(board, undo)
+    if SEARCH_ABORTED:
+        return best_score, best_move
+    busy_time = time.perf_counter() - t0
+
+    # Autres coups, répartis à tour de rôle entre les processus
+    pool = get_process_pool()
+    SHARED_ALPHA.value = best_score
+    SMP_STOP.clear()
+    remaining_time = TIME_MANAGER.remaining()
+    chunks = [moves[1 + index::PARALLEL_WORKERS] for index in range(PARALLEL_WORKERS)]
+    futures = [pool.submit(search_root_moves, board.data, ROWS, COLS, PLAYER_SEQUENCE, SEARCH_ID, chunk, depth, remaining_time)
+               for chunk in chunks if chunk]
+
+    # Si le tour est interrompu pendant l'attente (SystemExit du worker arrêté par GameManager), les processus du pool
+    # s'arrêtent aussi : la sortie de l'interpréteur attend la fin de leurs tâches avant les fonctions atexit
+    try:
+        worker_results = [future.result() for future in futures]
+    finally:
+        SMP_STOP.set()
+
+    move_nodes = []
+    for results, nodes, worker_metrics, aborted, worker_time in worker_results:
+        if aborted:
+            SEARCH_ABORTED = True
+        for move, score in results:
+            if score > best_score:
+                best_score, best_move = score, move
+        move_nodes += nodes
+        busy_time += worker_time
         if METRICS_ENABLED:
-            METRICS["cache_hits"] += 1
-        return PREVIOUS_TABLE_DATA[cache_key]
+            for key in PARALLEL_COUNTERS:
+                METRICS[key] += worker_metrics[key]
+            METRICS["max_depth_reached"] = max(METRICS["max_depth_reached"], worker_metrics["max_depth_reached"])
+
+    if METRICS_ENABLED:
+        METRICS["parallel_iterations"] += 1
+        METRICS["parallel_busy_time"] += busy_time
+        METRICS["parallel_wall_time"] += time.perf_counter() - t0
+        METRICS["parallel_nodes"] += sum(nodes for _, nodes in move_nodes)
+        METRICS["parallel_stale_nodes"] += sum(nodes for alpha, nodes in move_nodes if alpha < best_score)
+
+    # Le meilleur coup sera essayé en premier à l'itération suivante
+    if not SEARCH_ABORTED:
+        TRANSPOSITION_TABLE.store(board.hash, depth, best_score, TT_EXACT, best_move)
+
+    return best_score, best_move
+
+#=================================================================================================
+# Pool de processus de la recherche parallèle, créé une seule fois (méthode "spawn" : le processus principal
+# fait tourner des threads Qt, qu'un fork ne recopierait pas proprement)
+def get_process_pool():
+    global PROCESS_POOL, SHARED_ALPHA, SMP_STOP
+
+    if PROCESS_POOL is None:
+        context = multiprocessing.get_context("spawn")
+        SHARED_ALPHA = context.Value('d', 0.0)
+        SMP_STOP = context.Event()
+        PROCESS_POOL = concurrent.futures.ProcessPoolExecutor(PARALLEL_WORKERS, mp_context=context,
+                                                              initializer=init_worker, initargs=(SHARED_ALPHA, SMP_STOP))
+    return PROCESS_POOL
+
+# Arrêt du pool (à la sortie, ou pour en recréer un avec un autre PARALLEL_WORKERS)
+@atexit.register
+def close_process_pool():
+    global PROCESS_POOL
+
+    if PROCESS_POOL is not None:
+        PROCESS_POOL.shutdown(cancel_futures=True)
+        PROCESS_POOL = None
+
+# Préparation du processus du bot avant son premier tour (register_setup) : démarrer le pool pendant un tour
+# coûte plus que le budget (chaque processus "spawn" importe le bot). Une tâche vide par processus attend
+# qu'ils soient tous démarrés, le bot importé par init_worker. La table partagée Lazy SMP est aussi créée ici
+def setup_search():
+    if PARALLEL_SEARCH or LAZY_SMP:
+        pool = get_process_pool()
+        for future in [pool.submit(os.getpid) for _ in range(PARALLEL_WORKERS)]:
+            future.result()
+    if LAZY_SMP:
+        get_shared_table()
+
+# Fin de setup_search quand le processus du bot s'arrête (register_teardown), même pendant un tour : multiprocessing
+# attend la fin des processus du pool avant les fonctions atexit, qui ne les arrêteraient jamais
+def close_search():
+    close_process_pool()
+    close_shared_table()
+
+def init_worker(shared_alpha, smp_stop):
+    global SHARED_ALPHA, SMP_STOP, METRICS_PRINT
+    SHARED_ALPHA = shared_alpha
+    SMP_STOP = smp_stop
+    METRICS_PRINT = False
+
+# Table partagée du processus principal (créée) ou d'un processus du pool (attachée par son nom)
+def get_shared_table(name=None):
+    global SHARED_TABLE
+
+    if SHARED_TABLE is None or (name is not None and SHARED_TABLE.name != name):
+        SHARED_TABLE = SharedTranspositionTable(TT_SIZE_BITS, name)
+    return SHARED_TABLE
+
+# Fermeture de la table partagée, supprimée par le processus principal qui l'a créée
+# (une table locale la remplace si c'était la table de la recherche en cours)
+@atexit.register
+def close_shared_table():
+    global SHARED_TABLE, TRANSPOSITION_TABLE
+
+    if SHARED_TABLE is not None:
+        if TRANSPOSITION_TABLE is SHARED_TABLE:
+            TRANSPOSITION_TABLE = TranspositionTable(TT_SIZE_BITS)
+        SHARED_TABLE.close()
+        if SHARED_TABLE.owner:
+            SHARED_TABLE.memory.unlink()
+        SHARED_TABLE = None
+
+#=================================================================================================
+# Recherche Lazy SMP : chaque processus du pool lance sa propre iterative deepening sur la même racine,
+# les processus impairs commencent une profondeur plus loin pour ne pas suivre exactement le même arbre.
+# Aucun partage de travail explicite : les processus s'entraident uniquement par la table de transposition
+# partagée (meilleurs coups et scores déjà calculés par les autres).
+# Le processus principal cherche comme d'habitude, puis arrête les autres et garde le résultat le plus profond.
+def lazy_smp_search(board: Board, color: int, target_depth: int) -> tuple[int, tuple]:
+    global TRANSPOSITION_TABLE, COMPLETED_DEPTH
+
+    pool = get_process_pool()
+    table = get_shared_table()
+    table.new_search()
+    table.salt = PERSPECTIVE_KEYS[color]
+    TRANSPOSITION_TABLE = table
+
+    SMP_STOP.clear()
+    remaining_time = TIME_MANAGER.remaining()
+    futures = [pool.submit(lazy_smp_worker, table.name, table.generation, board.data, ROWS, COLS,
+                           PLAYER_SEQUENCE, SEARCH_ID, index, remaining_time)
+               for index in range(PARALLEL_WORKERS)]
+
+    # Les autres processus s'arrêtent aussi si la recherche est interrompue (voir parallel_root_search)
+    try:
+        best_score_move = iterative_deepening(board, color, target_depth, parallel=False)
+    finally:
+        SMP_STOP.set()
+
+    for future in futures:
+        depth, score_move, worker_metrics = future.result()
+        if depth > COMPLETED_DEPTH and score_move[1] is not None:
+            best_score_move = score_move
+            COMPLETED_DEPTH = depth
+        if METRICS_ENABLED:
+            for key in PARALLEL_COUNTERS:
+                METRICS[key] += worker_metrics[key]
+            METRICS["smp_nodes"] += worker_metrics["minmax_calls"] + worker_metrics["quiescence_calls"]
+            METRICS["smp_depth"] = max(METRICS["smp_depth"], depth)
+            METRICS["max_depth_reached"] = max(METRICS["max_depth_reached"], worker_metrics["max_depth_reached"])
+
+    if METRICS_ENABLED:
+        METRICS["smp_workers"] = len(futures)
+        METRICS["completed_depth"] = COMPLETED_DEPTH
+
+    return best_score_move
+
+# Tâche d'un processus du pool : iterative deepening jusqu'à l'arrêt demandé par le processus principal (SMP_STOP)
+# ou la fin du temps. Retourne la profondeur terminée, son (score, coup) et les métriques du processus
+def lazy_smp_worker(table_name, generation, cells, rows, cols, player_sequence, search_id, index, time_limit):
+    global PERSPECTIVE_COLOR, TIME_MANAGER, TRANSPOSITION_TABLE, WORKER_SEARCH_ID
+
+    TIME_MANAGER = TimeManager(time_limit, stop_event=SMP_STOP)
+    reset_metrics()
+
+    color = color_index(player_sequence[1])
+    PERSPECTIVE_COLOR = color
+
+    init_mailbox(rows, cols)
+    init_zobrist(rows, cols)
+    board = Board(cells, compute_hash(cells), EvalState(cells))
+    if WORKER_SEARCH_ID != search_id:
+        restore_search_state(player_sequence, board)
+        WORKER_SEARCH_ID = search_id
+
+    table = get_shared_table(table_name)
+    table.generation = generation
+    table.salt = PERSPECTIVE_KEYS[color]
+    TRANSPOSITION_TABLE = table
+
+    score_move = iterative_deepening(board, color, MAX_DEPTH, parallel=False, start_depth=1 + index % 2)
+    return COMPLETED_DEPTH, score_move, METRICS
+
+#=================================================================================================
+# Tâche exécutée dans un processus du pool : recherche d'une partie des coups de la racine
+# Chaque processus garde sa table de transposition et ses heuristiques d'un appel à l'autre (restore_search_state)
+# Retourne les coups qui ont dépassé l'alpha partagé avec leur score, (alpha de départ, nœuds) de chaque coup,
+# les métriques du processus, si le temps a été dépassé et la durée de la recherche
+def search_root_moves(cells, rows, cols, player_sequence, search_id, moves, depth, time_limit):
+    global PERSPECTIVE_COLOR, TIME_MANAGER, ROOT_DEPTH, SEARCH_ABORTED, WORKER_SEARCH_ID
+
+    t0 = time.perf_counter()
+    TIME_MANAGER = TimeManager(time_limit, stop_event=SMP_STOP)
+    reset_metrics()
+
+    color = color_index(player_sequence[1])
+    enemy_color = BLACK if color == WHITE else WHITE
+    PERSPECTIVE_COLOR = color
+
+    init_mailbox(rows, cols)
+    init_zobrist(rows, cols)
+    board = Board(cells, compute_hash(cells), EvalState(cells))
+    if WORKER_SEARCH_ID != search_id:
+        restore_search_state(player_sequence, board)
+        WORKER_SEARCH_ID = search_id
+
+    ROOT_DEPTH = depth
+    SEARCH_ABORTED = False
+    results = []
+    move_nodes = []
+    for move in moves:
+        alpha = SHARED_ALPHA.value
+        nodes_before = METRICS["minmax_calls"] + METRICS["quiescence_calls"]
+
+        undo = make_move(board, move)
+        score = -negamax(depth - 1, board, enemy_color, color, -alpha - PVS_WINDOW, -alpha)[0]
+        if score > alpha and not SEARCH_ABORTED:
+            if METRICS_ENABLED:
+                METRICS["pvs_researches"] += 1
+            score = -negamax(depth - 1, board, enemy_color, color, -999999, -alpha)[0]
+        unmake_move(board, undo)
+        if SEARCH_ABORTED:
+            break
+
+        move_nodes.append((alpha, METRICS["minmax_calls"] + METRICS["quiescence_calls"] - nodes_before))
+        if score > alpha:
+            results.append((move, score))
+            with SHARED_ALPHA.get_lock():
+                if score > SHARED_ALPHA.value:
+                    SHARED_ALPHA.value = score
+
+    return results, move_nodes, METRICS, SEARCH_ABORTED, time.perf_counter() - t0
+
+
+def negamax(depth_remaining: int, board: Board, current_color: int, initial_color: int, alpha: int, beta: int,
+            null_move: bool = True) -> tuple[int, tuple]:
+    """
+        Algorithme récursif de recherche du meilleur coup, sous forme negamax :
+        le score est toujours donné du point de vue du joueur au trait (current_color), le score d'un coup est
+        l'opposé du score de la position suivante, avec la fenêtre (-beta, -alpha) inversée.
+        L'évaluation reste calculée du point de vue de initial_color, son signe est inversé quand l'adversaire est au trait.
+        Les coups sont joués puis annulés directement sur la board (make_move / unmake_move), sans copie.
+        Ainsi de suite jusqu'à arriver au cas de base quand depth_remaining arrive à 0 (quiescence)
+        Principal variation search : le premier coup (le plus prometteur d'après l'ordonnancement) est cherché
+        avec la fenêtre complète, les suivants avec une fenêtre nulle (alpha, alpha + PVS_WINDOW) qui prouve seulement
+        qu'ils ne sont pas meilleurs. Un coup qui dépasse alpha est recherché avec la fenêtre complète (pvs_researches).
+        Recherche sélective (hors de la racine et si le joueur au trait n'est pas en échec) :
+        - Coup nul : on passe son tour et on cherche moins profondément (NULL_MOVE_REDUCTION). Si l'adversaire
+          ne parvient toujours pas à descendre sous beta, un vrai coup fera au moins aussi bien : on coupe la branche.
+          Interdit en fin de partie (LATE) et sans pièce autre que pions et roi, où passer son tour serait souvent
+          le meilleur coup (zugzwang), et deux fois de suite (null_move).
+        - Late move reductions : les coups calmes triés tardivement sont d'abord cherchés moins profondément,
+          puis à la profondeur normale s'ils dépassent alpha (lmr_researches).
+        La mémorisation se fait dans la table de transposition, indexée par le hash de Zobrist de la board (qui inclut le joueur au trait).
+        Une entrée stocke le score, son type de borne (exact / inférieure / supérieure), la profondeur restante et le meilleur coup.
+        Elle n'est utilisée que si elle a été calculée au moins aussi profondément et que sa borne permet de conclure avec l'alpha / beta courant.
+        Alpha   : Représente la meilleure valeur que le joueur au trait peut déjà garantir
+        Beta    : Représente la meilleure valeur que l'adversaire lui laisse, au-delà on coupe la branche
+    """
+    global SEARCH_ABORTED
+
+    # Fenêtre d'origine, nécessaire pour déterminer le type de borne du score à sauvegarder
+    alpha_origin = alpha
+
+    # On vérifie si déjà calculé assez profondément, si oui, on retourne le score en cache
+    # Pas à la racine : on a besoin du meilleur coup, pas seulement de son score
+    # Sinon, le meilleur coup en cache (hash move) sera essayé en premier
+    hash_move = None
+    entry = TRANSPOSITION_TABLE.probe(board.hash)
+    if entry is not None:
+        _, entry_depth, entry_score, entry_bound, hash_move, _ = entry
+        if depth_remaining < ROOT_DEPTH and entry_depth >= depth_remaining:
+            if entry_bound == TT_EXACT or \
+               (entry_bound == TT_LOWER and entry_score >= beta) or \
+               (entry_bound == TT_UPPER and entry_score <= alpha):
+                if METRICS_ENABLED:
+                    METRICS["cache_hits"] += 1
+                return entry_score, None
 
     if METRICS_ENABLED:
         METRICS["minmax_calls"] += 1
 
-        current_depth = DEPTH - depth_remaining
+        current_depth = ROOT_DEPTH - depth_remaining
         if current_depth > METRICS["max_depth_reached"]:
             METRICS["max_depth_reached"] = current_depth
         
-    # Cas de base, on s'arrête à la profondeur 0
+    # Cas de base, à la profondeur 0 on ne continue qu'avec les captures pour obtenir une position calme
     if depth_remaining == 0:
-        return board_evaluation(board, initial_color), board
+        return quiescence(board, current_color, initial_color, alpha, beta, 0), None
 
-    new_boards = []
-
-    # On choisit l'ordre des cases à scanner de façon aléatoire
-    # Cela est utile en tant que stochastique, quand un timeout se produit, il n'y a pas de préférence au niveau des pièces
-    positions = BOARD_POSITIONS.copy()
-    random.shuffle(positions)
-    for x, y in positions:
-        if board.data[x][y] != '' and len(board.data[x][y]) > 1 and board.data[x][y][1] == current_color:
-            new_boards.extend(possible_mov((x, y), board))
-    
     # Si on peut capturer le roi au coup suivant, c'est le meilleur coup
-    enemy_color = 'b' if current_color == 'w' else 'w'
-    for board_candidate in new_boards:
-        if find_king(board_candidate.data, enemy_color) is None:
-            if current_color == initial_color:
-                return 999999, board_candidate
-            else:
-                return -999999, board_candidate
+    # On le cherche directement depuis la case du roi, sans générer les coups
+    enemy_color = BLACK if current_color == WHITE else WHITE
+    king_capture = find_king_capture(board, current_color, enemy_color)
+    if king_capture is not None:
+        return 999999, king_capture
+
+    ply = ROOT_DEPTH - depth_remaining
+    selective = ply > 0 and depth_remaining >= min(NULL_MOVE_MIN_DEPTH, LMR_MIN_DEPTH) and \
+        not is_king_in_check(board.data, current_color, board.state.kings.get(current_color))
+
+    # Coup nul : seul le joueur au trait change (même hash que make_move sans déplacement)
+    if selective and null_move and depth_remaining >= NULL_MOVE_MIN_DEPTH and beta < 999999 and \
+       get_game_phase(board) != "LATE" and has_non_pawn_material(board, current_color):
+        if METRICS_ENABLED:
+            METRICS["null_move_tries"] += 1
+        board.hash ^= ZOBRIST_SIDE
+        null_score = -negamax(max(0, depth_remaining - 1 - NULL_MOVE_REDUCTION), board, enemy_color, initial_color,
+                              -beta, -beta + PVS_WINDOW, False)[0]
+        board.hash ^= ZOBRIST_SIDE
+        if SEARCH_ABORTED:
+            return null_score, None
+        if null_score >= beta:
+            if METRICS_ENABLED:
+                METRICS["null_move_cutoffs"] += 1
+            # Un score de victoire obtenu en passant son tour n'est pas prouvé
+            return (beta if null_score >= 999999 else null_score), None
 
-    # Joueur à maximiser, on cherche la board avec le meilleur score
-    if current_color == initial_color:
-        best_score_board = (-999999, None)
+    # Les coups sont produits à la demande et dans l'ordre le plus prometteur : une coupure alpha-beta arrête la génération
+    moves = generate_moves(board, current_color, hash_move, ply)
+    moves_searched = 0
+    best_score_move = (-999999, None)
+    reduce_late_moves = selective and depth_remaining >= LMR_MIN_DEPTH
+    killers = KILLER_MOVES[ply] if ply < len(KILLER_MOVES) else ()
 
-        for new_board in new_boards:
-            # Gestion du timeout, on remonte si on a dépassé le temps limite
-            if time.time() - START_TIME > TIME_LIMIT:
+    for move in moves:
+        # Gestion du timeout, on remonte si on a dépassé le temps limite
+        # L'itération est marquée comme abandonnée, son résultat sera ignoré
+        if SEARCH_ABORTED or TIME_MANAGER.out_of_time():
+            if METRICS_ENABLED and not SEARCH_ABORTED:
+                METRICS["timeouts"] += 1
+            SEARCH_ABORTED = True
+            return best_score_move
+
+        undo = make_move(board, move)
+        if moves_searched == 0:
+            current_score = -negamax(depth_remaining - 1, board, enemy_color, initial_color, -beta, -alpha)[0]
+        else:
+            # Coup calme trié tardivement (ni capture, ni promotion, ni killer, ne met pas en échec) : profondeur réduite
+            reduction = 0
+            if reduce_late_moves and moves_searched >= LMR_MIN_MOVES and undo[3] == EMPTY and not undo[4] and \
+               move not in killers and not is_king_in_check(board.data, enemy_color, board.state.kings.get(enemy_color)):
+                reduction = 2 if moves_searched >= LMR_DEEP_MOVES and depth_remaining > LMR_MIN_DEPTH else 1
                 if METRICS_ENABLED:
-                    METRICS["timeouts"] += 1
-                return best_score_board
-            
-            current_score_board = min_max(depth_remaining - 1, new_board, enemy_color, initial_color, alpha, beta)
-
-            # Recherche de la meilleure board possible pour le joueur avec initial_color
-            if current_score_board[0] > best_score_board[0]:
-                best_score_board = (current_score_board[0], new_board)
-            
-            # Si la board actuelle est meilleure que l'alpha, il prend sa place
-            if current_score_board[0] > alpha:
-                alpha = current_score_board[0]
-            
-            if alpha >= beta:
-                # Le joueur MIN a déjà un coup qui empêche le joueur MAX d'obtenir un meilleur résultat, alors on coupe la branche.
+                    METRICS["lmr_reductions"] += 1
+
+            # Fenêtre nulle : suffit à montrer que le coup ne dépasse pas alpha
+            current_score = -negamax(depth_remaining - 1 - reduction, board, enemy_color, initial_color, -alpha - PVS_WINDOW, -alpha)[0]
+            if reduction and current_score > alpha and not SEARCH_ABORTED:
                 if METRICS_ENABLED:
-                    METRICS["cutoffs"] += 1
-                break
-    # Joueur à minimiser
-    else:
-        best_score_board = (9999999, None)
-    
-        for new_board in new_boards:
-            # Gestion du timeout, on remonte si on a dépassé le temps limite
-            if time.time() - START_TIME > TIME_LIMIT:
+                    METRICS["lmr_researches"] += 1
+                current_score = -negamax(depth_remaining - 1, board, enemy_color, initial_color, -alpha - PVS_WINDOW, -alpha)[0]
+            if alpha < current_score < beta and not SEARCH_ABORTED:
                 if METRICS_ENABLED:
-                    METRICS["timeouts"] += 1
-                return best_score_board
+                    METRICS["pvs_researches"] += 1
+                current_score = -negamax(depth_remaining - 1, board, enemy_color, initial_color, -beta, -alpha)[0]
+        unmake_move(board, undo)
+        moves_searched += 1
+
+        # Recherche du meilleur coup pour le joueur au trait
+        if current_score > best_score_move[0]:
+            best_score_move = (current_score, move)
+
+        # Si le coup actuel est meilleur que l'alpha, il prend sa place
+        if current_score > alpha:
+            alpha = current_score
+
+        if alpha >= beta:
+            # L'adversaire a déjà un coup qui empêche d'obtenir ce résultat, alors on coupe la branche.
+            record_cutoff(move, undo, current_color, ply, depth_remaining, moves_searched)
+            break
+
+    # On sauvegarde le score référencé par le hash de la board dans la table de transposition
+    # Un résultat issu d'une recherche interrompue est incomplet, on ne le sauvegarde pas
+    if not SEARCH_ABORTED:
+        if best_score_move[0] <= alpha_origin:
+            bound = TT_UPPER
+        elif best_score_move[0] >= beta:
+            bound = TT_LOWER
+        else:
+            bound = TT_EXACT
 
-            current_score_board = min_max(depth_remaining - 1, new_board, enemy_color, initial_color, alpha, beta)
+        TRANSPOSITION_TABLE.store(board.hash, depth_remaining, best_score_move[0], bound, best_score_move[1])
+        if METRICS_ENABLED:
+            METRICS["tt_stores"] += 1
     
-            # Recherche de la pire board possible pour le joueur avec initial_color
-            if current_score_board[0] < best_score_board[0]:
-                best_score_board = (current_score_board[0], new_board)
-            
-            if current_score_board[0] < beta:
-                beta = current_score_board[0]
-            
-            if beta <= alpha:
-                # Le joueur MIN a déjà un coup qui empêche le joueur MAX d'obtenir un meilleur résultat, alors on coupe la branche.
+    return best_score_move
+
+def quiescence(board: Board, current_color: int, initial_color: int, alpha: int, beta: int, quiescence_depth: int) -> int:
+    """
+        Recherche de quiescence : à l'horizon de negamax, on continue d'explorer uniquement les captures
+        pour ne jamais évaluer une position au milieu d'un échange de pièces.
+        Stand pat : le joueur au trait peut toujours refuser de capturer, l'évaluation statique de la position
+        est donc une borne inférieure de son score.
+        Delta pruning : une capture qui, même en gagnant la pièce capturée plus DELTA_MARGIN,
+        ne peut pas améliorer alpha n'est pas explorée.
+        Les scores sont, comme dans negamax, du point de vue du joueur au trait.
+    """
+    global SEARCH_ABORTED
+
+    if METRICS_ENABLED:
+        METRICS["quiescence_calls"] += 1
+
+    stand_pat = board_evaluation(board, initial_color)
+    if current_color != initial_color:
+        stand_pat = -stand_pat
+
+    if stand_pat >= beta:
+        return stand_pat
+    alpha = max(alpha, stand_pat)
+
+    if quiescence_depth >= QUIESCENCE_MAX_DEPTH or abs(stand_pat) >= 999999:
+        return stand_pat
+
+    # La capture du roi termine la partie
+    enemy_color = BLACK if current_color == WHITE else WHITE
+    if find_king_capture(board, current_color, enemy_color) is not None:
+        return 999999
+
+    best_score = stand_pat
+    for move in generate_moves(board, current_color, captures_only=True):
+        # Même gestion du timeout que negamax : l'itération en cours sera ignorée
+        if SEARCH_ABORTED or TIME_MANAGER.out_of_time():
+            if METRICS_ENABLED and not SEARCH_ABORTED:
+                METRICS["timeouts"] += 1
+            SEARCH_ABORTED = True
+            return best_score
+
+        # Delta pruning, le gain maximal est la pièce capturée (plus la promotion éventuelle)
+        origin, target = move
+        gain = TYPE_VALUES[board.data[target] & TYPE_MASK]
+        if board.data[origin] & TYPE_MASK == PAWN and is_promotion(current_color, target):
+            gain += QUEENS_WEIGHT - PAWNS_WEIGHT
+        if stand_pat + gain + DELTA_MARGIN <= alpha:
+            continue
+
+        undo = make_move(board, move)
+        score = -quiescence(board, enemy_color, initial_color, -beta, -alpha, quiescence_depth + 1)
+        unmake_move(board, undo)
+
+        if score > best_score:
+            best_score = score
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            break
+
+    return best_score
+
+#=================================================================================================
+# Recherche multijoueur (plus de deux joueurs, voir init_players), sur l'ordre réel des tours (NEXT_COLOR).
+# Une profondeur est le coup d'un seul joueur. Un joueur sans coup légal (roi capturé, ou mat) passe son tour.
+# Le hash de la board ne dit que la parité du nombre de coups joués : dans la table de transposition,
+# la clé est complétée par la clé du joueur au trait (TURN_KEYS).
+def multiplayer_search(board: Board, color: int, depth: int) -> tuple[int, tuple]:
+    if MULTIPLAYER_SEARCH == "max-n" and NUM_SIDES > 2:
+        scores, move = max_n(depth, board, color)
+        return scores[SIDE_OF[color]], move
+    # Avec deux équipes, max-n revient à paranoid, qui peut couper les branches
+    return paranoid(depth, board, color, -999999, 999999)
+
+def paranoid(depth_remaining: int, board: Board, current_color: int, alpha: int, beta: int) -> tuple[int, tuple]:
+    """
+        Recherche paranoid : les autres équipes sont supposées jouer ensemble contre la nôtre,
+        la partie devient un jeu à deux camps et l'alpha-beta coupe les branches comme à deux joueurs.
+        Le score est toujours du point de vue de notre équipe (évaluation de PERSPECTIVE_COLOR, qui compte
+        notre camp contre la somme des autres) : nos coéquipiers le maximisent, les adversaires le minimisent,
+        même quand plusieurs joueurs du même camp jouent à la suite.
+        La table de transposition, les killers et l'historique sont utilisés comme dans negamax.
+    """
+    global SEARCH_ABORTED
+
+    alpha_origin, beta_origin = alpha, beta
+    key = board.hash ^ TURN_KEYS[current_color]
+
+    hash_move = None
+    entry = TRANSPOSITION_TABLE.probe(key)
+    if entry is not None:
+        _, entry_depth, entry_score, entry_bound, hash_move, _ = entry
+        if depth_remaining < ROOT_DEPTH and entry_depth >= depth_remaining:
+            if entry_bound == TT_EXACT or \
+               (entry_bound == TT_LOWER and entry_score >= beta) or \
+               (entry_bound == TT_UPPER and entry_score <= alpha):
                 if METRICS_ENABLED:
-                    METRICS["cutoffs"] += 1
-                break
-    
-    # On sauvegarde la board référencée par son hash dans le dictionnaire
-    PREVIOUS_TABLE_DATA[cache_key] = best_score_board
-    
-    return best_score_board
+                    METRICS["cache_hits"] += 1
+                return entry_score, None
+
+    if METRICS_ENABLED:
+        METRICS["minmax_calls"] += 1
+
+        current_depth = ROOT_DEPTH - depth_remaining
+        if current_depth > METRICS["max_depth_reached"]:
+            METRICS["max_depth_reached"] = current_depth
+
+    if depth_remaining == 0:
+        return board_evaluation(board, PERSPECTIVE_COLOR), None
+
+    ply = ROOT_DEPTH - depth_remaining
+    maximizing = TEAM_OF[current_color] == TEAM_OF[PERSPECTIVE_COLOR]
+    next_color = NEXT_COLOR[current_color]
+    best_score_move = (-999999, None) if maximizing else (999999, None)
+    moves_searched = 0
+
+    for move in generate_moves(board, current_color, hash_move, ply):
+        if SEARCH_ABORTED or TIME_MANAGER.out_of_time():
+            if METRICS_ENABLED and not SEARCH_ABORTED:
+                METRICS["timeouts"] += 1
+            SEARCH_ABORTED = True
+            return best_score_move
+
+        undo = make_move(board, move)
+        current_score = paranoid(depth_remaining - 1, board, next_color, alpha, beta)[0]
+        unmake_move(board, undo)
+        moves_searched += 1
+
+        if maximizing:
+            if current_score > best_score_move[0]:
+                best_score_move = (current_score, move)
+            alpha = max(alpha, current_score)
+        else:
+            if current_score < best_score_move[0]:
+                best_score_move = (current_score, move)
+            beta = min(beta, current_score)
+
+        if alpha >= beta:
+            record_cutoff(move, undo, current_color, ply, depth_remaining, moves_searched)
+            break
+
+    # Aucun coup légal : le joueur passe son tour
+    if moves_searched == 0 and not SEARCH_ABORTED:
+        best_score_move = (paranoid(depth_remaining - 1, board, next_color, alpha, beta)[0], None)
+
+    if not SEARCH_ABORTED:
+        if best_score_move[0] <= alpha_origin:
+            bound = TT_UPPER
+        elif best_score_move[0] >= beta_origin:
+            bound = TT_LOWER
+        else:
+            bound = TT_EXACT
+
+        TRANSPOSITION_TABLE.store(key, depth_remaining, best_score_move[0], bound, best_score_move[1])
+        if METRICS_ENABLED:
+            METRICS["tt_stores"] += 1
+
+    return best_score_move
+
+def max_n(depth_remaining: int, board: Board, current_color: int) -> tuple[tuple, tuple]:
+    """
+        Recherche max-n : chaque feuille est évaluée du point de vue de chaque équipe (un score par camp),
+        et chaque joueur choisit le coup qui maximise le score de son équipe, sans supposer de coalition.
+        Les scores des camps ne sont pas de somme constante : seule la coupure immédiate est possible,
+        quand un joueur a trouvé un coup qui fait gagner son équipe (999999).
+        Les vecteurs de scores ne sont pas mis dans la table de transposition, l'ordre des coups vient des killers et de l'historique.
+    """
+    global SEARCH_ABORTED
+
+    if METRICS_ENABLED:
+        METRICS["minmax_calls"] += 1
+
+        current_depth = ROOT_DEPTH - depth_remaining
+        if current_depth > METRICS["max_depth_reached"]:
+            METRICS["max_depth_reached"] = current_depth
+
+    if depth_remaining == 0:
+        return side_evaluations(board), None
+
+    ply = ROOT_DEPTH - depth_remaining
+    side = SIDE_OF[current_color]
+    next_color = NEXT_COLOR[current_color]
+    best_scores_move = (None, None)
+    moves_searched = 0
+
+    for move in generate_moves(board, current_color, None, ply):
+        if SEARCH_ABORTED or TIME_MANAGER.out_of_time():
+            if METRICS_ENABLED and not SEARCH_ABORTED:
+                METRICS["timeouts"] += 1
+            SEARCH_ABORTED = True
+            break
+
+        undo = make_move(board, move)
+        scores = max_n(depth_remaining - 1, board, next_color)[0]
+        unmake_move(board, undo)
+        moves_searched += 1
+
+        if best_scores_move[0] is None or scores[side] > best_scores_move[0][side]:
+            best_scores_move = (scores, move)
+
+        if scores[side] >= 999999:
+            record_cutoff(move, undo, current_color, ply, depth_remaining, moves_searched)
+            break
+
+    if best_scores_move[0] is None:
+        # Aucun coup légal : le joueur passe son tour (ou recherche interrompue, le résultat sera ignoré)
+        if SEARCH_ABORTED:
+            return side_evaluations(board), None
+        return max_n(depth_remaining - 1, board, next_color)[0], None
+
+    return best_scores_move
+
+# Évaluation de la position du point de vue de chaque camp, par la première couleur du camp qui a encore son roi
+def side_evaluations(board: Board) -> tuple:
+    kings = board.state.kings
+    return tuple(board_evaluation(board, next((color for color in colors if color in kings), colors[0]))
+                 for colors in SIDE_COLORS)
+
+#=================================================================================================
+# Jouer / annuler un coup en place sur la board
+# make_move modifie la board et retourne un enregistrement d'annulation (undo) :
+# (case de départ, case d'arrivée, pièce déplacée, pièce capturée, promotion, hash précédent)
+# unmake_move remet la board exactement dans l'état d'avant le coup à partir de cet enregistrement
+def make_move(board_obj, move):
+    board = board_obj.data
+    origin, target = move
+    moved_piece = board[origin]
+    captured_piece = board[target]
+    previous_hash = board_obj.hash
+
+    # Promotion : un pion qui atteint la dernière rangée dans son sens de marche devient une reine
+    placed_piece = moved_piece
+    promotion = False
+    if moved_piece & TYPE_MASK == PAWN:
+        promotion = is_promotion(moved_piece >> COLOR_SHIFT, target)
+        if promotion:
+            placed_piece = moved_piece - PAWN + QUEEN
+
+    board[target] = placed_piece
+    board[origin] = EMPTY
+
+    state = board_obj.state
+    state.remove_piece(moved_piece, origin)
+    if captured_piece != EMPTY:
+        state.remove_piece(captured_piece, target)
+    state.add_piece(placed_piece, target)
+
+    # Mise à jour incrémentale du hash : pièce retirée de sa case, pièce capturée retirée, pièce posée, changement de joueur
+    # La clé d'une case vide vaut 0, le XOR de la pièce capturée ne change donc rien sans capture
+    destination_keys = ZOBRIST_PIECES[target]
+    board_obj.hash = previous_hash ^ ZOBRIST_PIECES[origin][moved_piece] ^ destination_keys[placed_piece] ^ \
+        destination_keys[captured_piece] ^ ZOBRIST_SIDE
+
+    if METRICS_ENABLED:
+        METRICS["moves_made"] += 1
+
+    return origin, target, moved_piece, captured_piece, promotion, previous_hash
+
+def unmake_move(board_obj, undo):
+    origin, target, moved_piece, captured_piece, promotion, previous_hash = undo
+    board = board_obj.data
+    # La pièce déplacée est restaurée telle quelle, ce qui annule aussi une éventuelle promotion
+    placed_piece = board[target]
+    board[origin] = moved_piece
+    board[target] = captured_piece
+    board_obj.hash = previous_hash
+
+    state = board_obj.state
+    state.remove_piece(placed_piece, target)
+    if captured_piece != EMPTY:
+        state.add_piece(captured_piece, target)
+    state.add_piece(moved_piece, origin)
 
 #=================================================================================================
 # L'idée de l'exploration des coups possibles :
 # Parcourir l'entièreté du plateau (avec une couleur sélectionnée)
 # Pour chaque pièce de cette couleur, générer les coups possibles
 # en fonction du type de pièce (pion, tour, cavalier, fou, reine, roi)
-# Pour chaque coup possible, remplir un tableau ou une liste avec les nouveaux états du plateau
-# qui contient l'id de la pièce qui peut se déplacer sur la case ciblée
-# On aura en résultat un tableau contenant tous les coups possibles pour la couleur sélectionnée avec l'id de la pièce
+# Chaque coup est joué sur la board puis annulé pour vérifier qu'il ne laisse pas le roi en échec
+# On aura en résultat une liste de coups légaux (case de départ, case d'arrivée), sans aucune copie de la board
 def possible_mov(piece_pos, board_obj):
     board = board_obj.data
-    piece = board[piece_pos[0]][piece_pos[1]][0]
-    color = board[piece_pos[0]][piece_pos[1]][1]
-    moves = []
-    boards = []
-    
-    match piece:
-        case 'p':
-            moves = pawn_moves(piece_pos, board, color)
-        case 'r':
-            moves = rook_moves(piece_pos, board, color)
-        case 'n':
-            moves = knight_moves(piece_pos, board, color)
-        case 'b':
-            moves = bishop_moves(piece_pos, board, color)
-        case 'q':
-            moves = queen_moves(piece_pos, board, color)
-        case 'k':
-            moves = king_moves(piece_pos, board, color)
-    
+    piece = board[piece_pos] & TYPE_MASK
+    color = board[piece_pos] >> COLOR_SHIFT
+    legal_moves = []
+    king_pos = board_obj.state.kings.get(color)
+
+    moves = piece_moves(piece_pos, board, piece, color)
+
     if METRICS_ENABLED:
         METRICS["moves_generated"] += len(moves)
     
-    for move in moves:
-        new_data = [row[:] for row in board]
-        new_data[move[0]][move[1]] = new_data[piece_pos[0]][piece_pos[1]]
-        new_data[piece_pos[0]][piece_pos[1]] = ''
+    for target in moves:
+        if is_move_legal(board, piece_pos, target, color, king_pos):
+            legal_moves.append((piece_pos, target))
+    
+    return legal_moves
 
-        if is_king_in_check(new_data, color):
-            if METRICS_ENABLED:
-                METRICS["moves_illegal_check"] += 1
-            continue
-        
+#=================================================================================================
+# Générateur de coups légaux par étapes, les coups sont produits au fur et à mesure (lazy) et du plus au moins prometteur :
+# 1. Le coup de la table de transposition (hash move), produit avant même de générer les autres coups
+# 2. Les captures, triées par MVV-LVA (victime la plus précieuse d'abord, puis attaquant le moins précieux)
+# 3. Les deux coups killers de cette profondeur, s'ils sont jouables dans la position
+# 4. Les autres coups calmes, triés par la table d'historique
+# Avec captures_only, seules les captures (étape 2) sont produites, pour la recherche de quiescence
+# Chaque coup n'est vérifié (roi allié en échec) qu'au moment d'être produit :
+# si negamax coupe la branche après les premiers coups, le reste n'est jamais vérifié
+def generate_moves(board_obj, color, hash_move=None, ply=0, captures_only=False):
+    board = board_obj.data
+    king_pos = board_obj.state.kings.get(color)
+
+    # Étape 1 : hash move
+    if hash_move is not None:
+        origin, target = hash_move
+        content = board[origin]
+        if content > 0 and content >> COLOR_SHIFT == color and \
+           target in piece_moves(origin, board, content & TYPE_MASK, color) and \
+           is_move_legal(board, origin, target, color, king_pos):
+            yield hash_move
+
+    captures = []
+    quiet_moves = []
+    for origin in board_obj.state.pieces[color]:
+        piece = board[origin] & TYPE_MASK
+
+        targets = piece_moves(origin, board, piece, color)
         if METRICS_ENABLED:
-            METRICS["moves_legal"] += 1
-            METRICS["boards_generated"] += 1
-        
-        new_board = Board(new_data, piece_pos, move)
-        boards.append(new_board)
-    
-    return boards
+            METRICS["moves_generated"] += len(targets)
+
+        attacker_value = TYPE_VALUES[piece]
+        for target in targets:
+            move = (origin, target)
+            if move == hash_move:
+                continue
+            victim = board[target]
+            if victim == EMPTY:
+                if not captures_only:
+                    quiet_moves.append(move)
+            else:
+                captures.append((TYPE_VALUES[victim & TYPE_MASK] * 10 - attacker_value, move))
+
+    # Étape 2 : captures, MVV-LVA
+    captures.sort(key=lambda capture: capture[0], reverse=True)
+    for _, move in captures:
+        if is_move_legal(board, move[0], move[1], color, king_pos):
+            yield move
+
+    if captures_only:
+        return
+
+    # Étape 3 : killers (seulement s'ils font partie des coups calmes de cette position)
+    killers = []
+    if ply < len(KILLER_MOVES):
+        for killer in KILLER_MOVES[ply]:
+            if killer is not None and killer != hash_move and killer in quiet_moves:
+                killers.append(killer)
+                if is_move_legal(board, killer[0], killer[1], color, king_pos):
+                    yield killer
+
+    # Étape 4 : coups calmes, par score d'historique
+    history = HISTORY_TABLE.get(color, {})
+    quiet_moves.sort(key=lambda move: history.get(move, 0), reverse=True)
+    for move in quiet_moves:
+        if move in killers:
+            continue
+        if is_move_legal(board, move[0], move[1], color, king_pos):
+            yield move
 
 #=================================================================================================
-# Fonction pour trouver le roi (et gérer par la suite les échecs et échecs et mat)
-def find_king(board, color):
-    for x in range(len(board)):
-        for y in range(len(board[0])):
-            pos = board[x][y]
-            if pos != '' and len(pos) > 1 and pos[0] == 'k' and pos[1] == color:
-                return (x, y)
-    return None
+# Remise à zéro des heuristiques d'ordonnancement (killers et historique)
+def reset_move_ordering():
+    global KILLER_MOVES, HISTORY_TABLE
+    KILLER_MOVES = [[None, None] for _ in range(MAX_DEPTH + 1)]
+    HISTORY_TABLE = {}
 
 #=================================================================================================
-# Fonction pour vérifier si un chemin n'est pas obstrué (de manière générale)
-def is_path_clear(board, x, y, dx, dy, steps):
-    for i in range(1, steps):
-        nx = x + dx * i
-        ny = y + dy * i
-        if board[nx][ny] != '':
-            return False
-    return True
+# Reprise de l'état de recherche de la partie en cours, identifiée par la forme du plateau et la séquence du joueur
+# ou, en multijoueur, l'ordre complet des joueurs (les scores sont du point de vue de sa couleur, ou de son équipe,
+# et le sens des pions dépend de sa rotation).
+# Les positions de la table de transposition restent valables d'un coup à l'autre : la table n'est pas effacée,
+# ses entrées vieillissent (nouvelle génération), l'historique est atténué et les killers sont décalés de deux demi-coups.
+# Une partie dont le nombre de pièces augmente est une nouvelle partie : son état repart de zéro.
+# Avec age=False (réflexion sur le temps adverse), l'état est repris sans vieillir : il ne vieillit qu'une fois par coup joué.
+def restore_search_state(player_sequence, board_obj, age=True):
+    global TRANSPOSITION_TABLE, KILLER_MOVES, HISTORY_TABLE
+
+    key = (ROWS, COLS, player_sequence)
+    piece_count = board_obj.state.piece_count
+    search_state = SEARCH_STATES.get(key)
+
+    if search_state is None:
+        # Les parties les plus anciennes sont oubliées en premier
+        if len(SEARCH_STATES) >= MAX_SEARCH_STATES:
+            del SEARCH_STATES[next(iter(SEARCH_STATES))]
+        reset_move_ordering()
+        search_state = SearchState(TranspositionTable(TT_SIZE_BITS), KILLER_MOVES, HISTORY_TABLE, piece_count)
+        SEARCH_STATES[key] = search_state
+    elif piece_count > search_state.piece_count:
+        reset_move_ordering()
+        search_state.table.clear()
+        search_state.killers, search_state.history = KILLER_MOVES, HISTORY_TABLE
+    elif age:
+        search_state.table.new_search()
+        search_state.killers = search_state.killers[KILLER_PLY_SHIFT:] + \
+            [[None, None] for _ in range(KILLER_PLY_SHIFT)]
+        search_state.history = {color: {move: score // HISTORY_AGING_DIVISOR for move, score in moves.items()
+                                        if score >= HISTORY_AGING_DIVISOR}
+                                for color, moves in search_state.history.items()}
+
+    search_state.piece_count = piece_count
+    TRANSPOSITION_TABLE = search_state.table
+    KILLER_MOVES = search_state.killers
+    HISTORY_TABLE = search_state.history
 
 #=================================================================================================
-# Fonction pour vérifier si le roi est en échec
-def is_king_in_check(board, color):
-    king_pos = find_king(board, color)
-    if king_pos is None:
-        return True  # Pas de roi = situation invalide -> on considère "en échec"
+# Mise à jour des métriques et des heuristiques quand un coup provoque une coupure alpha-beta
+# Seuls les coups calmes deviennent killers et alimentent l'historique (les captures sont déjà bien triées par MVV-LVA)
+def record_cutoff(move, undo, color, ply, depth_remaining, moves_searched):
+    if METRICS_ENABLED:
+        METRICS["cutoffs"] += 1
+        if moves_searched == 1:
+            METRICS["cutoffs_first_move"] += 1
 
-    for x in range(len(board)):
-        for y in range(len(board[0])):
-            sq = board[x][y]
-            if sq == '' or len(sq) < 2:
-                continue
-            if sq[1] == color:
-                continue  # Allié
-            if attacks_square((x, y), king_pos, board):
-                return True
-    return False
+    captured_piece = undo[3]
+    if captured_piece != EMPTY:
+        return
+
+    if ply < len(KILLER_MOVES):
+        killers = KILLER_MOVES[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    history = HISTORY_TABLE.setdefault(color, {})
+    history[move] = history.get(move, 0) + depth_remaining * depth_remaining
 
 #=================================================================================================
-# Fonction pour vérifier si une case est attaquée par une pièce ennemie (réflexion inversée des fonctions de mouvement qui suivent)
-# La fonction is_path_clear est utilisée seulement ici et pas dans les fonctions de mouvement implémentées AVANT.
-def attacks_square(from_pos, target_pos, board):
-    fx, fy = from_pos
-    tx, ty = target_pos
+# Coups pseudo-légaux d'une pièce (sans vérifier si le roi reste en échec)
+# Les cases sont des indices du plateau compact, piece est le type de la pièce (PAWN, ROOK...)
+def piece_moves(piece_pos, board, piece, color):
+    if piece == PAWN:
+        return pawn_moves(piece_pos, board, color)
+    if piece == ROOK:
+        return rook_moves(piece_pos, board, color)
+    if piece == KNIGHT:
+        return knight_moves(piece_pos, board, color)
+    if piece == BISHOP:
+        return bishop_moves(piece_pos, board, color)
+    if piece == QUEEN:
+        return queen_moves(piece_pos, board, color)
+    if piece == KING:
+        return king_moves(piece_pos, board, color)
+    return []
 
-    attacker = board[fx][fy]
-    if attacker == '' or len(attacker) < 2:
+#=================================================================================================
+# Vérifie qu'un coup ne laisse pas le roi allié en échec
+# Seules les deux cases touchées sont modifiées puis restaurées, pas besoin de l'enregistrement complet de make_move
+# king_pos est la case du roi allié avant le coup (elle change si c'est le roi qui se déplace)
+def is_move_legal(board, piece_pos, target, color, king_pos):
+    moved_piece = board[piece_pos]
+    captured_piece = board[target]
+    board[target] = moved_piece
+    board[piece_pos] = EMPTY
+
+    if moved_piece & TYPE_MASK == KING:
+        king_pos = target
+    in_check = king_pos is None or find_attacker(board, king_pos, defender_color=color) is not None
+
+    board[piece_pos] = moved_piece
+    board[target] = captured_piece
+
+    if in_check:
+        if METRICS_ENABLED:
+            METRICS["moves_illegal_check"] += 1
         return False
 
-    piece = attacker[0]
-    attacker_color = attacker[1]
-    dx = tx - fx
-    dy = ty - fy
-
-    adx = abs(dx)
-    ady = abs(dy)
-
-    # Pion
-    if piece == 'p':
-        pawn_step = 1 if attacker_color == PERSPECTIVE_COLOR else -1
-        return (dx == pawn_step and (dy == -1 or dy == 1))
-
-    # Roi
-    if piece == 'k':
-        return adx <= 1 and ady <= 1 and not (adx == 0 and ady == 0)
-
-    # Cavalier
-    if piece == 'n':
-        return (adx, ady) in [(1, 2), (2, 1)]
-
-    # Tour
-    if piece == 'r':
-        if dx == 0 and dy != 0:
-            steps = ady
-            step_y = 1 if dy > 0 else -1
-            return is_path_clear(board, fx, fy, 0, step_y, steps)
-        if dy == 0 and dx != 0:
-            steps = adx
-            step_x = 1 if dx > 0 else -1
-            return is_path_clear(board, fx, fy, step_x, 0, steps)
-        return False
+    if METRICS_ENABLED:
+        METRICS["moves_legal"] += 1
+    return True
 
-    # Fou
-    if piece == 'b':
-        if adx == ady and adx != 0:
-            steps = adx
-            step_x = 1 if dx > 0 else -1
-            step_y = 1 if dy > 0 else -1
-            return is_path_clear(board, fx, fy, step_x, step_y, steps)
-        return False
+#=================================================================================================
+# Fonction pour trouver un coup qui capture le roi adverse (None si aucun)
+# On part de la case du roi (connue grâce à l'état d'évaluation) et on cherche une pièce alliée qui l'attaque
+def find_king_capture(board_obj, color, enemy_color):
+    king_pos = board_obj.state.kings.get(enemy_color)
+    if king_pos is None:
+        return None
 
-    # Reine
-    if piece == 'q':
-        # Diagonale
-        if adx == ady and adx != 0:
-            steps = adx
-            step_x = 1 if dx > 0 else -1
-            step_y = 1 if dy > 0 else -1
-            return is_path_clear(board, fx, fy, step_x, step_y, steps)
-        # Ligne ou colonne
-        if dx == 0 and dy != 0:
-            steps = ady
-            step_y = 1 if dy > 0 else -1
-            return is_path_clear(board, fx, fy, 0, step_y, steps)
-        if dy == 0 and dx != 0:
-            steps = adx
-            step_x = 1 if dx > 0 else -1
-            return is_path_clear(board, fx, fy, step_x, 0, steps)
-        return False
+    attacker_pos = find_attacker(board_obj.data, king_pos, attacker_color=color)
+    if attacker_pos is None:
+        return None
+    return attacker_pos, king_pos
 
-    return False
+#=================================================================================================
+# Fonction pour trouver le roi (et gérer par la suite les échecs et échecs et mat)
+def find_king(board, color):
+    king = make_piece(KING, color)
+    for square in SQUARES:
+        if board[square] == king:
+            return square
+    return None
 
 #=================================================================================================
-# Fonction générale qui définit si une case est possible ou pas
-def isMoveValid(target_pos, target_content, board, color):
-    # Si hors plateau alors move impossible
-    if target_pos[0] < 0 or target_pos[0] >= len(board) or target_pos[1] < 0 or target_pos[1] >= len(board[0]):
-        return False
+# Fonction pour vérifier si le roi est en échec
+# king_pos évite de chercher le roi sur tout le plateau quand sa case est déjà connue
+def is_king_in_check(board, color, king_pos=None):
+    if king_pos is None:
+        king_pos = find_king(board, color)
+    if king_pos is None:
+        return True  # Pas de roi = situation invalide -> on considère "en échec"
 
-    # Si vide alors move possible
-    if target_content == '':
-        return True
-        
-    # Si ennemie alors move possible
-    if len(target_content) > 1 and target_content[1] != color:
-        return True
-        
-    # Si alliée alors c'est interdit (on ne fait rien)
-    return False
+    return find_attacker(board, king_pos, defender_color=color) is not None
+
+#=================================================================================================
+# Fonction pour trouver une pièce qui attaque la case square, par recherche inversée depuis cette case :
+# sur chaque rayon seule la première pièce rencontrée peut attaquer (tour / fou / reine, roi et pion à distance 1),
+# puis les cases à un saut de cavalier. Un rayon s'arrête sur la bordure sentinelle ou un mur, sans test de limites.
+# attacker_color : couleur des attaquants cherchés
+# defender_color : si attacker_color n'est pas donné, toute pièce d'une autre équipe que defender_color attaque
+# Retourne la case de l'attaquant, ou None
+def find_attacker(board, square, attacker_color=None, defender_color=None):
+    defender_team = None if attacker_color is not None else TEAM_OF[defender_color]
+    for direction, step in enumerate(KING_STEPS):
+        target = square + step
+        content = board[target]
+        while content == EMPTY:
+            target += step
+            content = board[target]
+
+        if content > 0:
+            color = content >> COLOR_SHIFT
+            if color == attacker_color or (attacker_color is None and TEAM_OF[color] != defender_team):
+                piece = content & TYPE_MASK
+                diagonal = direction >= 4
+                if piece == QUEEN or (piece == ROOK and not diagonal) or (piece == BISHOP and diagonal):
+                    return target
+                if target == square + step:
+                    if piece == KING:
+                        return target
+                    # Le pion attaque en diagonale vers l'avant : son pas de marche annule la composante de sa marche
+                    if piece == PAWN and diagonal:
+                        forward = pawn_step(color)
+                        if abs(step + forward) == pawn_lateral(forward):
+                            return target
+
+    for step in KNIGHT_STEPS:
+        content = board[square + step]
+        if content > 0 and content & TYPE_MASK == KNIGHT:
+            color = content >> COLOR_SHIFT
+            if color == attacker_color or (attacker_color is None and TEAM_OF[color] != defender_team):
+                return square + step
+
+    return None
+
+#=================================================================================================
+# Géométrie du plateau compact pour une forme de plateau (comme les clés de Zobrist) :
+# cases du plateau, rangée de chaque case et décalages d'indice des déplacements (voir Martin_Board)
+# Grâce à la bordure sentinelle, les déplacements n'ont plus besoin de tables de cases précalculées
+def init_mailbox(rows, cols):
+    global ROWS, COLS, SQUARES, ROW_OF, KING_STEPS, ROOK_STEPS, BISHOP_STEPS, KNIGHT_STEPS, MAILBOX_SHAPE
+
+    if MAILBOX_SHAPE == (rows, cols):
+        return
+
+    ROWS, COLS = rows, cols
+    SQUARES = board_squares(rows, cols)
+    ROW_OF = [-1] * mailbox_size(rows, cols)
+    for square in SQUARES:
+        ROW_OF[square] = to_coords(square, cols)[0]
+    KING_STEPS = king_steps(cols)
+    ROOK_STEPS = KING_STEPS[:4]
+    BISHOP_STEPS = KING_STEPS[4:]
+    KNIGHT_STEPS = knight_steps(cols)
+    MAILBOX_SHAPE = (rows, cols)
 
 #=================================================================================================
 # Mouvements possibles pour le pion
 # Attention le mouvement du pion est le seul avec une fonction spécifique pour manger les pions adverses en diagonale
 def pawn_moves(piece_pos, board, color):
-    x, y = piece_pos
     moves = []
     
-    step = 1 if color == PERSPECTIVE_COLOR else -1
-    
-    # Mouvement en avant possible seulement si case vide
-    if 0 <= x + step < len(board) and board[x + step][y] == '':
-        moves.append((x + step, y))
+    step = pawn_step(color)
+    forward = piece_pos + step
     
-    dirs = [(step, -1), (step, 1)]
+    # Mouvement en avant possible seulement si case vide (la bordure sentinelle n'est jamais vide)
+    if board[forward] == EMPTY:
+        moves.append(forward)
 
-    for dx, dy in dirs:
-        nx = x + dx
-        ny = y + dy
-            
-        if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-            continue
-        target_content = board[nx][ny]
-           
+    lateral = KING_STEPS[1] if step == 1 or step == -1 else 1 # pawn_lateral, sans appel de fonction
+    for target in (forward - lateral, forward + lateral):
         # Seulement si ennemie alors move possible
-        if target_content != '' and len(target_content) > 1 and target_content[1] != color:
-            moves.append((nx, ny))
+        if is_enemy(board[target], color):
+            moves.append(target)
 
     return moves
 
 #=================================================================================================
-# Mouvements possibles de la tour, si son mouvement est bloqué par une pièce alliée ou ennemie, elle ne peut pas sauter par-dessus
-def rook_moves(piece_pos, board, color):
-    x, y = piece_pos
+# Mouvements possibles d'une pièce qui glisse (tour, fou, reine), case par case le long de chaque décalage
+# Si son mouvement est bloqué par une pièce alliée ou ennemie, elle ne peut pas sauter par-dessus
+# La bordure sentinelle et les murs arrêtent le rayon comme une pièce alliée
+def slider_moves(piece_pos, board, color, steps):
     moves = []
 
-    dirs = [(-1,0), (1,0), (0,-1), (0,1)]
-
-    for dx, dy in dirs:
-        step = 1
-
-        while True:
-            nx = x + dx * step
-            ny = y + dy * step
-
-            # S'il y a une sortie plateau => on arrête la boucle
-            if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-                break
-
-            target_content = board[nx][ny]
-
-            # Si la case est vide, on peut continuer
-            if target_content == '':
-                moves.append((nx, ny))
-                step += 1
-                continue
+    for step in steps:
+        target = piece_pos + step
+        target_content = board[target]
 
-            # Si la case est occupée par une pièce ennemie, on peut manger => on arrête
-            if len(target_content) > 1 and target_content[1] != color:
-                moves.append((nx, ny))
-                break
+        # Si la case est vide, on peut continuer
+        while target_content == EMPTY:
+            moves.append(target)
+            target += step
+            target_content = board[target]
 
-            # Si la case est occupée par une pièce alliée, on arrête
-            break
+        # Si la case est occupée par une pièce ennemie, on peut manger => on arrête
+        # Sinon (pièce alliée, mur ou bordure), on arrête
+        if is_enemy(target_content, color):
+            moves.append(target)
 
     return moves
 
 #=================================================================================================
-# Mouvements possibles pour le cavalier
-def knight_moves(piece_pos, board, color):
-    x, y = piece_pos
-    moves = []
-
-    dirs = [(-2,-1), (-2,1),
-            (-1,-2), (-1,2),
-            (1,-2),  (1,2),
-            (2,-1),  (2,1)]
-
-    for dx, dy in dirs:
-        nx = x + dx
-        ny = y + dy
-
-        target_pos = (nx, ny)
-        if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-            continue
-        target_content = board[nx][ny]
-
-        if isMoveValid(target_pos, target_content, board, color):
-            moves.append((nx, ny))
-
-    return moves
+# Mouvements possibles de la tour
+def rook_moves(piece_pos, board, color):
+    return slider_moves(piece_pos, board, color, ROOK_STEPS)
 
 #=================================================================================================
-# Mouvements possibles du fou, si son mouvement est bloqué par une pièce alliée ou ennemie, il ne peut pas sauter par-dessus
+# Mouvements possibles du fou
 def bishop_moves(piece_pos, board, color):
-    x, y = piece_pos
-    moves = []
-
-    dirs = [(-1,-1), (-1,1),
-            (1,-1),  (1,1)]
-
-    for dx, dy in dirs:
-        step = 1
-        while True:
-            nx = x + dx * step
-            ny = y + dy * step
-
-            # S'il y a une sortie plateau => on arrête la boucle
-            if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-                break
-            
-            target_content = board[nx][ny]
-            
-            # Si la case est vide, on peut continuer
-            if target_content == '':
-                moves.append((nx, ny))
-                step += 1
-                continue
-
-            # Si la case est occupée par une pièce ennemie, on peut capturer et arrêter
-            if len(target_content) > 1 and target_content[1] != color:
-                moves.append((nx, ny))
-                break
-            
-            # Si la case est occupée par une pièce alliée, on arrête
-            break
-        
-    return moves
+    return slider_moves(piece_pos, board, color, BISHOP_STEPS)
 
 #=================================================================================================
-# Mouvements possibles de la reine, si son mouvement est bloqué par une pièce alliée ou ennemie, elle ne peut pas sauter par-dessus
+# Mouvements possibles de la reine
 def queen_moves(piece_pos, board, color):
-    x, y = piece_pos
-    moves = []
-
-    dirs = [(-1,0), (1,0), (0,-1), (0,1),
-            (-1,-1), (-1,1), (1,-1), (1,1)]
-
-    for dx, dy in dirs:
-        step = 1
-
-        while True:
-            nx = x + dx * step
-            ny = y + dy * step
-
-            # Hors plateau -> stop direction
-            if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-                break
-
-            target_content = board[nx][ny]
-
-            # Vide -> move possible, on continue
-            if target_content == '':
-                moves.append((nx, ny))
-                step += 1
-                continue
-
-            # Ennemie -> move possible (capture), stop
-            if len(target_content) > 1 and target_content[1] != color:
-                moves.append((nx, ny))
-                break
-
-            # Alliée -> stop
-            break
+    return slider_moves(piece_pos, board, color, KING_STEPS)
 
+#=================================================================================================
+# Mouvements possibles pour le cavalier (un saut hors du plateau tombe sur la bordure sentinelle)
+def knight_moves(piece_pos, board, color):
+    moves = []
+    for step in KNIGHT_STEPS:
+        target_content = board[piece_pos + step]
+        if target_content == EMPTY or is_enemy(target_content, color):
+            moves.append(piece_pos + step)
     return moves
 
 #=================================================================================================
 # Mouvements possibles du roi
 def king_moves(piece_pos, board, color):
-    x, y = piece_pos
-    moves = []    
-    
-    dirs = [(-1,-1), (-1,0), (-1,1),
-            (0,-1),          (0,1),
-            (1,-1),  (1,0),  (1,1)]
-
-    for dx, dy in dirs:
-        nx = x + dx
-        ny = y + dy
-
-        if nx < 0 or nx >= len(board) or ny < 0 or ny >= len(board[0]):
-            continue
-        target_pos = (nx, ny)
-        target_content = board[nx][ny]
-
-        if isMoveValid(target_pos, target_content, board, color):
-            moves.append((nx, ny))
-
+    moves = []
+    for step in KING_STEPS:
+        target_content = board[piece_pos + step]
+        if target_content == EMPTY or is_enemy(target_content, color):
+            moves.append(piece_pos + step)
     return moves
 
 #=================================================================================================
+# Le joueur a-t-il une autre pièce que ses pions et son roi ? Sinon le coup nul est risqué (zugzwang)
+def has_non_pawn_material(board_obj, color):
+    data = board_obj.data
+    for square in board_obj.state.pieces[color]:
+        if data[square] & TYPE_MASK not in (PAWN, KING):
+            return True
+    return False
+
 def get_game_phase(board):
-    pieces = count_pieces(board)
+    pieces = board.state.piece_count
     if pieces >= EARLY_GAME_PIECE_COUNT_MIN: 
         return "EARLY"
     elif pieces >= MID_GAME_PIECE_COUNT_MIN:
@@ -636,146 +2074,138 @@ def get_game_phase(board):
     else:
         return "LATE"
 
-def count_pieces(board):
-    total_pieces = 0
-    for x in range(len(board.data)):
-        for y in range(len(board.data[0])):
-            if board.data[x][y] != '' and board.data[x][y] != 'X':
-                total_pieces += 1
-    return total_pieces
+#=================================================================================================
+# Tables du contrôle du centre pour une forme de plateau
+# Une pièce ne peut contrôler une case du carré magique que depuis une ligne, une colonne, une diagonale
+# ou un saut de cavalier passant par cette case : seules ces cases peuvent changer son contrôle
+# Les cases sont des indices du plateau compact, relevance est indexé par case
+def get_center_tables(rows, cols):
+    if (rows, cols) in CENTER_TABLES:
+        return CENTER_TABLES[(rows, cols)]
+
+    center_coords = [(x, y) for x, y in MAGIC_SQUARE if 0 <= x < rows and 0 <= y < cols]
+    center_squares = [to_square(x, y, cols) for x, y in center_coords]
+    relevance = [[] for _ in range(mailbox_size(rows, cols))]
+    for index, (cx, cy) in enumerate(center_coords):
+        relevance[to_square(cx, cy, cols)].append(index)
+        for dx, dy in QUEEN_DIRECTIONS:
+            x, y = cx + dx, cy + dy
+            while 0 <= x < rows and 0 <= y < cols:
+                relevance[to_square(x, y, cols)].append(index)
+                x, y = x + dx, y + dy
+        for dx, dy in KNIGHT_OFFSETS:
+            x, y = cx + dx, cy + dy
+            if 0 <= x < rows and 0 <= y < cols:
+                relevance[to_square(x, y, cols)].append(index)
+
+    CENTER_TABLES[(rows, cols)] = (center_squares, relevance)
+    return CENTER_TABLES[(rows, cols)]
+
+#=================================================================================================
+# Nombre de pièces de chaque camp qui contrôlent une case (présentes sur la case ou capables de l'attaquer / défendre)
+# Recherche inversée depuis la case : sur chaque direction seule la première pièce rencontrée peut l'atteindre
+def count_square_control(board, square):
+    counts = [0] * NUM_SIDES
+
+    occupant = board[square]
+    if occupant > 0:
+        counts[SIDE_OF[occupant >> COLOR_SHIFT]] += 1
+
+    for direction, step in enumerate(KING_STEPS):
+        target = square + step
+        content = board[target]
+        while content == EMPTY:
+            target += step
+            content = board[target]
+
+        if content > 0:
+            piece = content & TYPE_MASK
+            color = content >> COLOR_SHIFT
+            diagonal = direction >= 4
+            if (piece == QUEEN) or (piece == BISHOP and diagonal) or (piece == ROOK and not diagonal) or \
+               (piece == KING and target == square + step) or \
+               (piece == PAWN and target == square + step and diagonal and
+                abs(step + pawn_step(color)) == pawn_lateral(pawn_step(color))):
+                counts[SIDE_OF[color]] += 1
+
+    for step in KNIGHT_STEPS:
+        content = board[square + step]
+        if content > 0 and content & TYPE_MASK == KNIGHT:
+            counts[SIDE_OF[content >> COLOR_SHIFT]] += 1
+
+    return counts
 
 #=================================================================================================
 # Fonction d'évaluation du plateau
+# Les sommes (matériel, rangées des pièces, nombre de pièces, contrôle du centre) sont lues dans l'état
+# d'évaluation mis à jour par make_move / unmake_move, au lieu de reparcourir tout le plateau
 def board_evaluation(board_obj, color):
     board = board_obj.data
+    state = board_obj.state
 
-    white_value = 0
-    black_value = 0
-    
     if METRICS_ENABLED:
         _t0_eval = time.perf_counter()
 
-    # Poids des pièces
-    piece_values = {
-        'p': PAWNS_WEIGHT,
-        'r': ROOKS_WEIGHT,
-        'n': KNIGHTS_WEIGHT,
-        'b': BISHOPS_WEIGHT,
-        'q': QUEENS_WEIGHT,
-        'k': KINGS_WEIGHT
-    }
-    
     game_phase = get_game_phase(board_obj)
-    
-    white_king_alive = False
-    black_king_alive = False
-    
-    for x in range(len(board)):
-        for y in range(len(board[0])):
-            # String de la pièce
-            piece_content = board[x][y]
-            if piece_content != '':
-                
-                piece = piece_content[0]
-                piece_color = piece_content[1]
-
-                # On vérifie si les rois sont en vie
-                if piece == 'k':
-                    if game_phase == "EARLY" or game_phase == "MID": 
-                        if piece_color == 'w':
-                            white_value +=  x * ADVANCED_KING_MALUS_MULTIPLICATOR
-                        else:
-                            black_value += x * ADVANCED_KING_MALUS_MULTIPLICATOR
-
-                    if piece_color == 'w':
-                        white_king_alive = True
-                    else:
-                        black_king_alive = True
-                
-                if piece == 'q':
-                    if game_phase == "EARLY": 
-                        if piece_color == 'w':
-                            white_value +=  x * ADVANCED_QUEEN_MALUS_MULTIPLICATOR
-                        else:
-                            black_value += x * ADVANCED_QUEEN_MALUS_MULTIPLICATOR
-
-                # Qualité de base de la pièce
-                base_value = piece_values.get(piece, 0)
-
-                if piece_color == 'w':
-                    white_value += base_value
-                else:
-                    black_value += base_value
-
-                # Early game et Mid game: contrôle du centre
-                if game_phase == "EARLY" or game_phase == "MID":
-                    # Pour chaque case du carré magique, vérifier si cette pièce la contrôle (présente sur les cases ou peut l'attaquer / défendre)
-                    for center_square in MAGIC_SQUARE:
-                        # Pièce présente sur la case ou en capacité de la défendre / attaquer
-                        if (x, y) == center_square or attacks_square((x, y), center_square, board):
-                            if piece_color == "w":
-                                white_value += CONTROL_CENTER_BONUS
-                            else:
-                                black_value += CONTROL_CENTER_BONUS
-
-                if game_phase == "LATE":
-                    if piece == 'p':
-                        # Plus un pion est proche de la promotion, plus il vaut
-                        if piece_color == 'w':
-                            white_value +=  x * ADVANCED_PAWN_MULTIPLICATOR_BONUS
-                        else:
-                            black_value += x * ADVANCED_PAWN_MULTIPLICATOR_BONUS
-    
-    # Roi adverse pas présent -> victoire (valeur max)
-    if color == 'w' and not black_king_alive:
-        if METRICS_ENABLED:
-            METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
-        return 999999
-    elif color == 'b' and not white_king_alive:
+
+    own_side = SIDE_OF[color]
+    king_count = state.king_count
+
+    # Plus aucun roi adverse -> victoire (valeur max)
+    if sum(king_count) == king_count[own_side]:
         if METRICS_ENABLED:
             METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
         return 999999
-    
+
     # Roi pas présent -> défaite (valeur min)
-    if color == 'w' and not white_king_alive:
-        if METRICS_ENABLED:
-            METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
-        return -999999
-    elif color == 'b' and not black_king_alive:
+    if king_count[own_side] == 0:
         if METRICS_ENABLED:
             METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
         return -999999
 
-    # Bonus si le roi n'est pas en échec
-    if not is_king_in_check(board, color):
-        if color == 'w':
-            white_value += ALLIED_KING_NOT_IN_CHECK_BONUS
-        else:
-            black_value += ALLIED_KING_NOT_IN_CHECK_BONUS
+    # Qualité de base des pièces, une valeur par camp (blancs / noirs à deux joueurs, une par équipe en multijoueur)
+    values = list(state.material)
+
+    if game_phase == "EARLY" or game_phase == "MID":
+        # Un roi avancé est exposé, contrôle du centre
+        control = state.center_control(board)
+        for side in range(NUM_SIDES):
+            values[side] += state.king_rows[side] * ADVANCED_KING_MALUS_MULTIPLICATOR
+            values[side] += control[side] * CONTROL_CENTER_BONUS
+
+    if game_phase == "EARLY":
+        # Une reine sortie trop tôt est exposée
+        for side in range(NUM_SIDES):
+            values[side] += state.queen_rows[side] * ADVANCED_QUEEN_MALUS_MULTIPLICATOR
+
+    if game_phase == "LATE":
+        # Plus un pion est proche de la promotion, plus il vaut
+        for side in range(NUM_SIDES):
+            values[side] += state.pawn_rows[side] * ADVANCED_PAWN_MULTIPLICATOR_BONUS
+
+    # Bonus si le roi n'est pas en échec (recherche inversée depuis la case connue du roi)
+    if not is_king_in_check(board, color, state.kings.get(color)):
+        values[own_side] += ALLIED_KING_NOT_IN_CHECK_BONUS
     
-    # Bonus si le roi adverse est en échec
-    enemy_color = 'b' if color == 'w' else 'w'
-    if is_king_in_check(board, enemy_color):
-        if color == 'w':
-            white_value += ENEMY_KING_IN_CHECK_BONUS 
+    # Bonus pour chaque roi adverse en échec (les couleurs déjà éliminées n'ont plus de roi)
+    for enemy_color, king_pos in state.kings.items():
+        if TEAM_OF[enemy_color] != TEAM_OF[color] and is_king_in_check(board, enemy_color, king_pos):
+            values[own_side] += ENEMY_KING_IN_CHECK_BONUS 
             if game_phase == "LATE":
-                white_value += LATE_GAME_ENEMY_KING_IN_CHECK_BONUS
-        else:
-            black_value += ENEMY_KING_IN_CHECK_BONUS 
-            if game_phase == "LATE":
-                black_value += LATE_GAME_ENEMY_KING_IN_CHECK_BONUS
+                values[own_side] += LATE_GAME_ENEMY_KING_IN_CHECK_BONUS
 
-    if color == 'w':
-        if METRICS_ENABLED:
-            METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
-        return white_value - black_value
-    
     if METRICS_ENABLED:
         METRICS["t_eval"] += (time.perf_counter() - _t0_eval)
-        
-    return black_value - white_value
+
+    # Notre camp contre la somme des autres
+    if NUM_SIDES == 2:
+        return values[own_side] - values[1 - own_side]
+    return values[own_side] - sum(value for side, value in enumerate(values) if side != own_side)
 
 
 #=================================================================================================
 
-register_chess_bot("Martin", chess_bot)
\ No newline at end of file
+register_chess_bot("Martin", chess_bot)
+register_ponder(chess_bot, ponder)
+register_setup(chess_bot, setup_search)
+register_teardown(chess_bot, close_search)
@@ -0,0 +1,235 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Bitboards du plateau compact de Martin, pour des plateaux de taille quelconque (4x4, 7x5, 8x8, .fen plus grands...).
+# Un bitboard est un entier Python (sans limite de taille) indexé par les cases du mailbox (Martin_Board) :
+# le bit i est la case i du tableau, bordure sentinelle comprise. Les tables d'attaque précalculées par case
+# (cavalier, roi, pion, rayons des pièces qui glissent) ne contiennent que des cases jouables : la bordure et les murs
+# 'XX' jouent le rôle des masques de bords, sans décalage qui déborde sur la rangée voisine.
+#
+# Les coups légaux d'une couleur sont calculés pour tout le camp en une fois, sans jouer les coups :
+# - cases attaquées par les autres équipes (plateau sans notre roi : il ne peut pas reculer le long d'un rayon qui l'attaque)
+# - pièces qui font échec : avec un échec, seuls les coups qui prennent l'attaquant ou s'interposent restent,
+#   avec deux, seuls ceux du roi
+# - pièces clouées : elles ne quittent pas la ligne entre notre roi et la pièce qui les cloue
+# Le premier bloqueur d'un rayon est le bit de poids faible (décalage positif) ou de poids fort (décalage négatif)
+# des cases occupées du rayon : une opération sur des entiers au lieu d'une boucle case par case.
+# Mêmes coups que generate_moves / is_move_legal (Martin.py), vérifié par le perft (Martin_Perft.py).
+
+from dataclasses import dataclass
+from Bots.Martin_Board import EMPTY, OFFBOARD, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, TYPE_MASK, COLOR_SHIFT
+
+@dataclass
+class BitboardTables:
+    """
+        Tables précalculées pour une forme de plateau et ses murs
+        full: Toutes les cases jouables
+        bits[case]: Bit de la case
+        knight[case], king[case]: Cases atteintes par un saut de cavalier, un pas de roi
+        rays[direction][case]: Cases du rayon partant de la case (sans elle), jusqu'à la bordure ou un mur,
+        dans l'ordre de king_steps (4 directions droites puis 4 diagonales)
+        positive[direction]: Le décalage de la direction est positif (premier bloqueur = bit de poids faible)
+        pawn_attacks[pas][case]: Cases attaquées par un pion qui avance de pas, calculé à la première demande
+    """
+    steps: list
+    full: int
+    bits: list
+    knight: list
+    king: list
+    rays: list
+    positive: list
+    pawn_attacks: dict
+
+TABLES = {} # Tables déjà calculées, une seule fois par forme de plateau et disposition des murs
+
+def get_tables(cells, king_steps, knight_steps) -> BitboardTables:
+    layout = bytes(1 if content == OFFBOARD else 0 for content in cells)
+    key = (layout, tuple(king_steps))
+    if key in TABLES:
+        return TABLES[key]
+
+    size = len(cells)
+    playable = [square for square in range(size) if cells[square] != OFFBOARD]
+    bits = [1 << square for square in range(size)]
+    full = 0
+    for square in playable:
+        full |= bits[square]
+
+    def jumps(steps):
+        table = [0] * size
+        for square in playable:
+            for step in steps:
+                if 0 <= square + step < size and cells[square + step] != OFFBOARD:
+                    table[square] |= bits[square + step]
+        return table
+
+    rays = []
+    for step in king_steps:
+        table = [0] * size
+        for square in playable:
+            target = square + step
+            while cells[target] != OFFBOARD:
+                table[square] |= bits[target]
+                target += step
+        rays.append(table)
+
+    tables = BitboardTables(list(king_steps), full, bits, jumps(knight_steps), jumps(king_steps), rays,
+                            [step > 0 for step in king_steps], {})
+    TABLES[key] = tables
+    return tables
+
+# Décalage latéral des captures d'un pion (comme pawn_lateral dans Martin.py)
+def pawn_attack_table(tables, step):
+    table = tables.pawn_attacks.get(step)
+    if table is None:
+        width = tables.steps[1]
+        lateral = width if step == 1 or step == -1 else 1
+        bits = tables.bits
+        table = [0] * len(bits)
+        for square in range(len(bits)):
+            if tables.full & bits[square]:
+                for target in (square + step - lateral, square + step + lateral):
+                    if tables.full & bits[target]:
+                        table[square] |= bits[target]
+        tables.pawn_attacks[step] = table
+    return table
+
+# Indice du premier bloqueur d'un rayon (blockers non nul)
+def first_blocker(blockers, positive):
+    if positive:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+# Cases attaquées par une pièce qui glisse dans les directions données, premier bloqueur compris
+def slider_attacks(tables, square, occupied, directions):
+    attacks = 0
+    rays = tables.rays
+    for direction in directions:
+        ray = rays[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[direction][first_blocker(blockers, tables.positive[direction])]
+        attacks |= ray
+    return attacks
+
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+QUEEN_DIRECTIONS = (0, 1, 2, 3, 4, 5, 6, 7)
+SLIDER_DIRECTIONS = {BISHOP: BISHOP_DIRECTIONS, ROOK: ROOK_DIRECTIONS, QUEEN: QUEEN_DIRECTIONS}
+
+# Cases attaquées par la pièce content posée sur square (pawn_steps[couleur] : sens de marche des pions)
+def piece_attacks(tables, cells, square, content, occupied, pawn_steps):
+    piece = content & TYPE_MASK
+    if piece == PAWN:
+        return pawn_attack_table(tables, pawn_steps[content >> COLOR_SHIFT])[square]
+    if piece == KNIGHT:
+        return tables.knight[square]
+    if piece == KING:
+        return tables.king[square]
+    return slider_attacks(tables, square, occupied, SLIDER_DIRECTIONS[piece])
+
+#=================================================================================================
+# Coups légaux de color : liste de (case de départ, bitboard des cases d'arrivée)
+# pieces[couleur] : cases des pièces de chaque couleur (EvalState.pieces), king_pos : case de notre roi (None s'il a été pris)
+# team_of[couleur] : équipe de chaque couleur, pawn_steps[couleur] : sens de marche de ses pions
+def legal_targets(tables, cells, pieces, color, king_pos, team_of, pawn_steps) -> list:
+    # Sans roi, aucun coup n'est légal (comme is_move_legal)
+    if king_pos is None:
+        return []
+
+    bits = tables.bits
+    team = team_of[color]
+    occupied = 0
+    friends = 0
+    for piece_color, squares in enumerate(pieces):
+        side = 0
+        for square in squares:
+            side |= bits[square]
+        occupied |= side
+        if team_of[piece_color] == team:
+            friends |= side
+    enemies = occupied & ~friends
+    king = bits[king_pos]
+
+    # Cases attaquées par les autres équipes et pièces qui font échec
+    without_king = occupied ^ king
+    danger = 0
+    checkers = 0
+    evasions = tables.full
+    for piece_color, squares in enumerate(pieces):
+        if team_of[piece_color] == team:
+            continue
+        for square in squares:
+            content = cells[square]
+            attacks = piece_attacks(tables, cells, square, content, without_king, pawn_steps)
+            danger |= attacks
+            if attacks & king:
+                checkers += 1
+                evasions = bits[square]
+                if content & TYPE_MASK in SLIDER_DIRECTIONS:
+                    # Cases entre notre roi et la pièce qui glisse : on peut s'y interposer
+                    for direction, ray in enumerate(tables.rays):
+                        if ray[king_pos] & evasions:
+                            evasions = ray[king_pos] & ~ray[square]
+                            break
+
+    targets = tables.full & ~friends
+    moves = [(king_pos, tables.king[king_pos] & targets & ~danger)]
+    if checkers > 1:
+        return moves
+
+    # Pièces clouées : notre pièce est le premier bloqueur d'un rayon du roi, une pièce adverse qui glisse dans
+    # cette direction le second. Elle ne peut aller qu'entre le roi et cette pièce, prise comprise
+    pins = {}
+    for direction, rays in enumerate(tables.rays):
+        ray = rays[king_pos]
+        blockers = ray & occupied
+        if not blockers:
+            continue
+        positive = tables.positive[direction]
+        pinned = first_blocker(blockers, positive)
+        if cells[pinned] >> COLOR_SHIFT != color:
+            continue
+        blockers ^= bits[pinned]
+        if not blockers:
+            continue
+        pinner = first_blocker(blockers, positive)
+        content = cells[pinner]
+        if enemies & bits[pinner] and direction in SLIDER_DIRECTIONS.get(content & TYPE_MASK, ()):
+            pins[pinned] = pins.get(pinned, tables.full) & ray & ~rays[pinner]
+
+    targets &= evasions
+    step = pawn_steps[color]
+    attacks = pawn_attack_table(tables, step)
+    for square in pieces[color]:
+        if square == king_pos:
+            continue
+        content = cells[square]
+        piece = content & TYPE_MASK
+        if piece == PAWN:
+            piece_targets = attacks[square] & enemies
+            if cells[square + step] == EMPTY:
+                piece_targets |= bits[square + step]
+        elif piece == KNIGHT:
+            piece_targets = tables.knight[square]
+        else:
+            piece_targets = slider_attacks(tables, square, occupied, SLIDER_DIRECTIONS[piece])
+        piece_targets &= targets
+        if square in pins:
+            piece_targets &= pins[square]
+        moves.append((square, piece_targets))
+    return moves
+
+# Nombre de coups légaux de color, sans les énumérer (perft)
+def count_legal_moves(tables, cells, pieces, color, king_pos, team_of, pawn_steps) -> int:
+    return sum(targets.bit_count()
+               for _, targets in legal_targets(tables, cells, pieces, color, king_pos, team_of, pawn_steps))
+
+# Indices des bits à 1, du plus faible au plus fort
+def iter_bits(bitboard):
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
@@ -0,0 +1,105 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Représentation compacte du plateau pour la recherche du bot Martin.
+# Le plateau de chaînes ('pw', 'kb', 'XX', '') reçu de ParallelTurn est converti une seule fois par coup
+# en un tableau plat d'entiers signés (array('b')) entouré de cases sentinelles (mailbox "10x12" généralisé) :
+# - 2 rangées de bordure en haut et en bas, pour que les sauts de cavalier restent dans le tableau
+# - 1 colonne de bordure à gauche et à droite : un débordement de 2 colonnes tombe sur la bordure de la rangée voisine
+# Une pièce est un petit entier (couleur << 3 | type), les murs 'XX' et la bordure valent OFFBOARD.
+# Les générateurs de coups comparent donc des entiers et avancent par décalage d'indice, sans test de limites.
+
+from array import array
+
+# Contenu d'une case
+EMPTY = 0
+OFFBOARD = -1 # Bordure du mailbox et murs 'XX' : ni vide, ni capturable
+
+# Types de pièce (3 bits de poids faible)
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+TYPE_MASK = 7
+
+# Couleurs (bits suivants), dans l'ordre des lettres de COLOR_LETTERS
+COLOR_SHIFT = 3
+WHITE = 0
+BLACK = 1
+
+PIECE_LETTERS = ".pnbrqk" # PIECE_LETTERS[type] : lettre de la pièce dans le plateau de chaînes
+COLOR_LETTERS = "wbry"    # COLOR_LETTERS[couleur] : lettre de la couleur dans le plateau de chaînes
+
+# Taille de la bordure sentinelle
+PADDING_ROWS = 2
+PADDING_COLS = 1
+
+def make_piece(piece_type, color):
+    return (color << COLOR_SHIFT) | piece_type
+
+def color_index(letter):
+    return COLOR_LETTERS.index(letter)
+
+def mailbox_width(cols):
+    return cols + 2 * PADDING_COLS
+
+def mailbox_size(rows, cols):
+    return (rows + 2 * PADDING_ROWS) * mailbox_width(cols)
+
+#=================================================================================================
+# Conversion entre coordonnées (x, y) du plateau et indice de case dans le mailbox
+def to_square(x, y, cols):
+    return (x + PADDING_ROWS) * mailbox_width(cols) + y + PADDING_COLS
+
+def to_coords(square, cols):
+    row, col = divmod(square, mailbox_width(cols))
+    return row - PADDING_ROWS, col - PADDING_COLS
+
+# Indices des cases du plateau (sans la bordure), dans l'ordre des rangées puis des colonnes
+def board_squares(rows, cols):
+    return [to_square(x, y, cols) for x in range(rows) for y in range(cols)]
+
+#=================================================================================================
+# Décalages d'indice des déplacements pour une largeur de plateau
+# king_steps suit l'ordre de QUEEN_DIRECTIONS dans Martin.py : 4 directions droites puis 4 diagonales
+def king_steps(cols):
+    width = mailbox_width(cols)
+    return [-width, width, -1, 1, -width - 1, -width + 1, width - 1, width + 1]
+
+def knight_steps(cols):
+    width = mailbox_width(cols)
+    return [-2 * width - 1, -2 * width + 1, -width - 2, -width + 2, width - 2, width + 2, 2 * width - 1, 2 * width + 1]
+
+#=================================================================================================
+# Conversion d'une case du plateau de chaînes en code entier, et inversement
+def encode_piece(content):
+    if content == '':
+        return EMPTY
+    if len(content) == 2 and content[0] in PIECE_LETTERS[1:] and content[1] in COLOR_LETTERS:
+        return make_piece(PIECE_LETTERS.index(content[0]), color_index(content[1]))
+    return OFFBOARD
+
+def decode_piece(code):
+    if code == EMPTY:
+        return ''
+    if code == OFFBOARD:
+        return 'XX'
+    return PIECE_LETTERS[code & TYPE_MASK] + COLOR_LETTERS[code >> COLOR_SHIFT]
+
+#=================================================================================================
+# Conversion du plateau complet (matrice numpy de ParallelTurn ou liste de listes)
+def encode_board(board):
+    rows, cols = len(board), len(board[0])
+    cells = array('b', [OFFBOARD]) * mailbox_size(rows, cols)
+    for x in range(rows):
+        row = board[x]
+        for y in range(cols):
+            cells[to_square(x, y, cols)] = encode_piece(row[y])
+    return cells
+
+def decode_board(cells, rows, cols):
+    return [[decode_piece(cells[to_square(x, y, cols)]) for y in range(cols)] for x in range(rows)]
@@ -0,0 +1,254 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Livre d'ouvertures du bot Martin.
+# Les premiers coups d'une carte sont toujours les mêmes positions : ils sont cherchés une fois hors ligne,
+# par des parties de Martin contre lui-même avec un budget de temps bien plus long que celui d'un tour (build_book),
+# et le coup trouvé pour chaque position est enregistré dans un fichier par carte (BOOK_DIRECTORY/<carte>.book).
+# Pendant la partie, chess_bot consulte ces fichiers avant de chercher (probe_book) : un coup du livre est joué
+# immédiatement et le budget du tour est gardé pour le milieu de partie.
+#
+# Format du fichier (petit-boutiste) :
+# - en-tête HEADER : signature BOOK_MAGIC, version BOOK_VERSION, rangées, colonnes, nombre d'entrées
+# - entrées ENTRY triées par clé : clé de la position, coup (x, y) -> (x, y), poids (nombre de parties
+#   passées par la position pendant la construction) et score de la recherche (centièmes de pion)
+# Le fichier est ouvert avec mmap et une position est cherchée par recherche dichotomique sur les clés :
+# seules les pages lues sont chargées, sans décoder tout le livre.
+#
+# La clé d'une position est un hachage de Zobrist du plateau de chaînes, vu dans l'orientation du joueur au trait,
+# et de sa couleur. Elle ne dépend pas des clés de la recherche (Martin.py), qui peuvent changer sans invalider les livres.
+#
+# Construction d'un livre, depuis le dossier ISChess :
+#     python -m Bots.Martin_Book Data/maps/default.brd --games 16 --plies 10 --budget 5
+
+import os
+import mmap
+import random
+import struct
+import argparse
+
+import numpy as np
+
+from Bots.Martin_Board import COLOR_LETTERS, COLOR_SHIFT, encode_piece, color_index
+from BoardReader import read_board
+
+BOOK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books")
+BOOK_EXTENSION = ".book"
+BOOK_MAGIC = b"MBK1"
+BOOK_VERSION = 1
+BOOK_SEED = 0x424F4F4B # Graine fixe des clés de position : un livre reste valable d'une exécution à l'autre
+HEADER = struct.Struct("<4sHHHHI") # Signature, version, rangées, colonnes, réservé, nombre d'entrées
+ENTRY = struct.Struct("<QBBBBHh") # Clé, x / y de départ, x / y d'arrivée, poids, score
+SCORE_SCALE = 100 # Le score est enregistré en centièmes de pion
+
+# Construction par parties contre soi-même
+BUILD_GAMES = 16 # Nombre de parties jouées
+BUILD_PLIES = 10 # Nombre de demi-coups enregistrés par partie
+BUILD_TIME_BUDGET = 5.0 # Budget de temps de chaque recherche (secondes)
+BUILD_EXPLORATION = 0.25 # Probabilité de jouer un coup légal au hasard plutôt que le coup cherché, pour varier les parties
+
+BOOKS = {} # (rangées, colonnes) -> livres de cette forme de plateau, ouverts au premier coup joué
+POSITION_KEYS = [] # POSITION_KEYS[indice de case][code de pièce] : clé de 64 bits, étendue selon la taille du plateau
+COLOR_KEYS = [random.Random(BOOK_SEED + 1 + color).getrandbits(64) for color in range(len(COLOR_LETTERS))]
+
+class OpeningBook:
+    """
+        Livre d'ouvertures ouvert en lecture avec mmap
+        rows, cols: Forme du plateau des positions du livre
+        count: Nombre d'entrées, triées par clé (plusieurs coups possibles pour une même clé)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Un fichier vide ne peut pas être projeté en mémoire
+            self.file.close()
+            raise ValueError(f"Empty opening book '{path}'")
+
+        magic, version, self.rows, self.cols, _, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION or HEADER.size + self.count * ENTRY.size > len(self.data):
+            self.close()
+            raise ValueError(f"Invalid opening book '{path}'")
+
+    def entry(self, index: int) -> tuple:
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+
+    def probe(self, key: int) -> list:
+        """
+            Coups enregistrés pour une clé, [((x, y), (x, y)), poids, score] (liste vide si la position est absente)
+            Recherche dichotomique de la première entrée dont la clé n'est pas inférieure à key
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        moves = []
+        while low < self.count:
+            entry_key, from_x, from_y, to_x, to_y, weight, score = self.entry(low)
+            if entry_key != key:
+                break
+            moves.append((((from_x, from_y), (to_x, to_y)), weight, score / SCORE_SCALE))
+            low += 1
+        return moves
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+#=================================================================================================
+# Clé d'une position : XOR des clés (case, pièce) du plateau de chaînes et de la clé de la couleur au trait
+def position_key(board, color_letter: str) -> int:
+    rows, cols = len(board), len(board[0])
+    while len(POSITION_KEYS) < rows * cols:
+        rng = random.Random(BOOK_SEED ^ len(POSITION_KEYS))
+        POSITION_KEYS.append([rng.getrandbits(64) for _ in range(len(COLOR_LETTERS) << COLOR_SHIFT)])
+
+    key = COLOR_KEYS[color_index(color_letter)]
+    for x in range(rows):
+        row = board[x]
+        for y in range(cols):
+            code = encode_piece(row[y])
+            if code > 0:
+                key ^= POSITION_KEYS[x * cols + y][code]
+    return key
+
+#=================================================================================================
+# Livres de BOOK_DIRECTORY pour une forme de plateau, ouverts une seule fois (les fichiers invalides sont ignorés)
+def get_books(rows: int, cols: int) -> list:
+    if not BOOKS and os.path.isdir(BOOK_DIRECTORY):
+        for name in sorted(os.listdir(BOOK_DIRECTORY)):
+            if not name.endswith(BOOK_EXTENSION):
+                continue
+            try:
+                book = OpeningBook(os.path.join(BOOK_DIRECTORY, name))
+            except (OSError, ValueError, struct.error):
+                continue
+            BOOKS.setdefault((book.rows, book.cols), []).append(book)
+        # Marque le dossier comme lu, même sans livre
+        BOOKS.setdefault(None, [])
+    return BOOKS.get((rows, cols), [])
+
+# Ferme les livres ouverts, le prochain appel de get_books relira BOOK_DIRECTORY
+def close_books():
+    for books in BOOKS.values():
+        for book in books:
+            book.close()
+    BOOKS.clear()
+
+# Coup du livre pour le plateau (dans l'orientation du joueur) et la couleur au trait : (coup, score) ou None
+# Parmi les coups enregistrés pour la position, celui qui a le plus grand poids
+def probe_book(board, color_letter: str):
+    books = get_books(len(board), len(board[0]))
+    if not books:
+        return None
+
+    key = position_key(board, color_letter)
+    best = None
+    for book in books:
+        for move, weight, score in book.probe(key):
+            if best is None or weight > best[1]:
+                best = (move, weight, score)
+    return None if best is None else (best[0], best[2])
+
+#=================================================================================================
+# Écriture d'un livre : entries est une liste de (clé, ((x, y), (x, y)), poids, score), triée ici par clé
+def write_book(path: str, rows: int, cols: int, entries: list):
+    entries = sorted(entries, key=lambda entry: entry[0])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, rows, cols, 0, len(entries)))
+        for key, ((from_x, from_y), (to_x, to_y)), weight, score in entries:
+            score = max(-32768, min(32767, round(score * SCORE_SCALE)))
+            f.write(ENTRY.pack(key, from_x, from_y, to_x, to_y, min(weight, 0xFFFF), score))
+
+#=================================================================================================
+def build_book(map_path: str, book_path: str = None, games: int = BUILD_GAMES, plies: int = BUILD_PLIES,
+               time_budget: float = BUILD_TIME_BUDGET, exploration: float = BUILD_EXPLORATION, seed: int = 0) -> int:
+    """
+        Construit le livre d'une carte par des parties de Martin contre lui-même et l'écrit dans book_path
+        (BOOK_DIRECTORY/<carte>.book par défaut). Retourne le nombre de positions du livre.
+        Chaque position rencontrée pendant les plies premiers demi-coups est cherchée une seule fois avec time_budget ;
+        le coup joué est le coup trouvé, ou un coup légal au hasard avec la probabilité exploration,
+        pour que les parties suivantes enregistrent aussi les réponses aux autres ouvertures.
+        Le poids d'une position est le nombre de parties qui y sont passées.
+    """
+    # Importé ici : Martin importe ce module pour consulter les livres
+    import Bots.Martin as martin
+
+    board_file = read_board(map_path)
+    if board_file is None:
+        raise ValueError(f"Invalid map '{map_path}'")
+    order, initial_board = board_file
+    if book_path is None:
+        book_path = os.path.join(BOOK_DIRECTORY, os.path.splitext(os.path.basename(map_path))[0] + BOOK_EXTENSION)
+
+    players = [order[i:i + 3] for i in range(0, len(order) - 2, 3)]
+    rng = random.Random(seed)
+    searched = {} # clé -> (coup, score)
+    visits = {} # clé -> nombre de parties passées par la position
+
+    for game in range(games):
+        board = initial_board.copy()
+        for ply in range(plies):
+            index = ply % len(players)
+            player_order = "".join(players[index:] + players[:index])
+            sequence = player_order[:3]
+            rotation = int(sequence[2])
+            view = np.rot90(board, rotation).copy()
+
+            key = position_key(view, sequence[1])
+            if key not in searched:
+                results = []
+                move = martin.chess_bot(sequence, view.copy(), time_budget, player_order=player_order,
+                                        on_search_result=results.append, opening_book=False)
+                searched[key] = (move, results[0].score if results else 0)
+            move = searched[key][0]
+            if move == ((0, 0), (0, 0)):
+                break
+            visits[key] = visits.get(key, 0) + 1
+
+            if rng.random() < exploration:
+                move = rng.choice(martin.legal_moves(sequence, view, player_order=player_order))
+
+            # Coup joué dans l'orientation du joueur, avec la promotion appliquée par GameManager
+            (from_x, from_y), (to_x, to_y) = move
+            piece = view[from_x, from_y]
+            view[to_x, to_y] = "q" + piece[1] if piece[0] == "p" and to_x == view.shape[0] - 1 else piece
+            view[from_x, from_y] = ""
+            board = np.rot90(view, -rotation)
+
+            # Fin de partie, comme GameManager : plus aucun roi d'une autre couleur que celle du joueur
+            if not any(piece and piece[0] == "k" and piece[1] != sequence[1] for piece in board.flat):
+                break
+
+    entries = [(key, move, visits[key], score) for key, (move, score) in searched.items() if key in visits]
+    write_book(book_path, initial_board.shape[0], initial_board.shape[1], entries)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build Martin's opening book of a map by offline self-play")
+    parser.add_argument("maps", nargs="+", help=".brd or .fen map files")
+    parser.add_argument("--output", help="Book file (only with a single map), BOOK_DIRECTORY/<map>.book by default")
+    parser.add_argument("--games", type=int, default=BUILD_GAMES)
+    parser.add_argument("--plies", type=int, default=BUILD_PLIES)
+    parser.add_argument("--budget", type=float, default=BUILD_TIME_BUDGET)
+    parser.add_argument("--exploration", type=float, default=BUILD_EXPLORATION)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for map_path in args.maps:
+        count = build_book(map_path, args.output if len(args.maps) == 1 else None, args.games, args.plies,
+                           args.budget, args.exploration, args.seed)
+        print(f"{map_path}: {count} positions")
@@ -0,0 +1,375 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Perft : nombre de positions atteintes après depth demi-coups, pour valider et mesurer la génération de coups.
+# Trois générateurs sont comparés sur les cartes de Data/maps et sur les positions FEN de PERFT_FENS :
+# - "martin" : générateur du plateau compact de la recherche (Martin.py), coups légaux, multijoueur compris
+# - "bitboard" : coups légaux de tout le camp calculés sur des bitboards (Martin_Bitboard.py), joués sur le même
+#   plateau compact ; la dernière profondeur est un simple compte de bits, sans lister les coups
+# - "rules" : ChessRules.move_is_valid de GameManager, essayé pour chaque pièce et chaque case, sans les coups
+#   qui laissent le roi prenable par une autre équipe. C'est la référence indépendante : mêmes nombres que "martin"
+# Les coups sont joués comme GameManager les applique : dans l'orientation du joueur au trait, un pion qui atteint
+# la dernière rangée devient une reine, puis le tour passe au joueur suivant de l'ordre des joueurs.
+# La dernière profondeur est comptée sans jouer ses coups (bulk counting), son temps donne les nœuds par seconde.
+#
+# Les résultats (nombres de positions par profondeur et nœuds par seconde) sont comparés à PERFT_BASELINE :
+# un nombre de positions différent fait échouer le benchmark, de même qu'un débit inférieur de plus de NPS_TOLERANCE
+# à la référence pour un générateur (moyenne géométrique des rapports de débit de toutes ses positions,
+# une mesure isolée est trop bruitée pour conclure).
+# La vitesse de la machine varie d'une exécution à l'autre (fréquence, charge) : chaque mesure est accompagnée
+# de la vitesse d'une boucle Python fixe (calibrate), et le débit de référence est ramené à la vitesse du moment.
+# Depuis le dossier ISChess :
+#     python -m Bots.Martin_Perft                       # benchmark, comparé à la référence
+#     python -m Bots.Martin_Perft --update              # nouvelle référence (sur la machine de mesure)
+#     python -m Bots.Martin_Perft --divide --positions default.brd --generators martin --depth 3
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import contextlib
+from array import array
+
+import numpy as np
+
+import Bots.Martin as martin
+import Bots.Martin_Bitboard as bitboard
+from Bots.Martin_Board import color_index
+from BoardReader import BOARD_DIRECTORY, read_board, read_fen
+from ChessRules import move_is_valid
+from GameRules import BoardPiece, apply_move
+
+PERFT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_baseline.json")
+BASELINE_VERSION = 1
+NPS_TOLERANCE = 0.3 # Baisse de débit tolérée par rapport à la référence (bruit de mesure d'une machine à l'autre)
+REPEAT = 3 # La dernière profondeur est mesurée au moins REPEAT fois, le meilleur temps est gardé
+MIN_BENCH_TIME = 0.5 # ... et jusqu'à ce que les mesures durent au moins MIN_BENCH_TIME secondes au total
+CALIBRATION_RUNS = 5 # Mesures de la boucle de calibrage, la plus rapide est gardée
+CALIBRATION_CELLS = array('b', range(-64, 64)) * 256 # Plateau factice parcouru par la boucle de calibrage
+
+# Positions FEN en plus des cartes (sans roque, prise en passant ni double pas : seules les pièces comptent ici)
+PERFT_FENS = {
+    "kiwipete": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rook_endgame": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "promotions": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "black_to_move": "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 2 3",
+}
+
+# Profondeur par défaut de chaque générateur (ChessRules essaie toutes les cases pour chaque pièce)
+DEFAULT_DEPTHS = {
+    "martin": 3,
+    "bitboard": 3,
+    "rules": 2,
+}
+
+#=================================================================================================
+# Positions du benchmark : (nom, ordre des joueurs à partir du joueur au trait, plateau numpy de chaînes)
+def load_positions(maps_directory: str = BOARD_DIRECTORY, fens: dict = None) -> list:
+    positions = []
+    for name in sorted(os.listdir(maps_directory)):
+        if name.endswith(".brd") or name.endswith(".fen"):
+            positions.append((name, *read_board(os.path.join(maps_directory, name))))
+    for name, fen in (PERFT_FENS if fens is None else fens).items():
+        positions.append((name, *read_fen(fen)))
+    return positions
+
+# Joueurs de l'ordre : liste de (équipe, lettre de couleur, rotation)
+def split_players(order: str) -> list:
+    return [(int(order[i]), order[i + 1], int(order[i + 2])) for i in range(0, len(order) - 2, 3)]
+
+# Coup joué comme GameManager, avec GameRules.apply_move : dans l'orientation du joueur au trait, avec la promotion en reine.
+# Retourne (ordre des joueurs à partir du joueur suivant, plateau dans l'orientation de la carte)
+def play(order: str, board, move):
+    rotation = int(order[2])
+    view = np.rot90(board, rotation).copy()
+    apply_move(view, move, lambda pawn: "q" + pawn[1])
+    return order[3:] + order[:3], np.rot90(view, -rotation)
+
+#=================================================================================================
+# Générateur de Martin : plateau compact dans l'orientation du joueur au trait, ordre réel des tours en multijoueur
+def martin_root(order: str, board):
+    color = color_index(order[1])
+    view = np.rot90(board, int(order[2]))
+    martin.PERSPECTIVE_COLOR = color
+    martin.init_players(order, view.shape[0], view.shape[1])
+    martin.reset_metrics()
+    martin.reset_move_ordering()
+    return martin.create_board(view), color
+
+def martin_nodes(board, color: int, depth: int) -> int:
+    moves = list(martin.generate_moves(board, color))
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    next_color = martin.NEXT_COLOR[color]
+    for move in moves:
+        undo = martin.make_move(board, move)
+        nodes += martin_nodes(board, next_color, depth - 1)
+        martin.unmake_move(board, undo)
+    return nodes
+
+def martin_moves(order: str, board) -> list:
+    root, color = martin_root(order, board)
+    return [(martin.to_coords(origin, martin.COLS), martin.to_coords(target, martin.COLS))
+            for origin, target in martin.generate_moves(root, color)]
+
+def martin_count(order: str, board, depth: int) -> int:
+    root, color = martin_root(order, board)
+    # Les compteurs de METRICS ne font pas partie de la génération mesurée
+    metrics_enabled = martin.METRICS_ENABLED
+    martin.METRICS_ENABLED = False
+    try:
+        return martin_nodes(root, color, depth)
+    finally:
+        martin.METRICS_ENABLED = metrics_enabled
+
+#=================================================================================================
+# Générateur de bitboards : même plateau compact et mêmes make_move / unmake_move que Martin
+def bitboard_root(order: str, board):
+    root, color = martin_root(order, board)
+    tables = bitboard.get_tables(root.data, martin.KING_STEPS, martin.KNIGHT_STEPS)
+    pawn_steps = [martin.pawn_step(piece_color) for piece_color in range(len(martin.COLOR_LETTERS))]
+    return root, color, tables, pawn_steps
+
+def bitboard_legal(board, color: int, tables, pawn_steps) -> list:
+    state = board.state
+    return bitboard.legal_targets(tables, board.data, state.pieces, color, state.kings.get(color), martin.TEAM_OF,
+                                  pawn_steps)
+
+def bitboard_nodes(board, color: int, depth: int, tables, pawn_steps) -> int:
+    moves = bitboard_legal(board, color, tables, pawn_steps)
+    if depth == 1:
+        return sum(targets.bit_count() for _, targets in moves)
+    nodes = 0
+    next_color = martin.NEXT_COLOR[color]
+    for origin, targets in moves:
+        for target in bitboard.iter_bits(targets):
+            undo = martin.make_move(board, (origin, target))
+            nodes += bitboard_nodes(board, next_color, depth - 1, tables, pawn_steps)
+            martin.unmake_move(board, undo)
+    return nodes
+
+def bitboard_moves(order: str, board) -> list:
+    root, color, tables, pawn_steps = bitboard_root(order, board)
+    return [(martin.to_coords(origin, martin.COLS), martin.to_coords(target, martin.COLS))
+            for origin, targets in bitboard_legal(root, color, tables, pawn_steps)
+            for target in bitboard.iter_bits(targets)]
+
+def bitboard_count(order: str, board, depth: int) -> int:
+    root, color, tables, pawn_steps = bitboard_root(order, board)
+    metrics_enabled = martin.METRICS_ENABLED
+    martin.METRICS_ENABLED = False
+    try:
+        return bitboard_nodes(root, color, depth, tables, pawn_steps)
+    finally:
+        martin.METRICS_ENABLED = metrics_enabled
+
+#=================================================================================================
+# ChessRules : chaque pièce du joueur au trait est essayée vers chaque case du plateau (sauf les murs, que
+# GameManager ne propose jamais), dans son orientation. move_is_valid affiche ses tests, la sortie est ignorée.
+# Un coup est gardé si, une fois joué, aucune pièce d'une autre équipe ne peut prendre le roi du joueur :
+# c'est la définition des coups légaux de Martin, vérifiée ici avec les seules règles de GameManager.
+def rules_view(board, rotation: int):
+    view = np.rot90(board, rotation)
+    pieces = np.empty(view.shape, dtype='O')
+    for x in range(view.shape[0]):
+        for y in range(view.shape[1]):
+            content = view[x, y]
+            pieces[x, y] = BoardPiece(content) if len(content) == 2 and content != "XX" else content
+    return pieces
+
+# Une pièce de l'équipe adverse peut-elle prendre le roi de color ? (pas de roi = situation invalide -> "en échec")
+def rules_king_attacked(order: str, board, color: str) -> bool:
+    players = split_players(order)
+    team = next(player_team for player_team, letter, _ in players if letter == color)
+    for index, (enemy_team, enemy, rotation) in enumerate(players):
+        if enemy_team == team:
+            continue
+        enemy_order = order[3 * index:] + order[:3 * index]
+        pieces = rules_view(board, rotation)
+        king = [(x, y) for x in range(pieces.shape[0]) for y in range(pieces.shape[1]) if pieces[x, y] == "k" + color]
+        if not king:
+            return True
+        for x in range(pieces.shape[0]):
+            for y in range(pieces.shape[1]):
+                piece = pieces[x, y]
+                if isinstance(piece, BoardPiece) and piece.color == enemy and \
+                   move_is_valid(enemy_order, ((x, y), king[0]), pieces):
+                    return True
+    return False
+
+def rules_moves(order: str, board) -> list:
+    pieces = rules_view(board, int(order[2]))
+    rows, cols = pieces.shape
+    targets = [(x, y) for x in range(rows) for y in range(cols) if pieces[x, y] != "XX"]
+
+    moves = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for x in range(rows):
+            for y in range(cols):
+                piece = pieces[x, y]
+                if isinstance(piece, BoardPiece) and piece.color == order[1]:
+                    for target in targets:
+                        if target != (x, y) and move_is_valid(order, ((x, y), target), pieces) and \
+                           not rules_king_attacked(order, play(order, board, ((x, y), target))[1], order[1]):
+                            moves.append(((x, y), target))
+    return moves
+
+def rules_count(order: str, board, depth: int) -> int:
+    moves = rules_moves(order, board)
+    if depth == 1:
+        return len(moves)
+    return sum(rules_count(*play(order, board, move), depth - 1) for move in moves)
+
+GENERATORS = {
+    "martin": (martin_moves, martin_count),
+    "bitboard": (bitboard_moves, bitboard_count),
+    "rules": (rules_moves, rules_count),
+}
+
+#=================================================================================================
+# Nombre de positions après depth demi-coups (depth >= 1)
+def perft(generator: str, order: str, board, depth: int) -> int:
+    return GENERATORS[generator][1](order, board, depth)
+
+# Nombre de positions après depth demi-coups, pour chaque coup du joueur au trait : {((x, y), (x, y)): positions}
+def divide(generator: str, order: str, board, depth: int) -> dict:
+    moves, count = GENERATORS[generator]
+    if depth == 1:
+        return {move: 1 for move in moves(order, board)}
+    return {move: count(*play(order, board, move), depth - 1) for move in moves(order, board)}
+
+# Vitesse de la machine : cases par seconde d'un parcours de plateau comparable à la génération de coups
+def calibrate() -> float:
+    best = None
+    for _ in range(CALIBRATION_RUNS):
+        start = time.perf_counter()
+        targets = []
+        for square, content in enumerate(CALIBRATION_CELLS):
+            if content > 0 and content & 1:
+                targets.append(square)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(CALIBRATION_CELLS) / best if best > 0 else 0.0
+
+# Benchmark d'un générateur sur une position : positions par profondeur (1 à depth), débit de la dernière profondeur
+# et vitesse de la machine au moment de la mesure (la plus grande, avant et après)
+def bench(generator: str, order: str, board, depth: int, repeat: int = REPEAT) -> dict:
+    speed = calibrate()
+    nodes = [perft(generator, order, board, d) for d in range(1, depth)]
+    seconds = None
+    total = 0.0
+    runs = 0
+    while runs < max(1, repeat) or total < MIN_BENCH_TIME:
+        start = time.perf_counter()
+        last = perft(generator, order, board, depth)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+        total += elapsed
+        runs += 1
+    nodes.append(last)
+    speed = max(speed, calibrate())
+    return {"depth": depth, "nodes": nodes, "seconds": seconds, "nps": last / seconds if seconds > 0 else 0.0,
+            "speed": speed}
+
+#=================================================================================================
+# Débit attendu d'après la référence, ramené à la vitesse de la machine pendant la mesure
+def expected_nps(result: dict, reference: dict) -> float:
+    if result.get("speed") and reference.get("speed"):
+        return reference["nps"] * result["speed"] / reference["speed"]
+    return reference["nps"]
+
+# Débit de chaque générateur par rapport à la référence : moyenne géométrique, sur les positions mesurées à la même
+# profondeur, des rapports entre débit mesuré et débit attendu. results et baseline : {position: {générateur: bench}}
+def throughput_ratios(results: dict, baseline: dict) -> dict:
+    logs = {}
+    for name, generators in results.items():
+        for generator, result in generators.items():
+            reference = baseline.get(name, {}).get(generator)
+            if reference is not None and result["depth"] == reference["depth"] and result["nps"] > 0 and reference["nps"] > 0:
+                logs.setdefault(generator, []).append(math.log(result["nps"] / expected_nps(result, reference)))
+    return {generator: math.exp(sum(values) / len(values)) for generator, values in logs.items()}
+
+# Écarts par rapport à la référence : nombres de positions différents, débit d'un générateur en baisse de plus de tolerance
+# Retourne la liste des messages d'erreur
+def compare(results: dict, baseline: dict, tolerance: float = NPS_TOLERANCE) -> list:
+    failures = []
+    for name, generators in results.items():
+        for generator, result in generators.items():
+            reference = baseline.get(name, {}).get(generator)
+            if reference is None:
+                continue
+            depth = min(len(result["nodes"]), len(reference["nodes"]))
+            if result["nodes"][:depth] != reference["nodes"][:depth]:
+                failures.append(f"{name} {generator}: nodes {result['nodes'][:depth]} != baseline {reference['nodes'][:depth]}")
+
+    for generator, ratio in throughput_ratios(results, baseline).items():
+        if ratio < 1 - tolerance:
+            failures.append(f"{generator}: throughput at {ratio:.0%} of baseline (tolerance {tolerance:.0%})")
+    return failures
+
+def load_baseline(path: str = PERFT_BASELINE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        return {}
+    return data["results"]
+
+def save_baseline(results: dict, path: str = PERFT_BASELINE):
+    with open(path, "w") as f:
+        json.dump({"version": BASELINE_VERSION, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perft node counts and move generation throughput of Martin's generators")
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--positions", nargs="+", help="Map file names or PERFT_FENS names, all of them by default")
+    parser.add_argument("--depth", type=int, help="Depth for every generator, DEFAULT_DEPTHS by default")
+    parser.add_argument("--divide", action="store_true", help="Print the node count below each root move")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--baseline", default=PERFT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=NPS_TOLERANCE)
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    positions = [position for position in load_positions() if args.positions is None or position[0] in args.positions]
+    results = {}
+    for name, order, board in positions:
+        for generator in args.generators:
+            depth = args.depth or DEFAULT_DEPTHS[generator]
+            if args.divide:
+                counts = divide(generator, order, board, depth)
+                for move, nodes in sorted(counts.items()):
+                    print(f"{name} {generator} {move[0]} -> {move[1]}: {nodes}")
+                print(f"{name} {generator} depth={depth} moves={len(counts)} nodes={sum(counts.values())}")
+                continue
+            result = bench(generator, order, board, depth, args.repeat)
+            results.setdefault(name, {})[generator] = result
+            print(f"{name:<18} {generator:<9} depth={depth} nodes={result['nodes']} "
+                  f"time={result['seconds']:.3f}s nps={result['nps']:.0f}")
+
+    if args.divide:
+        sys.exit(0)
+    if args.update:
+        # Les positions et générateurs non mesurés gardent leur référence
+        baseline = load_baseline(args.baseline)
+        for name, generators in results.items():
+            baseline.setdefault(name, {}).update(generators)
+        save_baseline(baseline, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    for generator, ratio in throughput_ratios(results, baseline).items():
+        print(f"{generator:<9} throughput {ratio:.0%} of baseline")
+    failures = compare(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
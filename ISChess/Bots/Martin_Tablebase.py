@@ -0,0 +1,431 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Tables de finales du bot Martin.
+# Sur les petites cartes (pawn_race.brd) ou en fin de partie, il reste peu de pièces : toutes les positions avec ce
+# matériel peuvent être résolues hors ligne par analyse rétrograde (generate_tablebase), à partir des positions finales :
+# - un joueur sans coup légal a perdu (tous ses coups laisseraient son roi pris)
+# - un joueur qui peut prendre le roi adverse a gagné
+# puis, en remontant les coups, une position est gagnée si un coup mène à une position perdue pour l'adversaire,
+# et perdue si tous ses coups mènent à des positions gagnées pour l'adversaire. Les positions jamais résolues sont nulles
+# (aucun camp ne peut forcer la prise du roi). Les coups sont ceux de la recherche (Martin.py), promotion en reine comprise.
+# Pendant la partie, chess_bot consulte la table avant de chercher (tablebase_move dans Martin.py) : le coup joué
+# gagne le plus vite possible, ou perd le plus lentement possible, sans recherche.
+#
+# Une table est calculée pour une carte à deux joueurs (murs et orientation des deux couleurs) et un matériel de départ
+# d'au plus max_pieces pièces, avec tous les matériels atteignables par captures et promotions.
+# Format du fichier (petit-boutiste) :
+# - en-tête HEADER : signature TABLEBASE_MAGIC, version, rangées, colonnes, couleur qui joue vers les rangées croissantes
+#   du plateau de la carte (rotation 0), autre couleur (rotation 2), nombre maximal de pièces, nombre de cases, nombre de tables
+# - cases jouables SQUARE (x, y) dans l'orientation de la carte, dans l'ordre des indices de case
+# - répertoire TABLE : codes des pièces du matériel (Martin_Board, triés, complétés par des 0) et position de ses valeurs
+# - valeurs VALUE : une par position, indice ((case de la pièce 0) * S + case de la pièce 1 ...) * 2 + joueur au trait
+#   0 : nulle, n > 0 : gagnée en n demi-coups, -n - 1 : perdue en n demi-coups (pour le joueur au trait)
+#   Les pièces identiques sont rangées par indice de case croissant, les indices impossibles valent 0.
+# Le fichier est ouvert avec mmap, une position ne lit que sa valeur.
+#
+# Calcul d'une table, depuis le dossier ISChess :
+#     python -m Bots.Martin_Tablebase Data/maps/pawn_race.brd --pieces 4
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+from array import array
+
+from Bots.Martin_Board import (OFFBOARD, EMPTY, PAWN, QUEEN, KING, TYPE_MASK, COLOR_SHIFT,
+                               make_piece, color_index, encode_piece, mailbox_size, to_square)
+from BoardReader import read_board
+
+TABLEBASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+TABLEBASE_EXTENSION = ".tb"
+TABLEBASE_MAGIC = b"MTB1"
+TABLEBASE_VERSION = 1
+MAX_PIECES = 4 # Nombre de pièces par défaut (rois compris) : au-delà, le nombre de positions devient trop grand en Python
+MAX_TABLE_PIECES = 8 # Nombre de codes de pièce d'une entrée du répertoire
+HEADER = struct.Struct("<4sHBBBBBHH") # Signature, version, rangées, colonnes, couleur rotation 0, couleur rotation 2, pièces, cases, tables
+SQUARE = struct.Struct("<BB") # x, y
+TABLE = struct.Struct(f"<{MAX_TABLE_PIECES}BQ") # Codes des pièces, position des valeurs dans le fichier
+VALUE = struct.Struct("<h")
+
+TABLEBASES = {} # (rangées, colonnes) -> tables de cette forme de plateau, ouvertes au premier coup joué
+
+class Tablebase:
+    """
+        Table de finales ouverte en lecture avec mmap
+        rows, cols: Forme du plateau, dans l'orientation de la carte
+        colors: (couleur dont les pions avancent vers les rangées croissantes, autre couleur)
+        max_pieces: Nombre maximal de pièces des positions de la table
+        squares: Cases jouables (x, y), square_index[(x, y)] : indice de la case
+        tables: Codes triés des pièces d'un matériel -> position de ses valeurs dans le fichier
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Un fichier vide ne peut pas être projeté en mémoire
+            self.file.close()
+            raise ValueError(f"Empty tablebase '{path}'")
+
+        try:
+            magic, version, self.rows, self.cols, frame_color, other_color, self.max_pieces, square_count, table_count = \
+                HEADER.unpack_from(self.data, 0)
+            if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+                raise ValueError(f"Invalid tablebase '{path}'")
+            self.colors = (frame_color, other_color)
+
+            offset = HEADER.size
+            self.squares = [SQUARE.unpack_from(self.data, offset + i * SQUARE.size) for i in range(square_count)]
+            self.square_index = {square: i for i, square in enumerate(self.squares)}
+            offset += square_count * SQUARE.size
+
+            self.tables = {}
+            for i in range(table_count):
+                *codes, position = TABLE.unpack_from(self.data, offset + i * TABLE.size)
+                codes = tuple(code for code in codes if code != 0)
+                if position + table_size(square_count, len(codes)) * VALUE.size > len(self.data):
+                    raise ValueError(f"Invalid tablebase '{path}'")
+                self.tables[codes] = position
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def value(self, pieces, color: int):
+        """
+            Valeur d'une position pour le joueur au trait color (voir le format), None si elle n'est pas dans la table
+            pieces: (code de pièce, (x, y)) dans l'orientation de la carte
+        """
+        pairs = []
+        for code, square in pieces:
+            index = self.square_index.get(square)
+            if index is None:
+                return None
+            pairs.append((code, index))
+        pairs.sort()
+
+        # Un joueur sans roi a perdu
+        if make_piece(KING, color) not in (code for code, _ in pairs):
+            return -1
+
+        position = self.tables.get(tuple(code for code, _ in pairs))
+        if position is None:
+            return None
+        return VALUE.unpack_from(self.data, position + position_index(pairs, len(self.squares), self.side(color)) * VALUE.size)[0]
+
+    def side(self, color: int) -> int:
+        return self.colors.index(color)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+# Nombre de valeurs d'une table de pieces pièces sur square_count cases (deux joueurs au trait)
+def table_size(square_count: int, pieces: int) -> int:
+    return square_count ** pieces * 2
+
+# Indice d'une position : pairs est la liste triée des (code de pièce, indice de case)
+def position_index(pairs, square_count: int, side: int) -> int:
+    index = 0
+    for _, square in pairs:
+        index = index * square_count + square
+    return index * 2 + side
+
+# Coordonnées dans le plateau d'origine d'une case (x, y) du plateau tourné np.rot90(plateau, rotation)
+# rows, cols : forme du plateau tourné
+def to_frame(x: int, y: int, rows: int, cols: int, rotation: int) -> tuple:
+    for _ in range(rotation % 4):
+        x, y, rows, cols = y, rows - 1 - x, cols, rows
+    return x, y
+
+#=================================================================================================
+# Tables de TABLEBASE_DIRECTORY pour une forme de plateau, ouvertes une seule fois (les fichiers invalides sont ignorés)
+def get_tablebases(rows: int, cols: int) -> list:
+    if not TABLEBASES and os.path.isdir(TABLEBASE_DIRECTORY):
+        for name in sorted(os.listdir(TABLEBASE_DIRECTORY)):
+            if not name.endswith(TABLEBASE_EXTENSION):
+                continue
+            try:
+                tablebase = Tablebase(os.path.join(TABLEBASE_DIRECTORY, name))
+            except (OSError, ValueError, struct.error):
+                continue
+            TABLEBASES.setdefault((tablebase.rows, tablebase.cols), []).append(tablebase)
+        # Marque le dossier comme lu, même sans table
+        TABLEBASES.setdefault(None, [])
+    return TABLEBASES.get((rows, cols), [])
+
+# Ferme les tables ouvertes, le prochain appel de get_tablebases relira TABLEBASE_DIRECTORY
+def close_tablebases():
+    for tablebases in TABLEBASES.values():
+        for tablebase in tablebases:
+            tablebase.close()
+    TABLEBASES.clear()
+
+# Table qui contient la position du plateau de chaînes (dans l'orientation du joueur, tourné de rotation quarts de tour
+# depuis la carte) pour le joueur color : mêmes murs, même orientation des couleurs et matériel de la table. None sinon
+def find_tablebase(board, color: int, rotation: int):
+    rows, cols = len(board), len(board[0])
+    if rotation % 2 == 0:
+        frame_rows, frame_cols = rows, cols
+    else:
+        frame_rows, frame_cols = cols, rows
+
+    tablebases = get_tablebases(frame_rows, frame_cols)
+    if not tablebases:
+        return None
+
+    squares = set()
+    pieces = []
+    for x in range(rows):
+        for y in range(cols):
+            code = encode_piece(board[x][y])
+            if code == OFFBOARD:
+                continue
+            square = to_frame(x, y, rows, cols, rotation)
+            squares.add(square)
+            if code != EMPTY:
+                pieces.append(code)
+    codes = tuple(sorted(pieces))
+
+    for tablebase in tablebases:
+        if len(codes) <= tablebase.max_pieces and color in tablebase.colors and codes in tablebase.tables and \
+           rotation % 4 == 2 * tablebase.side(color) and squares == set(tablebase.squares):
+            return tablebase
+    return None
+
+#=================================================================================================
+# Matériels atteignables depuis codes : retrait d'une pièce autre qu'un roi (capture), pion devenu reine (promotion)
+def material_closure(codes) -> list:
+    materials = {tuple(sorted(codes))}
+    pending = list(materials)
+    while pending:
+        material = pending.pop()
+        for i, code in enumerate(material):
+            successors = []
+            if code & TYPE_MASK != KING:
+                successors.append(material[:i] + material[i + 1:])
+            if code & TYPE_MASK == PAWN:
+                successors.append(material[:i] + (code - PAWN + QUEEN,) + material[i + 1:])
+            for successor in successors:
+                successor = tuple(sorted(successor))
+                if successor not in materials:
+                    materials.add(successor)
+                    pending.append(successor)
+    return sorted(materials, key=lambda material: (len(material), material))
+
+# Écriture d'une table : squares est la liste des cases (x, y), values[matériel] le tableau array('h') de ses valeurs
+def write_tablebase(path: str, rows: int, cols: int, colors: tuple, max_pieces: int, squares: list, values: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    materials = sorted(values, key=lambda material: (len(material), material))
+    position = HEADER.size + len(squares) * SQUARE.size + len(materials) * TABLE.size
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(TABLEBASE_MAGIC, TABLEBASE_VERSION, rows, cols, colors[0], colors[1], max_pieces,
+                            len(squares), len(materials)))
+        for x, y in squares:
+            f.write(SQUARE.pack(x, y))
+        for material in materials:
+            f.write(TABLE.pack(*material, *([0] * (MAX_TABLE_PIECES - len(material))), position))
+            position += len(values[material]) * VALUE.size
+        for material in materials:
+            table = values[material]
+            if sys.byteorder == "big":
+                table = array('h', table)
+                table.byteswap()
+            table.tofile(f)
+
+#=================================================================================================
+def generate_tablebase(map_path: str, path: str = None, max_pieces: int = MAX_PIECES, material: list = None) -> int:
+    """
+        Calcule par analyse rétrograde la table de finales d'une carte à deux joueurs et l'écrit dans path
+        (TABLEBASE_DIRECTORY/<carte>.tb par défaut). Retourne le nombre de positions gagnées ou perdues.
+        material: Pièces de départ ('kw', 'pb'...), celles de la carte par défaut, au plus max_pieces avec un roi par couleur
+        1. Pour chaque position légale (pièces sur des cases distinctes, pas de pion sur sa rangée de promotion) et chaque
+           joueur au trait, les coups sont générés une seule fois et chaque position suivante reçoit un prédécesseur
+        2. Les positions finales (aucun coup : perdue en 0, prise du roi : gagnée en 1) sont mises dans une file
+        3. En sortant de la file dans l'ordre des distances, une position perdue en n rend gagnés en n + 1 ses prédécesseurs,
+           une position gagnée décompte un coup restant de ses prédécesseurs, perdus en n + 1 quand il n'en reste plus
+    """
+    # Importé ici : Martin importe ce module pour consulter les tables
+    import Bots.Martin as martin
+
+    board_file = read_board(map_path)
+    if board_file is None:
+        raise ValueError(f"Invalid map '{map_path}'")
+    order, board = board_file
+    rows, cols = board.shape
+    if path is None:
+        path = os.path.join(TABLEBASE_DIRECTORY, os.path.splitext(os.path.basename(map_path))[0] + TABLEBASE_EXTENSION)
+
+    # Couleur qui joue dans l'orientation de la carte (ses pions avancent vers les rangées croissantes), puis son adversaire
+    players = {int(order[i + 2]) % 4: color_index(order[i + 1]) for i in range(0, len(order) - 2, 3)}
+    if len(order) // 3 != 2 or sorted(players) != [0, 2]:
+        raise ValueError(f"Tablebases need a two-player map with players facing each other, got '{order}'")
+    colors = (players[0], players[2])
+
+    if material is None:
+        material = [cell for cell in board.flat if encode_piece(cell) > 0]
+    codes = [encode_piece(piece) for piece in material]
+    if len(codes) > max_pieces or any(code <= 0 or code >> COLOR_SHIFT not in colors for code in codes) or \
+       any(codes.count(make_piece(KING, color)) != 1 for color in colors):
+        raise ValueError(f"Material {material} must have one king per color and at most {max_pieces} pieces")
+
+    squares = [(x, y) for x in range(rows) for y in range(cols) if encode_piece(board[x, y]) != OFFBOARD]
+    square_count = len(squares)
+    mailbox = [to_square(x, y, cols) for x, y in squares]
+    index_of_square = {square: i for i, square in enumerate(mailbox)}
+
+    # Même génération de coups que la recherche, la couleur de la rotation 0 au trait dans l'orientation de la carte
+    martin.init_players(None, rows, cols)
+    martin.init_mailbox(rows, cols)
+    martin.PERSPECTIVE_COLOR = colors[0]
+    martin.reset_metrics()
+    empty_board = array('b', [OFFBOARD]) * mailbox_size(rows, cols)
+    for square in mailbox:
+        empty_board[square] = EMPTY
+    last_row = [rows - 1, 0] # Rangée de promotion de chaque côté
+
+    # Indices globaux : les valeurs de tous les matériels forment un seul graphe
+    materials = material_closure(codes)
+    bases = {}
+    total = 0
+    for table_codes in materials:
+        bases[table_codes] = total
+        total += table_size(square_count, len(table_codes))
+
+    # 1. Coups de chaque position : arcs (position suivante, position) et nombre de coups restants
+    edge_targets = array('i')
+    edge_sources = array('i')
+    remaining = array('i', [0]) * total
+    values = array('h', [0]) * total
+    wins = array('i') # Positions gagnées en 1 (prise du roi)
+    losses = array('i') # Positions perdues en 0 (aucun coup)
+
+    for table_codes in materials:
+        base = bases[table_codes]
+        pieces = len(table_codes)
+        sides = [colors.index(code >> COLOR_SHIFT) for code in table_codes]
+        for index in range(square_count ** pieces):
+            # Cases des pièces, chiffres de l'indice en base square_count (pièce 0 en poids fort)
+            placement = [0] * pieces
+            rest = index
+            for i in range(pieces - 1, -1, -1):
+                rest, placement[i] = divmod(rest, square_count)
+            if not is_canonical(table_codes, placement, sides, squares, last_row):
+                continue
+
+            data = empty_board[:]
+            for code, square in zip(table_codes, placement):
+                data[mailbox[square]] = code
+
+            for side, color in enumerate(colors):
+                node = base + index * 2 + side
+                king_pos = mailbox[placement[table_codes.index(make_piece(KING, color))]]
+                king_capture = False
+                moves = 0
+                for i, code in enumerate(table_codes):
+                    if sides[i] != side:
+                        continue
+                    origin = mailbox[placement[i]]
+                    for target in martin.piece_moves(origin, data, code & TYPE_MASK, color):
+                        # Prendre le roi termine la partie, même si notre roi reste attaqué (comme find_king_capture)
+                        if data[target] & TYPE_MASK == KING:
+                            king_capture = True
+                            break
+                        if not martin.is_move_legal(data, origin, target, color, king_pos):
+                            continue
+
+                        # Position suivante : pièce déplacée (promue sur sa rangée de promotion), pièce capturée retirée
+                        placed = code
+                        if code & TYPE_MASK == PAWN and martin.ROW_OF[target] == last_row[side]:
+                            placed = code - PAWN + QUEEN
+                        pairs = [(placed, index_of_square[target])]
+                        for j, other in enumerate(table_codes):
+                            if j != i and mailbox[placement[j]] != target:
+                                pairs.append((other, placement[j]))
+                        pairs.sort()
+                        successor = bases[tuple(code for code, _ in pairs)] + position_index(pairs, square_count, 1 - side)
+                        edge_targets.append(successor)
+                        edge_sources.append(node)
+                        moves += 1
+                    if king_capture:
+                        break
+
+                if king_capture:
+                    values[node] = 1
+                    wins.append(node)
+                elif moves == 0:
+                    values[node] = -1
+                    losses.append(node)
+                else:
+                    remaining[node] = moves
+
+    # Prédécesseurs de chaque position (tri par comptage des arcs selon leur position suivante)
+    first = array('i', [0]) * (total + 1)
+    for target in edge_targets:
+        first[target + 1] += 1
+    for node in range(total):
+        first[node + 1] += first[node]
+    fill = array('i', first)
+    predecessors = array('i', [0]) * len(edge_targets)
+    for target, source in zip(edge_targets, edge_sources):
+        predecessors[fill[target]] = source
+        fill[target] += 1
+    del edge_targets, edge_sources, fill
+
+    # 2. et 3. Parcours en largeur depuis les positions finales (les perdues en 0 avant les gagnées en 1)
+    queue = losses + wins
+    head = 0
+    while head < len(queue):
+        node = queue[head]
+        head += 1
+        value = values[node]
+        for predecessor in predecessors[first[node]:first[node + 1]]:
+            if values[predecessor] != 0:
+                continue
+            if value < 0:
+                # Un coup mène à une position perdue pour l'adversaire : gagnée, un demi-coup plus loin
+                values[predecessor] = -value
+                queue.append(predecessor)
+            else:
+                remaining[predecessor] -= 1
+                if remaining[predecessor] == 0:
+                    # Tous les coups mènent à des positions gagnées pour l'adversaire : perdue, au plus tard
+                    values[predecessor] = -value - 2
+                    queue.append(predecessor)
+
+    tables = {table_codes: values[bases[table_codes]:bases[table_codes] + table_size(square_count, len(table_codes))]
+              for table_codes in materials}
+    write_tablebase(path, rows, cols, colors, max_pieces, squares, tables)
+    return len(queue)
+
+# Une position n'est calculée qu'une fois : pièces sur des cases distinctes, pièces identiques par case croissante,
+# aucun pion sur sa rangée de promotion (il y serait devenu une reine)
+def is_canonical(codes, placement, sides, squares, last_row) -> bool:
+    if len(set(placement)) != len(placement):
+        return False
+    for i, code in enumerate(codes):
+        if i > 0 and codes[i - 1] == code and placement[i - 1] > placement[i]:
+            return False
+        if code & TYPE_MASK == PAWN and squares[placement[i]][0] == last_row[sides[i]]:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Martin's endgame tablebase of a two-player map by retrograde analysis")
+    parser.add_argument("maps", nargs="+", help=".brd or .fen map files")
+    parser.add_argument("--output", help="Tablebase file (only with a single map), TABLEBASE_DIRECTORY/<map>.tb by default")
+    parser.add_argument("--pieces", type=int, default=MAX_PIECES, help="Maximal number of pieces, kings included")
+    parser.add_argument("--material", nargs="+", help="Starting pieces (e.g. kw kb pw), the pieces of the map by default")
+    args = parser.parse_args()
+
+    for map_path in args.maps:
+        count = generate_tablebase(map_path, args.output if len(args.maps) == 1 else None, args.pieces, args.material)
+        print(f"{map_path}: {count} won or lost positions")
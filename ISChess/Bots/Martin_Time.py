@@ -0,0 +1,80 @@
+# Project       : Martin - ISChess
+# Authors       : Jowhn Blake, Karel Vilém Svoboda
+# Affiliation   : HES-SO Valais, Algorithmes et Structures de données
+# Date          : 07.01.2026
+
+# Gestion du temps de recherche du bot Martin.
+# GameManager laisse budget * (1 + GRACE_RATIO) secondes au bot avant de terminer son thread (QTimer timeout).
+# Sur ce temps disponible, on calcule :
+# - une limite dure (hard) : la recherche en cours est interrompue, avec une marge pour retourner le coup à temps
+# - une limite souple (soft) : au-delà de la profondeur cible, aucune nouvelle itération ne commence après elle
+# Une itération qui ne pourra pas se terminer avant la limite dure n'est pas lancée : sa durée est prédite à partir
+# de la durée de l'itération précédente et du facteur de branchement observé entre les deux dernières itérations.
+# L'horloge (time.perf_counter) n'est lue que tous les CLOCK_CHECK_INTERVAL nœuds.
+
+import time
+
+SOFT_LIMIT_RATIO = 0.5 # Part du budget après laquelle on ne commence plus d'itération au-delà de la profondeur cible
+HARD_LIMIT_RATIO = 0.9 # Part du temps disponible (budget et temps de grâce) après laquelle la recherche est interrompue
+TIME_SAFETY_MARGIN = 0.05 # Secondes réservées au retour du coup (fin de la récursion, variation principale, métriques)
+CLOCK_CHECK_INTERVAL = 128 # Nombre de nœuds entre deux lectures de l'horloge
+MIN_BRANCHING_FACTOR = 1.5 # Bornes du facteur de branchement utilisé pour prédire la durée de l'itération suivante
+MAX_BRANCHING_FACTOR = 10
+
+class TimeManager:
+    """
+        Limites de temps d'une recherche, mesurées depuis la création de l'objet
+        hard_limit: Secondes après lesquelles out_of_time arrête la recherche
+        soft_limit: Secondes après lesquelles on ne commence plus d'itération au-delà de la profondeur cible
+        stop_event: Event optionnel qui arrête aussi la recherche (réflexion interrompue par GameManager, Lazy SMP)
+        iteration_times: Durée des itérations terminées, pour prédire la suivante
+    """
+    def __init__(self, hard_limit: float, soft_limit: float = None, stop_event=None):
+        self.start = time.perf_counter()
+        self.hard_limit = hard_limit
+        self.soft_limit = hard_limit if soft_limit is None else soft_limit
+        self.stop_event = stop_event
+        self.countdown = 1 # Premier contrôle immédiat : l'event peut déjà être levé
+        self.stopped = False
+        self.iteration_times = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return max(0.0, self.hard_limit - self.elapsed())
+
+    def out_of_time(self) -> bool:
+        # Appelé à chaque nœud : l'horloge et l'event ne sont consultés qu'une fois tous les CLOCK_CHECK_INTERVAL appels
+        self.countdown -= 1
+        if self.countdown > 0:
+            return self.stopped
+        self.countdown = CLOCK_CHECK_INTERVAL
+        if self.elapsed() > self.hard_limit or (self.stop_event is not None and self.stop_event.is_set()):
+            self.stopped = True
+        return self.stopped
+
+    def record_iteration(self, seconds: float):
+        self.iteration_times.append(seconds)
+
+    def predict_next_iteration(self) -> float:
+        if not self.iteration_times:
+            return 0.0
+        last = self.iteration_times[-1]
+        branching_factor = MAX_BRANCHING_FACTOR
+        if len(self.iteration_times) >= 2 and self.iteration_times[-2] > 0:
+            branching_factor = min(max(last / self.iteration_times[-2], MIN_BRANCHING_FACTOR), MAX_BRANCHING_FACTOR)
+        return last * branching_factor
+
+    def can_start_iteration(self, beyond_target: bool) -> bool:
+        elapsed = self.elapsed()
+        if beyond_target and elapsed > self.soft_limit:
+            return False
+        return elapsed + self.predict_next_iteration() <= self.hard_limit
+
+# Limites d'un coup joué avec time_budget secondes, GameManager ajoutant grace_ratio * time_budget avant de couper le thread
+def allocate_time(time_budget: float, grace_ratio: float = 0.0, stop_event=None) -> TimeManager:
+    available = time_budget * (1 + grace_ratio)
+    hard_limit = max(0.0, available * HARD_LIMIT_RATIO - TIME_SAFETY_MARGIN)
+    soft_limit = min(time_budget * SOFT_LIMIT_RATIO, hard_limit)
+    return TimeManager(hard_limit, soft_limit, stop_event)
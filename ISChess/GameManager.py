@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import dataclasses
+import json
+import logging
 import math
-from typing import List, Optional, TYPE_CHECKING, Tuple
+from typing import Callable, List, Optional, TYPE_CHECKING, Tuple
 
 import numpy as np
 from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QIcon
 
 from BoardManager import BoardManager
+from BotProcess import BotWorker
 from BotWidget import BotWidget
-from ChessRules import move_is_valid
+from Bots.ChessBotList import PONDER_LIST
+from GameRules import apply_move, get_sequence, is_move_playable, next_turn, rotate_coordinates, winner
 from ParallelPlayer import ParallelTurn
 from Piece import Piece
 from PieceManager import PieceManager
@@ -18,34 +23,33 @@ from Player import Player
 if TYPE_CHECKING:
     from ChessArena import ChessArena
 
+SEARCH_LOGGER = logging.getLogger("ISChess.search")
+SEARCH_LOG_FILE: Optional[str] = None
 
-def rotate_coordinates(
-    size: tuple[int, int], pt: tuple[int, int], rot: int
-) -> tuple[int, int]:
-    """
-    Rotate the given coordinates by the indicated angle
-    :param size: Size of the board in the current orientation
-    :param pt: Coordinates in the current orientation
-    :param rot: Number of 90° clockwise rotations to perform
-    :return: The rotated coordinates
+
+def get_search_logger() -> logging.Logger:
     """
-    rot = rot % 4
-    if rot == 0:
-        return pt
+    Get the logger of the search results
 
-    y, x = pt
-    y2 = size[0] - y - 1
-    x2 = size[1] - x - 1
-    if rot == 1:
-        return x, y2
-    if rot == 2:
-        return y2, x2
-    return x2, y
+    If ``SEARCH_LOG_FILE`` is set and the application did not attach a handler to the
+    ``ISChess.search`` logger, a file handler writing one JSON line per record to this path
+    is attached on first use. Otherwise the records only reach the configured handlers.
+    :return: The ``ISChess.search`` logger
+    """
+    if SEARCH_LOG_FILE is not None and not SEARCH_LOGGER.handlers:
+        handler = logging.FileHandler(SEARCH_LOG_FILE, delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        SEARCH_LOGGER.addHandler(handler)
+        SEARCH_LOGGER.setLevel(logging.INFO)
+        SEARCH_LOGGER.propagate = False
+    return SEARCH_LOGGER
 
 
 class GameManager:
     MIN_WAIT = 500
     GRACE_RATIO = 0.05
+    PONDERING = True
+    SEARCH_LOG = False
 
     def __init__(self, arena: ChessArena):
         self.arena: ChessArena = arena
@@ -54,6 +58,8 @@ class GameManager:
         self.turn: int = 0
         self.nbr_turn_to_play: int = 0
         self.current_player: Optional[ParallelTurn] = None
+        self.workers: dict[int, BotWorker] = {}
+        self.search_log_sink: Optional[Callable[[dict], None]] = None
         self.current_player_next_move = None
         self.current_player_color = None
         self.current_player_board = None
@@ -66,6 +72,7 @@ class GameManager:
 
     def reset(self):
         """Reset the game"""
+        self.close_workers()
         self.players = []
         self.turn = 0
 
@@ -85,13 +92,7 @@ class GameManager:
                      If ``False``, only the part related to the current player is returned
         :return: The player sequence
         """
-        if full:
-            start = self.board_manager.player_order[: 3 * self.turn]
-            end = self.board_manager.player_order[3 * self.turn :]
-            return end + start
-        return self.board_manager.player_order[
-            self.turn * 3 : self.turn * 3 + 3
-        ]
+        return get_sequence(self.board_manager.player_order, self.turn, full)
 
     def next(self) -> bool:
         """
@@ -113,6 +114,9 @@ class GameManager:
         func_name, func = player.get_func()
         print(f"Player {self.turn}'s turn: {func_name} (budget: {budget:.2f}s)")
 
+        # Every bot player gets its worker process before its first turn, so they start in parallel
+        self.start_workers()
+
         tile_width = self.arena.white_square.size().width()
         tile_height = self.arena.white_square.size().width()
 
@@ -123,36 +127,60 @@ class GameManager:
 
         if func_name == "ManualMover":
             self.start_manual_turn(player)
-
-            budget_ms: int = int(budget * 1000 * (1 + self.GRACE_RATIO))
-            self.timeout.start(budget_ms)
-
-            if self.MIN_WAIT < budget_ms:
-                self.min_wait.start(self.MIN_WAIT)
-
+            self.start_timers(budget)
             return True
 
+        # The worker stops its own background search before playing
         self.current_player = ParallelTurn(
-            func,
+            self.workers[self.turn],
             sequence,
             BoardManager.get_string_board(self.current_player_board),
             budget,
             tile_width,
             tile_height,
+            self.GRACE_RATIO,
+            self.get_sequence(True),
         )
 
-        self.current_player.setTerminationEnabled(True)
+        # The budget starts when the board is sent, not while a new worker imports the bot
+        self.current_player.ready.connect(lambda: self.start_timers(budget))
         self.current_player.finished.connect(self.on_player_finished)
         self.current_player.start()
 
-        # Timer to call
-        # self.timeout.singleShot(int(budget * 1000 * 1.05), lambda: self.end_turn(forced=True))
+        return True
+
+    def start_timers(self, budget: float):
+        """
+        Start the timeout timer of the current turn, and the minimum waiting time before ending it
+
+        :param budget: The current player's time budget, in seconds
+        """
         budget_ms: int = int(budget * 1000 * (1 + self.GRACE_RATIO))
         self.timeout.start(budget_ms)
         if self.MIN_WAIT < budget_ms:
             self.min_wait.start(self.MIN_WAIT)
 
-        return True
+    def start_workers(self):
+        """Start the worker process of every bot player that does not have a running one for its current bot"""
+        for index, player in enumerate(self.players):
+            func_name, func = player.get_func()
+            if func_name == "ManualMover" or func is None:
+                continue
+
+            worker = self.workers.get(index)
+            if worker is not None and worker.func is not func:
+                worker.close()
+                worker = None
+            if worker is None:
+                self.workers[index] = BotWorker(func)
+            elif not worker.is_alive():
+                worker.restart()
+
+    def close_workers(self):
+        """Stop the worker processes of all players"""
+        for worker in self.workers.values():
+            worker.close()
+        self.workers = {}
 
     def start_manual_turn(self, player):
         for piece in self.board_manager.pieces:
@@ -181,7 +209,7 @@ class GameManager:
         rotated_end_tile = rotate_coordinates(board_shape, end_tile, rot)
         move = (rotated_start_tile, rotated_end_tile)
 
-        if not move_is_valid(self.get_sequence(True), move, self.current_player_board):
+        if not is_move_playable(self.get_sequence(True), move, self.current_player_board):
             piece.setPos(piece.old_pos)
             return
 
@@ -211,8 +239,8 @@ class GameManager:
 
         If this function is called to prematurely end a player's turn
         because of a timeout, ``forced`` should be set to ``True``
-        :param forced: If ``True``, prints a message telling the user the current player
-                       took too long and was terminated early
+        :param forced: If ``True``, the current player took too long: if its bot is still searching,
+                       its worker process is killed and restarted
         :return: ``True`` if successful, ``False`` if no turn was in progress
         """
 
@@ -227,8 +255,7 @@ class GameManager:
             if self.check_game_end():
                 return True
 
-            self.turn += 1
-            self.turn %= len(self.players)
+            self.turn = next_turn(self.board_manager.player_order, self.turn, self.board_manager.board)
 
             if self.auto_playing:
                 self.nbr_turn_to_play -= 1
@@ -242,24 +269,31 @@ class GameManager:
         if self.current_player is None:
             return False
 
-        self.current_player_next_move = self.current_player.next_move
-
         self.min_wait.stop()
         self.timeout.stop()
-        if forced:
-            print("Player took too long, terminating thread")
 
-        self.current_player.terminate()
-        self.current_player.quit()
+        # A bot still searching is killed with its process, which the arena process survives.
+        # The worker is restarted right away for the player's next turn
+        worker: BotWorker = self.workers[self.turn]
+        if forced and self.current_player.isRunning():
+            print("Player took too long, restarting its bot process")
+            worker.kill()
+        self.current_player.wait()
+        if not worker.is_alive():
+            worker.restart()
+
+        self.current_player_next_move = self.current_player.next_move
 
+        self.log_search_result(self.current_player.search_result)
         self.apply_move()
 
         if self.check_game_end():
             return True
 
+        self.start_pondering()
+
         self.current_player = None
-        self.turn += 1
-        self.turn %= len(self.players)
+        self.turn = next_turn(self.board_manager.player_order, self.turn, self.board_manager.board)
 
         if self.auto_playing:
             self.nbr_turn_to_play -= 1
@@ -270,6 +304,69 @@ class GameManager:
 
         return True
 
+    def log_search_result(self, result) -> bool:
+        """
+        Send the structured search result reported by the current player's bot to the log sink
+
+        The record is a dictionary with the turn, the bot name and the player sequence,
+        followed by the fields of the result (best move, score, PV, nodes, nps...).
+        It is passed to ``search_log_sink`` if one is set. Otherwise, if ``SEARCH_LOG`` is enabled,
+        it is logged as a JSON line on the ``ISChess.search`` logger, written to ``SEARCH_LOG_FILE``
+        if that path is set (see ``get_search_logger``).
+        :param result: The result given by the bot (dataclass or mapping), ``None`` if it did not report one
+        :return: ``True`` if a record was emitted, ``False`` otherwise
+        """
+        if result is None or (self.search_log_sink is None and not self.SEARCH_LOG):
+            return False
+
+        func_name, _ = self.players[self.turn].get_func()
+        record = {"turn": self.turn, "player": func_name, "sequence": self.get_sequence()}
+        record.update(dataclasses.asdict(result) if dataclasses.is_dataclass(result) else dict(result))
+
+        if self.search_log_sink is not None:
+            self.search_log_sink(record)
+        else:
+            get_search_logger().info(json.dumps(record))
+        return True
+
+    def start_pondering(self) -> bool:
+        """
+        Start the background search of the player who just moved, on the opponent's time
+
+        Only bots that registered a ponder function (see ``register_ponder``) are concerned.
+        The bot receives the board after its move, in its orientation, and searches in its
+        worker process until its next turn starts or the next player's budget runs out.
+        Each player has its own process, so the search runs in parallel with the player
+        currently thinking, even if both use the same bot.
+        :return: ``True`` if a background search was started, ``False`` otherwise
+        """
+        if not self.PONDERING:
+            return False
+
+        player: Player = self.players[self.turn]
+        _, func = player.get_func()
+        if PONDER_LIST.get(func) is None:
+            return False
+
+        worker = self.workers.get(self.turn)
+        if worker is None or not worker.is_alive():
+            return False
+
+        next_player: Player = self.players[
+            next_turn(self.board_manager.player_order, self.turn, self.board_manager.board)
+        ]
+        sequence: str = self.get_sequence()
+        board = np.rot90(self.board_manager.board, int(sequence[2]))
+        budget: float = next_player.get_budget() * (1 + self.GRACE_RATIO)
+
+        worker.ponder(sequence, np.array(BoardManager.get_string_board(board)), budget)
+        return True
+
+    def stop_pondering(self):
+        """Stop the background searches of all players and wait for them to finish"""
+        for worker in self.workers.values():
+            worker.stop_pondering()
+
     def start(self) -> bool:
         """
         Start a series of turns
@@ -351,7 +448,6 @@ class GameManager:
             self.current_player_next_move
         )
 
-        start, end = move
         color: str = self.current_player_color
         color_name: str = PieceManager.COLOR_NAMES[color]
         board = self.current_player_board
@@ -359,12 +455,13 @@ class GameManager:
         tile_width = self.arena.white_square.size().width()
         tile_height = self.arena.white_square.size().width()
 
-        start_piece = board[start[0], start[1]]
-
-        if not move_is_valid(self.get_sequence(True), move, board):
-            print(f"Invalid move from {start} to {end}")
+        if not is_move_playable(self.get_sequence(True), move, board):
+            print(f"Invalid move {move!r}")
             return False
 
+        start, end = move
+
+        start_piece = board[start[0], start[1]]
         end_piece = board[end[0], end[1]]
 
         start_piece_and_col = f"{start_piece.type}{start_piece.color}"
@@ -381,9 +478,8 @@ class GameManager:
                 f"{color_name} captured {PieceManager.get_piece_name(end_piece_and_col)}"
             )
 
-        # Apply move
-        board[end[0], end[1]] = start_piece
-        board[start[0], start[1]] = ""
+        # Apply move, a promoted pawn keeps its graphics item
+        apply_move(board, move, self.promote_pawn)
 
         if type(end_piece) is Piece:
             print("longueur avant : ", len(self.board_manager.pieces))
@@ -391,10 +487,6 @@ class GameManager:
             print("longueur après : ", len(self.board_manager.pieces))
 
             self.arena.remove_piece(end_piece)
-        
-        # Promotion
-        if start_piece[0] == "p" and end[0] == board.shape[0] - 1:
-            PieceManager.upgrade_piece(board[end[0], end[1]], 'q')
 
         sequence: str = self.get_sequence()
         rot: int = int(sequence[2])
@@ -414,17 +506,30 @@ class GameManager:
 
         return True
 
-    def check_game_end(self):
-        board = self.current_player_board
-        current_color = self.current_player_color
-        for y in range(board.shape[0]):
-            for x in range(board.shape[1]):
-                piece = board[y, x]
-                if piece and piece[0] == "k" and piece[1] != current_color:
-                    return
-
-        color_name: str = PieceManager.COLOR_NAMES[current_color]
+    @staticmethod
+    def promote_pawn(pawn: Piece) -> Piece:
+        """
+        Turn a pawn reaching the last row into a queen, keeping its graphics item
+        :param pawn: The promoted pawn
+        :return: The same piece, upgraded
+        """
+        PieceManager.upgrade_piece(pawn, 'q')
+        return pawn
+
+    def check_game_end(self) -> bool:
+        """
+        Check if the current player has won, i.e. no king of another team remains, and stop the game if so
+        :return: ``True`` if the game is over
+        """
+        color = winner(self.board_manager.player_order, self.turn, self.board_manager.board)
+        if color is None:
+            return False
+
+        self.stop_pondering()
+
+        color_name: str = PieceManager.COLOR_NAMES[color]
         self.arena.show_message(
             f"{color_name} player won the match", "End of game"
         )
         self.stop()
+        return True
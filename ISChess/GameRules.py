@@ -0,0 +1,148 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from ChessRules import move_is_valid
+
+Move = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def rotate_coordinates(
+    size: tuple[int, int], pt: tuple[int, int], rot: int
+) -> tuple[int, int]:
+    """
+    Rotate the given coordinates by the indicated angle
+    :param size: Size of the board in the current orientation
+    :param pt: Coordinates in the current orientation
+    :param rot: Number of 90° clockwise rotations to perform
+    :return: The rotated coordinates
+    """
+    rot = rot % 4
+    if rot == 0:
+        return pt
+
+    y, x = pt
+    y2 = size[0] - y - 1
+    x2 = size[1] - x - 1
+    if rot == 1:
+        return x, y2
+    if rot == 2:
+        return y2, x2
+    return x2, y
+
+
+class BoardPiece(str):
+    """Board tile holding a piece string, with the ``type``/``color`` attributes of ``Piece`` read by ``ChessRules``"""
+
+    @property
+    def type(self) -> str:
+        return self[0]
+
+    @property
+    def color(self) -> str:
+        return self[1]
+
+    def string(self) -> str:
+        return str(self)
+
+
+def get_sequence(player_order: str, turn: int, full: bool = False) -> str:
+    """
+    Get the player sequence
+    :param player_order: The player order of the board
+    :param turn: Index of the current player
+    :param full: If ``True``, the full sequence is returned.
+                 If ``False``, only the part related to the current player is returned
+    :return: The player sequence
+    """
+    if full:
+        start = player_order[: 3 * turn]
+        end = player_order[3 * turn :]
+        return end + start
+    return player_order[turn * 3 : turn * 3 + 3]
+
+
+def has_king(board: np.ndarray, color: str) -> bool:
+    """
+    :param board: The board, in any orientation
+    :param color: The player's color
+    :return: ``True`` if the player's king is still on the board
+    """
+    return any(tile == "k" + color for tile in board.flat)
+
+
+def is_move_playable(sequence: str, move, view: np.ndarray) -> bool:
+    """
+    Check a move chosen by a player, whatever the bot returned
+
+    The move must be two pairs of coordinates inside the board, start on a piece,
+    not end on a wall and follow the rules of ``ChessRules.move_is_valid``
+    :param sequence: The full player sequence, starting with the current player
+    :param move: The move, in the player's orientation
+    :param view: The board in the player's orientation
+    :return: ``True`` if the move can be applied
+    """
+    try:
+        (start, end) = move
+        start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+    except (TypeError, ValueError, IndexError):
+        return False
+    in_bounds = all(0 <= x < view.shape[0] and 0 <= y < view.shape[1] for x, y in (start, end))
+    return (
+        in_bounds
+        and view[start] not in ("", "XX", None)
+        and view[end] != "XX"
+        and move_is_valid(sequence, (start, end), view)
+    )
+
+
+def apply_move(view: np.ndarray, move: Move, promote: Callable) -> tuple:
+    """
+    Apply a move checked by ``is_move_playable``: a pawn reaching the last row becomes a queen
+    :param view: The board in the player's orientation, modified in place
+    :param move: The move, in the player's orientation
+    :param promote: Called with a pawn reaching the last row, returns the queen to put in its place
+    :return: The moved piece, the captured tile (``""`` if none) and whether the pawn was promoted
+    """
+    (start, end) = move
+    start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+    start_piece = view[start]
+    end_piece = view[end]
+    view[end] = start_piece
+    view[start] = ""
+
+    promotion = start_piece[0] == "p" and end[0] == view.shape[0] - 1
+    if promotion:
+        view[end] = promote(start_piece)
+    return start_piece, end_piece, promotion
+
+
+def winner(player_order: str, turn: int, board: np.ndarray) -> Optional[str]:
+    """
+    Check if the current player has won, i.e. no king of another team remains
+    :param player_order: The player order of the board
+    :param turn: Index of the current player
+    :param board: The board, in any orientation
+    :return: The color of the current player if it won, ``None`` otherwise
+    """
+    sequence = get_sequence(player_order, turn)
+    for i in range(0, len(player_order), 3):
+        if player_order[i] != sequence[0] and has_king(board, player_order[i + 1]):
+            return None
+    return sequence[1]
+
+
+def next_turn(player_order: str, turn: int, board: np.ndarray) -> int:
+    """
+    Get the next player to play: players whose king was captured no longer play
+    :param player_order: The player order of the board
+    :param turn: Index of the current player
+    :param board: The board, in any orientation
+    :return: Index of the next player
+    """
+    players = len(player_order) // 3
+    for _ in range(players):
+        turn = (turn + 1) % players
+        if has_king(board, player_order[turn * 3 + 1]):
+            break
+    return turn
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import dataclasses
+import importlib
+import os
+import signal
+import threading
+import time
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from BoardReader import BOARD_DIRECTORY, DEFAULT_BOARD, read_board
+from GameRules import (
+    BoardPiece,
+    Move,
+    apply_move,
+    get_sequence,
+    has_king,
+    is_move_playable,
+    next_turn,
+    rotate_coordinates,
+    winner,
+)
+
+COLOR_NAMES = {"w": "White", "b": "Black", "r": "Red", "y": "Yellow"}
+
+
+def load_bots() -> dict:
+    """
+    Import every module of the ``Bots`` package so that they register their bot functions,
+    as ``ChessArena`` does with ``from Bots import *``
+    :return: The registered bots, by name
+    """
+    import Bots
+    from Bots.ChessBotList import CHESS_BOT_LIST
+
+    for module in Bots.__all__:
+        importlib.import_module(f"Bots.{module}")
+    return CHESS_BOT_LIST
+
+
+class BotTimeout(BaseException):
+    """Raised inside a bot when its time budget and the grace period are exhausted (see ``HeadlessGame.hard_timeout``)"""
+
+
+@dataclasses.dataclass
+class HeadlessPlayer:
+    color: str
+    name: str
+    func: Callable
+    budget: float
+
+    def get_budget(self) -> float:
+        return self.budget
+
+    def get_func(self):
+        return self.name, self.func
+
+
+@dataclasses.dataclass
+class GameResult:
+    winner: Optional[str]
+    reason: str
+    turns: int
+    moves: list = dataclasses.field(default_factory=list)
+
+
+class HeadlessGame:
+    """
+    Bot vs bot game without any display
+
+    The game follows the rules of ``GameRules``, shared with ``GameManager``: the turn order
+    and board orientation come from ``player_order``, each bot receives the board as a string
+    array in its orientation, invalid moves and late answers are dropped and the turn passes,
+    pawns reaching the last row become queens, and a player wins when the kings of all other
+    teams have been captured. Players whose king was captured no longer play.
+
+    Bots run in the calling thread. A late bot is only detected once it returns, unless
+    ``hard_timeout`` is set: a ``SIGALRM`` timer then interrupts it when its budget and the
+    grace period are exhausted, like ``GameManager`` terminating its thread. This requires
+    the main thread of a Unix process, and leaves the bot's globals as they were when
+    it was interrupted.
+    """
+
+    GRACE_RATIO = 0.05
+    MAX_TURNS = 300
+    TILE_SIZE = 0
+
+    def __init__(self, path: str = DEFAULT_BOARD, verbose: bool = False, hard_timeout: bool = False):
+        self.board: np.ndarray = np.array([], dtype='O')
+        self.path: Optional[str] = None
+        self.player_order: str = "0w01b2"
+        self.players: list[HeadlessPlayer] = []
+        self.turn: int = 0
+        self.winner: Optional[str] = None
+        self.moves: list[dict] = []
+        self.search_results: list = []
+        self.verbose: bool = verbose
+        self.hard_timeout: bool = hard_timeout
+        self.bot_running: bool = False
+        if not self.load_file(path):
+            raise ValueError(f"Invalid board file '{path}'")
+
+    def load_file(self, path: str) -> bool:
+        """
+        Load a board from a file and reset the game
+
+        :param path: The path to the board file. Can either be a .brd or .fen file
+        :return: ``True`` if successful, ``False`` otherwise
+        """
+        loaded = read_board(path)
+        if loaded is None:
+            return False
+
+        player_order, board = loaded
+        self.player_order = player_order.strip()
+        self.board = np.empty_like(board, dtype=object)
+        for y in range(board.shape[0]):
+            for x in range(board.shape[1]):
+                tile = board[y, x]
+                self.board[y, x] = tile if tile in ("", "XX") else BoardPiece(tile)
+        self.path = path
+        self.reset()
+        return True
+
+    def reset(self):
+        """Reset the turn, the winner and the history, keeping the board and the players"""
+        self.turn = 0
+        self.winner = None
+        self.moves = []
+        self.search_results = []
+
+    def add_player(self, bot: Union[str, Callable], budget: float, name: Optional[str] = None):
+        """
+        Add a player to the game, in the order of ``player_order``
+
+        :param bot: The bot function, or its name in ``CHESS_BOT_LIST``
+        :param budget: The time budget of each turn, in seconds
+        :param name: Name of the player, the bot name by default
+        """
+        if len(self.players) >= len(self.player_order) // 3:
+            raise ValueError(f"The board only has {len(self.player_order) // 3} players")
+
+        from Bots.ChessBotList import SETUP_LIST
+
+        if isinstance(bot, str):
+            name = name or bot
+            bot = load_bots()[bot]
+        # Started now rather than during the bot's first turn, as in its GUI worker process
+        setup = SETUP_LIST.get(bot)
+        if setup is not None:
+            setup()
+        color = self.player_order[len(self.players) * 3 + 1]
+        self.players.append(HeadlessPlayer(color, name or bot.__name__, bot, budget))
+
+    def get_sequence(self, full: bool = False) -> str:
+        """
+        Get the player sequence
+        :param full: If ``True``, the full sequence is returned.
+                     If ``False``, only the part related to the current player is returned
+        :return: The player sequence
+        """
+        return get_sequence(self.player_order, self.turn, full)
+
+    def has_king(self, color: str) -> bool:
+        """
+        :param color: The player's color
+        :return: ``True`` if the player's king is still on the board
+        """
+        return has_king(self.board, color)
+
+    def next(self) -> dict:
+        """
+        Play the current player's turn and pass to the next player
+
+        :return: The record of the turn (player, move in board coordinates, status, duration...)
+        """
+        if self.winner is not None:
+            raise RuntimeError("The game is over")
+        if len(self.players) != len(self.player_order) // 3:
+            raise RuntimeError("Not all players have been added")
+
+        player: HeadlessPlayer = self.players[self.turn]
+        sequence: str = self.get_sequence()
+        view = np.rot90(self.board, int(sequence[2]))
+        record = {"turn": len(self.moves), "player": player.name, "color": player.color, "move": None}
+
+        move, record["time"], record["status"] = self.call_bot(player, sequence, view)
+        if record["status"] == "ok":
+            record.update(self.apply_move(move, view))
+
+        self.moves.append(record)
+        if record["status"] == "ok" and self.check_game_end():
+            return record
+
+        self.turn = next_turn(self.player_order, self.turn, self.board)
+        return record
+
+    def call_bot(self, player: HeadlessPlayer, sequence: str, view: np.ndarray) -> tuple[Optional[Move], float, str]:
+        """
+        Ask a bot for its move, with the arguments given by ``ParallelTurn``
+
+        :param player: The current player
+        :param sequence: The current player's sequence
+        :param view: The board in the player's orientation
+        :return: The move, the time taken, and the status: ``ok``, ``timeout`` if the bot answered
+                 after its budget and the grace period, or ``error`` if it raised an exception
+        """
+        budget: float = player.get_budget()
+        limit: float = budget * (1 + self.GRACE_RATIO)
+        board = np.array([[str(tile) for tile in row] for row in view])
+        self.search_results.append(None)
+
+        alarm = (
+            self.hard_timeout
+            and hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+        if alarm:
+            previous_handler = signal.signal(signal.SIGALRM, self.on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, limit)
+
+        start = time.perf_counter()
+        try:
+            with self.output():
+                self.bot_running = True
+                move = player.func(
+                    sequence,
+                    board,
+                    budget,
+                    tile_width=self.TILE_SIZE,
+                    tile_height=self.TILE_SIZE,
+                    grace_ratio=self.GRACE_RATIO,
+                    player_order=self.get_sequence(True),
+                    on_search_result=self.set_search_result,
+                )
+                self.bot_running = False
+        except BotTimeout:
+            self.log(f"{player.name} took too long, interrupted after {limit:.2f}s")
+            return None, time.perf_counter() - start, "timeout"
+        except Exception as e:
+            self.log(f"{player.name} raised {e!r}")
+            return None, time.perf_counter() - start, "error"
+        finally:
+            self.bot_running = False
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+
+        elapsed = time.perf_counter() - start
+        if elapsed > limit:
+            self.log(f"{player.name} took too long ({elapsed:.2f}s for {budget:.2f}s)")
+            return None, elapsed, "timeout"
+        return move, elapsed, "ok"
+
+    def on_alarm(self, signum, frame):
+        """``SIGALRM`` handler: interrupts the bot if it is still searching"""
+        if self.bot_running:
+            raise BotTimeout()
+
+    def set_search_result(self, result):
+        """Called by bots that report a structured search result (best move, score, PV, statistics)"""
+        self.search_results[-1] = result
+
+    def apply_move(self, move, view: np.ndarray) -> dict:
+        """
+        Try to apply a move chosen by the current player
+
+        :param move: The move, in the player's orientation
+        :param view: The board in the player's orientation
+        :return: The fields of the turn record: ``status`` is ``invalid`` if the move was refused,
+                 otherwise ``move`` holds the move in board coordinates, ``capture`` the captured piece
+                 and ``promotion`` whether a pawn became a queen
+        """
+        with self.output():
+            valid = is_move_playable(self.get_sequence(True), move, view)
+        if not valid:
+            self.log(f"Invalid move {move!r}")
+            return {"status": "invalid"}
+
+        (start, end) = move
+        start, end = (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))
+        start_piece, end_piece, promotion = apply_move(
+            view, (start, end), lambda pawn: BoardPiece("q" + pawn.color)
+        )
+
+        rot = int(self.get_sequence()[2])
+        real_start = rotate_coordinates(view.shape, start, rot)
+        real_end = rotate_coordinates(view.shape, end, rot)
+        self.log(f"{COLOR_NAMES.get(start_piece.color)} moved {start_piece} from {real_start} to {real_end}")
+
+        return {"move": (real_start, real_end), "capture": str(end_piece) or None, "promotion": promotion}
+
+    def check_game_end(self) -> bool:
+        """
+        Check if the current player has won, i.e. no king of another team remains
+
+        :return: ``True`` if the game is over
+        """
+        self.winner = winner(self.player_order, self.turn, self.board)
+        if self.winner is None:
+            return False
+        self.log(f"{COLOR_NAMES.get(self.winner)} player won the match")
+        return True
+
+    def play(self, max_turns: int = MAX_TURNS) -> GameResult:
+        """
+        Play until a player wins or ``max_turns`` turns have been played
+
+        :param max_turns: The number of turns after which the game is a draw
+        :return: The result of the game, ``winner`` is ``None`` for a draw
+        """
+        while self.winner is None and len(self.moves) < max_turns:
+            self.next()
+
+        reason = "max_turns" if self.winner is None else "kings_captured"
+        return GameResult(self.winner, reason, len(self.moves), self.moves)
+
+    @contextlib.contextmanager
+    def output(self):
+        """Context in which prints from bots and rules go to stdout if ``verbose``, and are discarded otherwise"""
+        if self.verbose:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+    def log(self, message: str):
+        if self.verbose:
+            print(message)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play bot vs bot games without display")
+    parser.add_argument("bots", nargs="+", help="Bot of each player, in the board's player order")
+    parser.add_argument("--map", default=DEFAULT_BOARD, help="Board file (.brd or .fen)")
+    parser.add_argument("--budget", type=float, default=1.0, help="Time budget per move, in seconds")
+    parser.add_argument("--games", type=int, default=1, help="Number of games to play")
+    parser.add_argument("--max-turns", type=int, default=HeadlessGame.MAX_TURNS, help="Turns after which a game is a draw")
+    parser.add_argument("--verbose", action="store_true", help="Print the moves and the bots' output")
+    args = parser.parse_args()
+
+    for index in range(args.games):
+        game = HeadlessGame(args.map, verbose=args.verbose)
+        for bot in args.bots:
+            game.add_player(bot, args.budget)
+        t0 = time.perf_counter()
+        result = game.play(args.max_turns)
+        winner = "draw" if result.winner is None else COLOR_NAMES.get(result.winner, result.winner)
+        print(f"Game {index + 1}: {winner} after {result.turns} turns ({result.reason}, {time.perf_counter() - t0:.1f}s)")
@@ -3,12 +3,16 @@ from PyQt6 import QtCore
 
 
 class ParallelTurn(QtCore.QThread):
-    """ Thread wrapper """
+    """ Thread waiting for the move of a bot playing in its worker process (BotProcess.BotWorker) """
 
-    def __init__(self, ai_func, player_sequence, board, time_budget, tile_width, tile_height):
+    # Emitted when the worker is ready and the board is sent: the turn's time budget starts
+    ready = QtCore.pyqtSignal()
+
+    def __init__(self, worker, player_sequence, board, time_budget, tile_width, tile_height, grace_ratio=0.0,
+                 player_order=None):
         super().__init__()
 
-        self.ai_func = ai_func
+        self.worker = worker
         self.board = board
         self.player_sequence = player_sequence
         self.time_budget = time_budget
@@ -19,14 +23,27 @@ class ParallelTurn(QtCore.QThread):
 
         self.tile_width = tile_width
         self.tile_height = tile_height
+        self.grace_ratio = grace_ratio
+        self.player_order = player_order
 
         self.next_move = ((0,0), (0,0))
+        self.search_result = None
 
     def run(self):
-        self.next_move = self.ai_func(self.player_sequence,
-                            np.copy(self.board),
-                            self.time_budget,
-                            tile_width=self.tile_width,
-                            tile_height=self.tile_height)
-        
-
+        ready = False
+        try:
+            self.worker.wait_ready()
+            ready = True
+            self.ready.emit()
+            self.next_move, self.search_result = self.worker.play(self.player_sequence,
+                                                                  np.array(self.board),
+                                                                  self.time_budget,
+                                                                  tile_width=self.tile_width,
+                                                                  tile_height=self.tile_height,
+                                                                  grace_ratio=self.grace_ratio,
+                                                                  player_order=self.player_order)
+        except (EOFError, OSError):
+            # Worker killed at the end of the time budget, or crashed: no move
+            if not ready:
+                # Crashed before being ready: the timers still have to start for the turn to end
+                self.ready.emit()
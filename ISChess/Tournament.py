@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from typing import Optional
+
+from BoardReader import BOARD_DIRECTORY, read_board
+from HeadlessGame import HeadlessGame, load_bots
+
+ELO_CONFIDENCE = 1.96  # 95% confidence interval of a normal distribution
+DEFAULT_BUDGET = 1.0
+DEFAULT_MAX_TURNS = 200
+
+# Set in each worker process by init_worker: games not started yet are skipped once it is set
+STOP_EVENT = None
+
+
+def list_maps(directory: str = BOARD_DIRECTORY) -> list[str]:
+    """
+    List the board files on which two teams play
+
+    :param directory: The directory of the board files
+    :return: The paths of the .brd and .fen files, sorted by name
+    """
+    maps = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.splitext(name)[1] not in (".brd", ".fen"):
+            continue
+        loaded = read_board(path)
+        if loaded is not None and len(get_teams(loaded[0].strip())) == 2:
+            maps.append(path)
+    return maps
+
+
+def get_teams(player_order: str) -> list[str]:
+    """
+    :param player_order: The player order of a board
+    :return: The teams of the board, in order of first appearance
+    """
+    teams = []
+    for team in player_order[::3]:
+        if team not in teams:
+            teams.append(team)
+    return teams
+
+
+def schedule(bots: list[str], maps: list[str], mode: str = "round-robin", rounds: int = 1) -> list[dict]:
+    """
+    Build the list of games of a tournament
+
+    Every pairing plays every map twice per round, once from each side. In ``gauntlet`` mode,
+    only the first bot's pairings are played.
+    :param bots: The bot names
+    :param maps: The board files
+    :param mode: ``round-robin`` or ``gauntlet``
+    :param rounds: The number of times each game is played
+    :return: The games, as dictionaries with the game number, the map and the bot of each team side
+    """
+    if mode == "gauntlet":
+        pairings = [(bots[0], opponent) for opponent in bots[1:]]
+    else:
+        pairings = list(itertools.combinations(bots, 2))
+
+    games = []
+    for round_index in range(rounds):
+        for path in maps:
+            for first, second in pairings:
+                for sides in ((first, second), (second, first)):
+                    games.append({"game": len(games), "round": round_index, "map": path, "sides": list(sides)})
+    return games
+
+
+def play_game(game: dict, budget: float, max_turns: int) -> dict:
+    """
+    Play one scheduled game, in a worker process
+
+    The bots of ``sides`` play the first and second teams of the board's player order.
+    Bots are interrupted when they exceed their budget and the grace period.
+    :param game: The game, as built by ``schedule``
+    :param budget: The time budget of each move, in seconds
+    :param max_turns: The number of turns after which the game is a draw
+    :return: The game with its result: the winning bot (``None`` for a draw), the reason,
+             the number of turns, and the timeouts, invalid moves and errors of each bot
+    """
+    start = time.perf_counter()
+    headless = HeadlessGame(game["map"], hard_timeout=True)
+    teams = get_teams(headless.player_order)
+    bot_of_team = dict(zip(teams, game["sides"]))
+    for i in range(0, len(headless.player_order), 3):
+        headless.add_player(bot_of_team[headless.player_order[i]], budget)
+
+    result = headless.play(max_turns)
+    record = dict(game)
+    record["winner"] = None
+    if result.winner is not None:
+        record["winner"] = next(player.name for player in headless.players if player.color == result.winner)
+    record["reason"] = result.reason
+    record["turns"] = result.turns
+    for status in ("timeout", "invalid", "error"):
+        record[status] = {bot: 0 for bot in game["sides"]}
+        for move in result.moves:
+            if move["status"] == status:
+                record[status][move["player"]] += 1
+    record["duration"] = time.perf_counter() - start
+    return record
+
+
+def init_worker(stop_event):
+    """
+    Initialize a worker process of the tournament pool
+    :param stop_event: The event set when the remaining games must be skipped
+    """
+    global STOP_EVENT
+    STOP_EVENT = stop_event
+
+
+def play_scheduled_game(task: tuple[dict, float, int]) -> Optional[dict]:
+    """
+    Play a game of the tournament pool with ``play_game``, unless the tournament was stopped
+    :param task: The game, the time budget of each move and the maximal number of turns
+    :return: The played game, ``None`` if it was skipped
+    """
+    if STOP_EVENT is not None and STOP_EVENT.is_set():
+        return None
+    return play_game(*task)
+
+
+def game_score(record: dict, bot: str) -> Optional[float]:
+    """
+    :param record: A played game
+    :param bot: A bot name
+    :return: The bot's score in the game (1 for a win, 0.5 for a draw, 0 for a loss), ``None`` if it did not play
+    """
+    if bot not in record["sides"]:
+        return None
+    if record["winner"] is None:
+        return 0.5
+    return 1.0 if record["winner"] == bot else 0.0
+
+
+def count_results(records: list[dict], bot: str, opponent: Optional[str] = None) -> tuple[int, int, int]:
+    """
+    Count the wins, draws and losses of a bot
+
+    :param records: The played games
+    :param bot: The bot name
+    :param opponent: If given, only the games against this opponent are counted
+    :return: The number of wins, draws and losses
+    """
+    wins = draws = losses = 0
+    for record in records:
+        if opponent is not None and opponent not in record["sides"]:
+            continue
+        score = game_score(record, bot)
+        if score == 1.0:
+            wins += 1
+        elif score == 0.5:
+            draws += 1
+        elif score == 0.0:
+            losses += 1
+    return wins, draws, losses
+
+
+def score_statistics(wins: int, draws: int, losses: int) -> tuple[int, float, float]:
+    """
+    :return: The number of games, the mean score and the variance of the score of one game
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0, 0.5, 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return games, score, variance
+
+
+def elo_from_score(score: float) -> float:
+    """
+    :param score: An expected score, between 0 and 1
+    :return: The Elo difference corresponding to the score, infinite for 0 and 1
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo: float) -> float:
+    """
+    :param elo: An Elo difference
+    :return: The expected score of the stronger side
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_interval(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """
+    Estimate an Elo difference from game results
+
+    :return: The Elo difference and the half-width of its 95% confidence interval
+    """
+    games, score, variance = score_statistics(wins, draws, losses)
+    if games == 0:
+        return 0.0, math.inf
+    margin = ELO_CONFIDENCE * math.sqrt(variance / games)
+    low = elo_from_score(max(score - margin, 0.0))
+    high = elo_from_score(min(score + margin, 1.0))
+    return elo_from_score(score), (high - low) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Log-likelihood ratio of the hypotheses "the Elo difference is elo1" against "it is elo0",
+    with the normal approximation of the trinomial game results (GSPRT)
+
+    :return: The log-likelihood ratio, 0 while the results do not vary
+    """
+    games, score, variance = score_statistics(wins, draws, losses)
+    if games == 0 or variance == 0:
+        return 0.0
+    score0, score1 = score_from_elo(elo0), score_from_elo(elo1)
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple[float, float]:
+    """
+    :param alpha: The probability of accepting elo1 when elo0 is true
+    :param beta: The probability of accepting elo0 when elo1 is true
+    :return: The lower and upper bounds of the log-likelihood ratio
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_status(records: list[dict], bot: str, elo0: float, elo1: float, alpha: float, beta: float) -> tuple[float, Optional[str]]:
+    """
+    :return: The log-likelihood ratio of the bot's games and the accepted hypothesis: ``H0``, ``H1`` or ``None`` to continue
+    """
+    llr = sprt_llr(*count_results(records, bot), elo0, elo1)
+    lower, upper = sprt_bounds(alpha, beta)
+    if llr <= lower:
+        return llr, "H0"
+    if llr >= upper:
+        return llr, "H1"
+    return llr, None
+
+
+def format_elo(elo: float, margin: float) -> str:
+    if math.isinf(elo):
+        return "+inf" if elo > 0 else "-inf"
+    if math.isinf(margin) or math.isnan(margin):
+        return f"{elo:+.0f} +/- inf"
+    return f"{elo:+.0f} +/- {margin:.0f}"
+
+
+def report(records: list[dict], bots: list[str]) -> str:
+    """
+    Summarize the results of a tournament
+
+    :param records: The played games
+    :param bots: The bot names, in the order of the tournament
+    :return: For each bot, its results and Elo against the field, then the results of each pairing
+    """
+    lines = [f"{'bot':<20} {'games':>6} {'W':>5} {'D':>5} {'L':>5} {'score':>6}  Elo vs field"]
+    for bot in bots:
+        wins, draws, losses = count_results(records, bot)
+        games, score, _ = score_statistics(wins, draws, losses)
+        if games == 0:
+            continue
+        lines.append(
+            f"{bot:<20} {games:>6} {wins:>5} {draws:>5} {losses:>5} {score:>6.3f}  "
+            f"{format_elo(*elo_interval(wins, draws, losses))}"
+        )
+
+    lines.append("")
+    for bot, opponent in itertools.combinations(bots, 2):
+        wins, draws, losses = count_results(records, bot, opponent)
+        if wins + draws + losses == 0:
+            continue
+        lines.append(
+            f"{bot} vs {opponent}: +{wins} ={draws} -{losses}  "
+            f"Elo {format_elo(*elo_interval(wins, draws, losses))}"
+        )
+    return "\n".join(lines)
+
+
+def run_tournament(bots: list[str], maps: list[str], output: str, mode: str = "round-robin", rounds: int = 1,
+                   budget: float = DEFAULT_BUDGET, max_turns: int = DEFAULT_MAX_TURNS, workers: Optional[int] = None,
+                   sprt: Optional[tuple[float, float]] = None, alpha: float = 0.05, beta: float = 0.05) -> list[dict]:
+    """
+    Play a tournament on a process pool, one game per worker at a time
+
+    Each game is written to ``output`` as a JSON line as soon as it finishes. Every game
+    runs in a new spawned process, so that bots start each game with fresh globals. When the SPRT
+    accepts a hypothesis, the games not started yet are skipped and the running ones
+    are still recorded.
+    :param bots: The bot names, registered in ``CHESS_BOT_LIST``
+    :param maps: The board files
+    :param output: The path of the JSONL result file
+    :param mode: ``round-robin`` or ``gauntlet`` (the first bot against each other)
+    :param rounds: The number of times each game is played
+    :param budget: The time budget of each move, in seconds
+    :param max_turns: The number of turns after which a game is a draw
+    :param workers: The number of processes, the number of CPUs by default
+    :param sprt: If given, the (elo0, elo1) hypotheses of an SPRT on the first bot's games.
+                 The tournament stops as soon as one of them is accepted
+    :param alpha: The SPRT probability of accepting elo1 when elo0 is true
+    :param beta: The SPRT probability of accepting elo0 when elo1 is true
+    :return: The played games
+    """
+    registered = load_bots()
+    for bot in bots:
+        if bot not in registered:
+            raise ValueError(f"Unknown bot '{bot}', available bots: {', '.join(registered)}")
+    if len(bots) < 2 or len(set(bots)) != len(bots):
+        raise ValueError("A tournament needs at least two different bots")
+
+    games = schedule(bots, maps, mode, rounds)
+    records = []
+    accepted = None
+    print(f"{len(games)} games of {', '.join(bots)} on {len(maps)} map(s), {budget}s per move")
+
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    tasks = [(game, budget, max_turns) for game in games]
+    with context.Pool(workers, initializer=init_worker, initargs=(stop_event,), maxtasksperchild=1) as pool, \
+            open(output, "w") as results:
+        for record in pool.imap_unordered(play_scheduled_game, tasks):
+            if record is None:
+                continue
+            records.append(record)
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+
+            winner = record["winner"] or "draw"
+            print(
+                f"[{len(records)}/{len(games)}] {os.path.basename(record['map'])} "
+                f"{record['sides'][0]} - {record['sides'][1]}: {winner} ({record['reason']}, {record['turns']} turns)"
+            )
+
+            if sprt is not None and accepted is None:
+                llr, accepted = sprt_status(records, bots[0], *sprt, alpha, beta)
+                if accepted is not None:
+                    lower, upper = sprt_bounds(alpha, beta)
+                    print(f"SPRT: {accepted} accepted (LLR {llr:.2f}, bounds [{lower:.2f}, {upper:.2f}])")
+                    stop_event.set()
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a bot tournament on all maps with a process pool")
+    parser.add_argument("bots", nargs="+", help="Bot names from CHESS_BOT_LIST; in gauntlet mode the first bot plays all others")
+    parser.add_argument("--mode", choices=("round-robin", "gauntlet"), default="round-robin", help="Pairings to play")
+    parser.add_argument("--maps", nargs="*", help="Board files, all two-team maps of Data/maps by default")
+    parser.add_argument("--rounds", type=int, default=1, help="Number of times each game is played")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Time budget per move, in seconds")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS, help="Turns after which a game is a draw")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes, one per CPU by default")
+    parser.add_argument("--output", default="tournament.jsonl", help="JSONL file receiving one line per finished game")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="Stop when an SPRT on the first bot's games accepts ELO0 or ELO1")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT false negative rate")
+    args = parser.parse_args()
+
+    records = run_tournament(
+        args.bots,
+        args.maps or list_maps(),
+        args.output,
+        mode=args.mode,
+        rounds=args.rounds,
+        budget=args.budget,
+        max_turns=args.max_turns,
+        workers=args.workers,
+        sprt=tuple(args.sprt) if args.sprt else None,
+        alpha=args.alpha,
+        beta=args.beta,
+    )
+    print()
+    print(report(records, args.bots))
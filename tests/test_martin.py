@@ -1,9 +1,30 @@
 import sys
 import os
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import numpy as np
 
 # Ajoute le chemin vers ISChess
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ISChess'))
 
+import Bots.Martin as martin
+import Bots.Martin_Board as martin_board
+import Bots.Martin_Time as martin_time
+import Bots.Martin_Book as martin_book
+import Bots.Martin_Tablebase as martin_tablebase
+import Bots.Martin_Perft as martin_perft
+import Bots.Martin_Bitboard as bitboard
+import HeadlessGame as headless_game
+import Tournament as tournament
+import BotProcess as bot_process
+import GameRules as game_rules
+from BoardReader import read_board
+from Bots.ChessBotList import SETUP_LIST
 from Bots.Martin import chess_bot
 
 
@@ -124,4 +145,735 @@ def test_bot_source_has_piece():
     # La position source doit contenir une pièce
     piece = board[src[1]][src[0]]  # Attention: board[y][x]
     assert piece != '', f"Aucune pièce à la position source {src}"
-    assert piece.endswith('w'), f"La pièce source doit être blanche, trouvé: {piece}"
\ No newline at end of file
+    assert piece.endswith('w'), f"La pièce source doit être blanche, trouvé: {piece}"
+
+#=================================================================================================
+# Tests sur les plateaux de Data/maps, dans le format passé par ParallelTurn (numpy, 'pw', 'kb', ...)
+
+MAPS_DIR = os.path.join(os.path.dirname(__file__), '..', 'ISChess', 'Data', 'maps')
+
+
+def load_map(name):
+    """Charge un plateau .brd et retourne (séquence du premier joueur, plateau numpy)"""
+    order, board = read_board(os.path.join(MAPS_DIR, name))
+    return order[:3], board
+
+
+def test_iterative_deepening_completes_iterations():
+    """Test que l'iterative deepening termine au moins une itération et retourne une pièce alliée"""
+    sequence, board = load_map('default.brd')
+
+    src, dst = martin.chess_bot(sequence, board, 0.5)
+
+    assert martin.METRICS["completed_depth"] >= 1
+    assert board[src[0], src[1]].endswith('w')
+    assert src != dst
+
+
+def test_iterative_deepening_tight_budget_returns_legal_move():
+    """Test qu'un budget trop court pour finir une itération retourne quand même un coup légal"""
+    sequence, board = load_map('default.brd')
+
+    src, dst = martin.chess_bot(sequence, board, 0.0)
+
+    assert board[src[0], src[1]].endswith('w')
+    assert board[dst[0], dst[1]] == ''
+
+
+def square(x, y, cols=8):
+    """Case du plateau compact correspondant aux coordonnées (x, y)"""
+    return martin_board.to_square(x, y, cols)
+
+
+def test_compact_board_round_trip_with_walls():
+    """Test la conversion du plateau de chaînes en plateau compact, murs et bordure compris"""
+    _, board = load_map('cross.brd')
+    rows, cols = board.shape
+
+    cells = martin_board.encode_board(board)
+
+    assert len(cells) == martin_board.mailbox_size(rows, cols)
+    assert martin_board.decode_board(cells, rows, cols) == board.tolist()
+    assert cells[square(0, 0, cols)] == martin_board.OFFBOARD  # Mur 'XX'
+    assert cells[square(0, 0, cols) - 1] == martin_board.OFFBOARD  # Bordure
+    assert martin_board.decode_piece(cells[square(0, 1, cols)]) == board[0, 1]
+    assert martin_board.to_coords(square(4, 6, cols), cols) == (4, 6)
+
+
+def test_zobrist_hash_is_incremental():
+    """Test que le hash mis à jour par coup est identique au hash recalculé sur le plateau complet"""
+    _, board = load_map('default.brd')
+    martin.reset_metrics()
+    root = martin.create_board(board)
+
+    moves = martin.possible_mov(square(0, 1), root) + martin.possible_mov(square(1, 3), root)
+
+    assert moves
+    for move in moves:
+        undo = martin.make_move(root, move)
+        assert root.hash == martin.compute_hash(root.data) ^ martin.ZOBRIST_SIDE
+        martin.unmake_move(root, undo)
+
+
+def test_make_unmake_restores_capture_and_promotion():
+    """Test que unmake_move restaure la pièce capturée et annule la promotion"""
+    board = np.array([['' for _ in range(4)] for _ in range(4)], dtype='O')
+    board[0, 0] = 'kw'
+    board[3, 3] = 'kb'
+    board[2, 1] = 'pw'
+    board[3, 2] = 'rb'
+    martin.PERSPECTIVE_COLOR = martin_board.WHITE
+    martin.reset_metrics()
+    root = martin.create_board(board)
+    snapshot = root.data[:]
+
+    undo = martin.make_move(root, (square(2, 1, 4), square(3, 2, 4)))
+
+    assert martin_board.decode_piece(root.data[square(3, 2, 4)]) == 'qw'
+    assert root.data[square(2, 1, 4)] == martin_board.EMPTY
+    martin.unmake_move(root, undo)
+    assert root.data == snapshot
+    assert root.hash == martin.compute_hash(snapshot)
+
+
+def test_transposition_table_is_bounded():
+    """Test que la table de transposition garde une taille fixe et préfère les entrées profondes"""
+    table = martin.TranspositionTable(4)
+
+    table.store(0x10, 5, 42, martin.TT_EXACT, (square(0, 0), square(1, 0)))
+    table.store(0x20, 1, 7, martin.TT_LOWER, None)  # Même index, moins profond : ignorée
+    for key in range(1000):
+        table.store(key << 8, 0, 0, martin.TT_UPPER, None)
+
+    assert len(table.entries) == 16
+    assert table.probe(0x10)[2] == 42
+    assert table.probe(0x20) is None
+
+    # Une entrée d'un coup précédent reste lisible mais n'est plus protégée par sa profondeur
+    table.new_search()
+    assert table.probe(0x10)[2] == 42
+    table.store(0x20, 1, 7, martin.TT_LOWER, None)
+    assert table.probe(0x20)[2] == 7
+
+
+def test_generate_moves_yields_captures_first_lazily():
+    """Test que le générateur produit d'abord les captures, sans vérifier les coups calmes à l'avance"""
+    board = np.array([['' for _ in range(8)] for _ in range(8)], dtype='O')
+    board[0, 4] = 'kw'
+    board[7, 4] = 'kb'
+    board[0, 0] = 'rw'
+    board[1, 1] = 'pw'
+    board[5, 0] = 'nb'
+    martin.PERSPECTIVE_COLOR = martin_board.WHITE
+    martin.reset_metrics()
+
+    moves = martin.generate_moves(martin.create_board(board), martin_board.WHITE)
+    first_move = next(moves)
+
+    assert first_move == (square(0, 0), square(5, 0))
+    assert martin.METRICS["moves_legal"] == 1
+    assert len(list(moves)) > 1
+
+
+def test_move_ordering_hash_move_then_mvv_lva_then_killers():
+    """Test l'ordre des coups : hash move, captures MVV-LVA, killers puis coups calmes"""
+    board = np.array([['' for _ in range(8)] for _ in range(8)], dtype='O')
+    board[0, 4] = 'kw'
+    board[7, 7] = 'kb'
+    board[3, 3] = 'rw'
+    board[3, 6] = 'pb'
+    board[6, 3] = 'qb'
+    martin.PERSPECTIVE_COLOR = martin_board.WHITE
+    martin.reset_metrics()
+    martin.reset_move_ordering()
+    martin.KILLER_MOVES[2][0] = (square(0, 4), square(1, 4))
+    root = martin.create_board(board)
+
+    moves = list(martin.generate_moves(root, martin_board.WHITE, (square(3, 3), square(2, 3)), 2))
+
+    assert moves[:4] == [(square(3, 3), square(2, 3)), (square(3, 3), square(6, 3)),
+                         (square(3, 3), square(3, 6)), (square(0, 4), square(1, 4))]
+    assert len(moves) == len(set(moves))
+
+
+def test_search_state_persists_across_moves_of_a_game():
+    """Test que la table de transposition est conservée entre deux coups d'une partie et effacée pour une nouvelle partie"""
+    sequence, board = load_map('default.brd')
+    martin.SEARCH_STATES.clear()
+    start = board.copy()
+    board[6, 0] = ''
+
+    martin.chess_bot(sequence, board, 0.2)
+    table = martin.TRANSPOSITION_TABLE
+    assert any(entry is not None for entry in table.entries)
+
+    board[1, 4], board[3, 4] = '', 'pw'
+    martin.chess_bot(sequence, board, 0.2)
+    assert martin.TRANSPOSITION_TABLE is table
+    assert table.generation == 1
+
+    # Plus de pièces qu'au coup précédent : nouvelle partie
+    martin.chess_bot(sequence, start, 0.2)
+    assert martin.TRANSPOSITION_TABLE is table
+    assert table.generation == 0
+
+
+def test_ponder_hit_reuses_background_search():
+    """Test que la réflexion sur le temps adverse est reprise quand l'adversaire joue le coup prédit"""
+    sequence, board = load_map('default.brd')
+    martin.SEARCH_STATES.clear()
+    (sx, sy), (dx, dy) = martin.chess_bot(sequence, board, 0.3)
+    board[dx, dy], board[sx, sy] = board[sx, sy], ''
+    table = martin.TRANSPOSITION_TABLE
+    generation = table.generation
+
+    stopped = threading.Event()
+    stopped.set()
+    martin.ponder(sequence, board, 5.0, stopped)
+    assert martin.PONDER_RESULT is None
+
+    predicted = martin.ponder(sequence, board, 0.3, threading.Event())
+    assert predicted is not None
+    assert martin.PONDER_RESULT[2] >= 1
+    (px, py), (qx, qy) = predicted
+    board[qx, qy], board[px, py] = board[px, py], ''
+
+    assert table.generation == generation
+
+    # Les réflexions ne vieillissent pas l'état : une seule nouvelle génération pour le coup joué
+    martin.chess_bot(sequence, board, 0.3)
+    assert martin.METRICS["ponder_hit"] == 1
+    assert martin.TRANSPOSITION_TABLE is table
+    assert table.generation == generation + 1
+
+
+def test_parallel_root_search_reuses_process_pool():
+    """Test que la recherche parallèle à la racine joue un coup légal dans son budget dès le premier tour et garde le même pool"""
+    sequence, board = load_map('default.brd')
+    parallel_search, parallel_workers = martin.PARALLEL_SEARCH, martin.PARALLEL_WORKERS
+    martin.PARALLEL_SEARCH, martin.PARALLEL_WORKERS = True, 2
+    try:
+        martin.SEARCH_STATES.clear()
+        # Comme le processus du bot avant d'annoncer qu'il est prêt (BotProcess)
+        SETUP_LIST[chess_bot]()
+        start = time.perf_counter()
+        (sx, sy), (dx, dy) = martin.chess_bot(sequence, board, 1.0)
+        assert time.perf_counter() - start < 1.0
+        assert board[sx, sy][1] == sequence[1]
+        assert martin.METRICS["parallel_iterations"] >= 1
+        assert martin.METRICS["parallel_speedup"] > 0
+        assert 0 <= martin.METRICS["search_overhead"] <= 1
+
+        pool = martin.PROCESS_POOL
+        martin.chess_bot(sequence, board, 1.0)
+        assert martin.PROCESS_POOL is pool
+    finally:
+        martin.close_process_pool()
+        martin.PARALLEL_SEARCH, martin.PARALLEL_WORKERS = parallel_search, parallel_workers
+
+
+def test_shared_table_rejects_torn_entries():
+    """Test que la table partagée relit ses entrées et ignore une entrée dont un mot a été écrasé"""
+    table = martin.SharedTranspositionTable(4)
+    try:
+        table.new_search()
+        table.store(12345, 3, -1.5, martin.TT_LOWER, (40, 52))
+        assert table.probe(12345) == (12345, 3, -1.5, martin.TT_LOWER, (40, 52), 1)
+        assert table.probe(12345 + 16) is None
+
+        # Écriture concurrente simulée : le score d'une autre entrée remplace celui-ci
+        offset = (12345 & table.mask) * table.SLOT.size
+        check, _, data = table.SLOT.unpack_from(table.buffer, offset)
+        table.SLOT.pack_into(table.buffer, offset, check, table.BITS.unpack(table.SCORE.pack(7.0))[0], data)
+        assert table.probe(12345) is None
+    finally:
+        table.close()
+        table.memory.unlink()
+
+
+def test_lazy_smp_search_plays_legal_move():
+    """Test que la recherche Lazy SMP joue un coup légal dans son budget dès le premier tour et compte les nœuds des autres processus"""
+    sequence, board = load_map('default.brd')
+    lazy_smp, parallel_workers = martin.LAZY_SMP, martin.PARALLEL_WORKERS
+    martin.LAZY_SMP, martin.PARALLEL_WORKERS = True, 2
+    try:
+        SETUP_LIST[chess_bot]()
+        assert martin.SHARED_TABLE is not None
+        start = time.perf_counter()
+        (sx, sy), (dx, dy) = martin.chess_bot(sequence, board, 1.0)
+        assert time.perf_counter() - start < 1.0
+        assert board[sx, sy][1] == sequence[1]
+        assert martin.METRICS["smp_workers"] == 2
+        assert martin.METRICS["smp_nodes"] > 0
+    finally:
+        martin.close_process_pool()
+        martin.close_shared_table()
+        martin.LAZY_SMP, martin.PARALLEL_WORKERS = lazy_smp, parallel_workers
+    assert martin.SHARED_TABLE is None
+
+
+def test_search_result_reports_pv_and_statistics():
+    """Test que chess_bot transmet un résultat structuré cohérent avec le coup retourné"""
+    sequence, board = load_map('default.brd')
+    results = []
+    move = martin.chess_bot(sequence, board, 0.5, on_search_result=results.append)
+
+    assert len(results) == 1
+    result = results[0]
+    assert result.best_move == move
+    assert result.pv[0] == move
+    assert 1 <= len(result.pv) <= result.depth
+    assert result.nodes > 0 and result.nps > 0
+    assert 0 <= result.tt_hit_rate <= 1
+    assert [depth for depth, _ in result.iteration_times][-1] == result.depth
+
+
+def test_time_manager_predicts_iterations_and_respects_grace():
+    """Test que le gestionnaire de temps reste sous le délai de GameManager et refuse une itération trop longue"""
+    manager = martin_time.allocate_time(1.0, 0.05)
+    assert manager.soft_limit < manager.hard_limit < 1.05
+
+    manager.record_iteration(0.01)
+    manager.record_iteration(0.04)
+    assert abs(manager.predict_next_iteration() - 0.16) < 1e-9
+    assert manager.can_start_iteration(beyond_target=False)
+    manager.record_iteration(0.6)
+    assert not manager.can_start_iteration(beyond_target=False)
+
+    stopped = threading.Event()
+    stopped.set()
+    manager = martin_time.TimeManager(10, stop_event=stopped)
+    assert manager.out_of_time()
+
+    # L'horloge n'est relue que tous les CLOCK_CHECK_INTERVAL nœuds
+    manager = martin_time.TimeManager(10)
+    assert not manager.out_of_time()
+    manager.hard_limit = 0
+    assert not any(manager.out_of_time() for _ in range(martin_time.CLOCK_CHECK_INTERVAL - 1))
+    assert manager.out_of_time()
+
+
+def prepare_search_board(board, color):
+    """Initialise l'état global du bot comme chess_bot le fait avant une recherche"""
+    martin.PERSPECTIVE_COLOR = martin_board.color_index(color)
+    martin.TIME_MANAGER = martin.TimeManager(10)
+    martin.SEARCH_ABORTED = False
+    martin.reset_metrics()
+    martin.reset_move_ordering()
+    return martin.create_board(board)
+
+
+def test_quiescence_avoids_defended_capture():
+    """Test que la quiescence refuse une capture perdante et prend une capture gratuite"""
+    white = martin_board.WHITE
+    board = np.array([['' for _ in range(8)] for _ in range(8)], dtype='O')
+    board[0, 0] = 'kw'
+    board[7, 7] = 'kb'
+    board[3, 3] = 'rw'
+    board[5, 3] = 'pb'
+    board[6, 4] = 'pb'  # Défend le pion en (5, 3)
+    root = prepare_search_board(board, 'w')
+    stand_pat = martin.board_evaluation(root, white)
+
+    assert martin.quiescence(root, white, white, -999999, 999999, 0) == stand_pat
+
+    root.data[square(6, 4)] = martin_board.EMPTY
+    root.state = martin.EvalState(root.data)
+    stand_pat = martin.board_evaluation(root, white)
+    assert martin.quiescence(root, white, white, -999999, 999999, 0) > stand_pat
+
+
+def test_aspiration_search_matches_full_window():
+    """Test que la fenêtre d'aspiration retrouve le score de la fenêtre complète, même centrée trop loin"""
+    _, board = load_map('default.brd')
+    root = prepare_search_board(board, 'w')
+    white = martin_board.WHITE
+    martin.ROOT_DEPTH = 3
+    martin.TRANSPOSITION_TABLE = martin.TranspositionTable(16)
+    martin.DELTA_MARGIN, delta_margin = 999999, martin.DELTA_MARGIN
+    try:
+        full_score = martin.negamax(3, root, white, white, -999999, 999999)[0]
+
+        martin.TRANSPOSITION_TABLE.clear()
+        score, move = martin.aspiration_search(root, white, 3, full_score + 10)
+        assert abs(score - full_score) < 1e-9
+        assert move is not None
+        assert martin.METRICS["aspiration_fail_low"] >= 1
+    finally:
+        martin.DELTA_MARGIN = delta_margin
+
+
+def test_selective_search_keeps_tactics_and_skips_zugzwang_endgames():
+    """Test que la recherche sélective trouve encore une prise gratuite et ne passe pas son tour avec rois et pions"""
+    white = martin_board.WHITE
+    board = np.array([['' for _ in range(8)] for _ in range(8)], dtype='O')
+    board[0, 0] = 'kw'
+    board[7, 7] = 'kb'
+    board[0, 3] = 'rw'
+    board[6, 3] = 'qb'
+    for y in range(8):
+        board[1, y] = board[1, y] or 'pw'
+        board[6, y] = board[6, y] or 'pb'
+    board[1, 3] = ''
+    root = prepare_search_board(board, 'w')
+    martin.TRANSPOSITION_TABLE = martin.TranspositionTable(16)
+    assert martin.has_non_pawn_material(root, white)
+
+    martin.ROOT_DEPTH = 4
+    score, move = martin.negamax(4, root, white, white, -999999, 999999)
+    assert move == (square(0, 3), square(6, 3))
+    assert martin.METRICS["null_move_tries"] > 0
+    assert martin.METRICS["lmr_reductions"] > 0
+
+    board[0, 3] = ''
+    board[6, 3] = ''
+    root = prepare_search_board(board, 'w')
+    assert not martin.has_non_pawn_material(root, white)
+    martin.negamax(4, root, white, white, -999999, 999999)
+    assert martin.METRICS["null_move_tries"] == 0
+
+
+def test_eval_state_is_restored_by_unmake():
+    """Test que l'état d'évaluation incrémental reste identique à un état recalculé après make / unmake"""
+    _, board = load_map('default.brd')
+    root = prepare_search_board(board, 'w')
+    fresh = martin.EvalState(root.data)
+
+    undo = martin.make_move(root, (square(1, 3), square(2, 3)))
+    after_move = martin.EvalState(root.data)
+    assert root.state.material == after_move.material
+    assert root.state.center_control(root.data) == after_move.center_control(root.data)
+
+    martin.unmake_move(root, undo)
+    assert root.state.material == fresh.material
+    assert root.state.piece_count == fresh.piece_count
+    assert root.state.kings == fresh.kings
+    assert root.state.center_control(root.data) == fresh.center_control(root.data)
+
+
+def test_check_detection_by_reverse_lookup_on_cross_map():
+    """Test la détection d'échec depuis la case du roi, avec les murs de cross.brd qui bloquent et ne se capturent pas"""
+    white, black = martin_board.WHITE, martin_board.BLACK
+    _, board = load_map('cross.brd')
+    cols = board.shape[1]
+    board[:] = ''
+    board[0, 0] = board[0, 6] = board[4, 0] = board[4, 6] = 'XX'
+    board[2, 3] = 'kw'
+    board[4, 3] = 'kb'
+    board[2, 0] = 'rb'
+    root = prepare_search_board(board, 'w')
+
+    assert root.state.kings == {white: square(2, 3, cols), black: square(4, 3, cols)}
+    assert martin.is_king_in_check(root.data, white, root.state.kings[white])
+    assert martin.find_king_capture(root, black, white) == (square(2, 0, cols), square(2, 3, cols))
+
+    # Le cavalier noir bloque la tour et ne peut pas sauter sur les murs
+    root.data[square(2, 1, cols)] = martin_board.make_piece(martin_board.KNIGHT, black)
+    root.state = martin.EvalState(root.data)
+    assert not martin.is_king_in_check(root.data, white, root.state.kings[white])
+    targets = martin.knight_moves(square(2, 1, cols), root.data, black)
+    assert square(0, 2, cols) in targets
+    assert square(0, 0, cols) not in targets and square(4, 0, cols) not in targets
+
+
+def test_multiplayer_search_uses_teams_and_turn_order_on_cross_map():
+    """Test que l'ordre complet des joueurs de cross.brd donne les équipes, l'ordre des tours et le sens des pions"""
+    order = '0b01y10w21r3'
+    black, white, yellow, red = (martin_board.color_index(letter) for letter in 'bwyr')
+    _, board = load_map('cross.brd')
+    cols = board.shape[1]
+    width = martin_board.mailbox_width(cols)
+    try:
+        martin.init_players(order, *board.shape)
+        assert martin.MULTIPLAYER
+        assert [martin.NEXT_COLOR[color] for color in (black, yellow, white, red)] == [yellow, white, red, black]
+        assert martin.SIDE_OF[black] == martin.SIDE_OF[white] == 0 and martin.SIDE_OF[yellow] == martin.SIDE_OF[red] == 1
+
+        # Dans l'orientation de b : les pions de w remontent, ceux de y vont vers la gauche et ceux de r vers la droite
+        assert [martin.pawn_step(color) for color in (black, white, yellow, red)] == [width, -width, -1, 1]
+        assert square(2, 0, cols) in martin.PROMOTION_SQUARES[yellow]
+        # Promotion d'un pion de côté sur sa colonne de bord, pas sur la première ou la dernière rangée
+        assert martin.is_promotion(yellow, square(2, 0, cols)) and not martin.is_promotion(yellow, square(0, 3, cols))
+        assert martin.is_promotion(black, square(board.shape[0] - 1, 3, cols))
+
+        root = prepare_search_board(board, 'b')
+        assert not martin.is_enemy(root.data[square(4, 2, cols)], black)
+        assert martin.is_enemy(root.data[square(1, 0, cols)], black)
+        # Le pion de y en (1, 6) attaque en avançant vers la gauche, pas le pion de w en (4, 2) (coéquipier)
+        assert martin.find_attacker(root.data, square(0, 5, cols), defender_color=black) == square(1, 6, cols)
+        assert martin.find_attacker(root.data, square(3, 3, cols), defender_color=black) is None
+
+        src, dst = martin.chess_bot(order[:3], board, 0.5, player_order=order)
+        assert board[src[0], src[1]].endswith('b')
+        assert martin.METRICS["completed_depth"] >= 4
+
+        # Quatre équipes : chaque équipe maximise son propre score
+        martin.MULTIPLAYER_SEARCH = "max-n"
+        src, dst = martin.chess_bot('0b0', board, 0.5, player_order='0b01y12w23r3')
+        assert board[src[0], src[1]].endswith('b')
+        assert martin.NUM_SIDES == 4
+    finally:
+        martin.MULTIPLAYER_SEARCH = "paranoid"
+        martin.init_players(None, *board.shape)
+
+
+def test_opening_book_is_built_by_self_play_and_played_without_search():
+    """Test qu'un livre construit par parties contre soi-même est relu par mmap et joué sans recherche"""
+    sequence, board = load_map('default.brd')
+    directory = tempfile.mkdtemp()
+    book_directory = martin_book.BOOK_DIRECTORY
+    try:
+        count = martin_book.build_book(os.path.join(MAPS_DIR, 'default.brd'), os.path.join(directory, 'default.book'),
+                                       games=2, plies=2, time_budget=0.2, exploration=0)
+        assert count == 2
+        martin_book.BOOK_DIRECTORY = directory
+        martin_book.close_books()
+
+        book, = martin_book.get_books(8, 8)
+        key = martin_book.position_key(board, 'w')
+        (move, weight, _), = book.probe(key)
+        assert weight == 2
+        assert book.probe(key ^ 1) == []
+
+        assert martin.chess_bot(sequence, board, 1.0) == move
+        assert martin.METRICS["book_hit"] == 1
+        martin.chess_bot(sequence, board, 0.2, opening_book=False)
+        assert martin.METRICS["book_hit"] == 0
+    finally:
+        martin_book.close_books()
+        martin_book.BOOK_DIRECTORY = book_directory
+        shutil.rmtree(directory)
+
+
+def test_tablebase_is_solved_by_retrograde_analysis_and_played_without_search():
+    """Test qu'une table de finales (roi et pion contre roi sur pawn_race.brd) donne le résultat exact pour les deux joueurs"""
+    directory = tempfile.mkdtemp()
+    tablebase_directory = martin_tablebase.TABLEBASE_DIRECTORY
+    try:
+        count = martin_tablebase.generate_tablebase(os.path.join(MAPS_DIR, 'pawn_race.brd'),
+                                                    os.path.join(directory, 'pawn_race.tb'), 3, ['kw', 'kb', 'pw'])
+        assert count > 0
+        martin_tablebase.TABLEBASE_DIRECTORY = directory
+        martin_tablebase.close_tablebases()
+
+        tablebase, = martin_tablebase.get_tablebases(5, 4)
+        assert len(tablebase.tables) == 3  # roi et pion, roi et reine après la promotion, rois seuls
+
+        # Le pion blanc est promu avant que le roi noir ne l'atteigne
+        board = np.full((5, 4), '', dtype='O')
+        board[1, 2] = 'kb'
+        board[3, 0] = 'kw'
+        board[3, 1] = 'pw'
+        pieces = [(martin_board.encode_piece(board[x, y]), (x, y)) for x, y in ((1, 2), (3, 0), (3, 1))]
+        assert tablebase.value(pieces, martin_board.WHITE) == 7
+        assert tablebase.value(pieces, martin_board.BLACK) < 0
+
+        results = []
+        move = chess_bot('0w0', board.copy(), 1.0, on_search_result=results.append)
+        assert martin.METRICS["tablebase_hit"] == 1
+        assert results[0].score == 999999 and results[0].depth == 0
+        (from_x, from_y), (to_x, to_y) = move
+        after = [(code, (to_x, to_y) if square == (from_x, from_y) else square) for code, square in pieces]
+        after = [(code + martin_board.QUEEN - martin_board.PAWN if square == (4, 1) else code, square) for code, square in after]
+        assert tablebase.value(after, martin_board.BLACK) == -7
+
+        # Même position vue par les noirs (plateau tourné) : défaite, le coup le plus long est joué
+        results = []
+        chess_bot('0b2', np.rot90(board, 2).copy(), 1.0, on_search_result=results.append)
+        assert martin.METRICS["tablebase_hit"] == 1
+        assert results[0].score == -999999
+
+        # Le roi noir prend le pion : nulle
+        board[3, 1], board[0, 3] = '', 'pw'
+        board[1, 2], board[0, 2] = '', 'kb'
+        results = []
+        chess_bot('0b2', np.rot90(board, 2).copy(), 1.0, on_search_result=results.append)
+        assert results[0].score == 0
+
+        chess_bot('0w0', board.copy(), 0.2, tablebase=False)
+        assert martin.METRICS["tablebase_hit"] == 0
+    finally:
+        martin_tablebase.close_tablebases()
+        martin_tablebase.TABLEBASE_DIRECTORY = tablebase_directory
+        shutil.rmtree(directory)
+
+
+def test_perft_counts_match_between_generators_and_baseline():
+    """Test que Martin, les bitboards et les règles de GameManager comptent les mêmes positions que la référence perft, divide compris"""
+    baseline = martin_perft.load_baseline()
+    for name, order, board in martin_perft.load_positions():
+        nodes = martin_perft.perft('martin', order, board, 2)
+        assert baseline[name]['martin']['nodes'][1] == nodes
+        assert sum(martin_perft.divide('martin', order, board, 2).values()) == nodes
+        assert martin_perft.perft('bitboard', order, board, 2) == nodes
+        assert martin_perft.perft('rules', order, board, 2) == nodes
+
+    # Machine deux fois plus lente que pendant la référence : même débit relatif, pas de régression
+    reference = {'default.brd': {'martin': {'depth': 3, 'nodes': [12, 144, 2124], 'nps': 100.0, 'speed': 2.0}}}
+    result = {'default.brd': {'martin': {'depth': 3, 'nodes': [12, 144, 2124], 'nps': 50.0, 'speed': 1.0}}}
+    assert martin_perft.compare(result, reference) == []
+    result['default.brd']['martin']['speed'] = 2.0
+    assert len(martin_perft.compare(result, reference)) == 1
+    result['default.brd']['martin'].update(nodes=[12, 144, 2125], nps=100.0)
+    assert len(martin_perft.compare(result, reference)) == 1
+
+
+def test_headless_game_applies_moves_promotion_and_end_without_qt():
+    """Test qu'une partie sans affichage suit l'ordre des joueurs, refuse les coups invalides, promeut et détecte la fin"""
+    white_moves = iter([((0, 3), (1, 3)), ((1, 3), (2, 3)), ((2, 3), (3, 3)), ((3, 3), (4, 3)), ((4, 3), (0, 3)), ((0, 3), (0, 2))])
+    black_moves = iter([((0, 0), (0, 0)), None, ((0, 3), (1, 3)), ((1, 3), (2, 3)), ((2, 3), (3, 3))])
+    boards = []
+
+    def white_bot(player_sequence, board, time_budget, **kwargs):
+        boards.append(board)
+        return next(white_moves)
+
+    def black_bot(player_sequence, board, time_budget, **kwargs):
+        move = next(black_moves)
+        if move is None:
+            raise RuntimeError("bot en échec")
+        return move
+
+    game = headless_game.HeadlessGame(os.path.join(headless_game.BOARD_DIRECTORY, 'pawn_race.brd'))
+    game.add_player(white_bot, 1.0)
+    game.add_player(black_bot, 1.0)
+    result = game.play()
+
+    assert result.winner == 'w' and result.reason == 'kings_captured' and result.turns == 11
+    assert [m['status'] for m in result.moves[:4]] == ['ok', 'invalid', 'ok', 'error']
+    assert result.moves[5]['move'] == ((4, 0), (3, 0))  # coup noir ramené dans l'orientation du plateau
+    assert result.moves[6]['promotion'] and result.moves[10]['capture'] == 'kb'
+    assert game.board[0, 2] == 'qw' and game.board[1, 0] == 'pb'
+    assert all(type(tile) is np.str_ for tile in boards[0].flat)
+
+    script = "import sys, HeadlessGame; HeadlessGame.load_bots(); print(any(m.startswith('PyQt') for m in sys.modules))"
+    ischess = os.path.join(os.path.dirname(__file__), '..', 'ISChess')
+    output = subprocess.run([sys.executable, "-c", script], cwd=ischess, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
+
+
+def test_game_rules_skip_kingless_players_and_end_on_teams():
+    """Test les règles partagées par GameManager et HeadlessGame : joueurs sans roi sautés, victoire par équipe"""
+    order = '0w01r10b21y3'
+    board = np.array([[game_rules.BoardPiece(tile) if tile else tile for tile in row] for row in
+                      [['kw', '', 'kr', ''], ['', '', '', ''], ['pb', '', '', ''], ['', '', 'ky', 'XX']]], dtype='O')
+    assert game_rules.next_turn(order, 0, board) == 1
+    assert game_rules.next_turn(order, 1, board) == 3  # noir n'a plus de roi, jaune joue
+    assert game_rules.winner(order, 0, board) is None
+
+    board[0, 2] = ''
+    assert game_rules.next_turn(order, 0, board) == 3
+    assert game_rules.winner(order, 0, board) is None  # le roi jaune reste dans l'autre équipe
+    board[3, 2] = ''
+    assert game_rules.winner(order, 2, board) == 'b'  # l'équipe de blanc gagne, même au tour de noir
+
+    assert not game_rules.is_move_playable(order, None, board)
+    assert not game_rules.is_move_playable(order, ((0, 0), (3, 3)), board)
+    _, captured, promotion = game_rules.apply_move(board, ((2, 0), (3, 0)), lambda pawn: 'q' + pawn.color)
+    assert board[3, 0] == 'qb' and board[2, 0] == '' and captured == '' and promotion
+
+
+def test_tournament_streams_games_and_computes_elo_and_sprt():
+    """Test que le tournoi joue chaque carte des deux côtés dans des processus, écrit le JSONL et calcule Elo et SPRT"""
+    games = tournament.schedule(['Martin', 'PawnMover', 'Martin_naif'], ['a.brd', 'b.brd'], mode='gauntlet', rounds=2)
+    assert len(games) == 2 * 2 * 2 * 2
+    assert games[0]['sides'] == ['Martin', 'PawnMover'] and games[1]['sides'] == ['PawnMover', 'Martin']
+
+    assert abs(tournament.elo_from_score(0.75) - 190.85) < 0.01
+    elo, margin = tournament.elo_interval(60, 20, 20)
+    assert 145 < elo < 150 and 40 < margin < 100
+    assert tournament.sprt_llr(180, 60, 60, 0, 10) > tournament.sprt_bounds(0.05, 0.05)[1]
+    assert tournament.sprt_llr(60, 60, 180, 0, 10) < tournament.sprt_bounds(0.05, 0.05)[0]
+
+    directory = tempfile.mkdtemp()
+    try:
+        output = os.path.join(directory, 'games.jsonl')
+        pawn_race = os.path.join(headless_game.BOARD_DIRECTORY, 'pawn_race.brd')
+        records = tournament.run_tournament(['Martin', 'PawnMover'], [pawn_race], output, budget=0.1, max_turns=20, workers=2)
+        with open(output) as f:
+            lines = [json.loads(line) for line in f]
+        assert sorted(line['game'] for line in lines) == [0, 1] and len(records) == 2
+        assert all(line['timeout'] == {'Martin': 0, 'PawnMover': 0} for line in lines)
+        assert tournament.count_results(records, 'Martin') == tournament.count_results(records, 'PawnMover')[::-1]
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_bot_worker_process_plays_ponders_and_survives_kill():
+    """Test que le processus d'un joueur garde le bot entre les tours, réfléchit en arrière-plan et redémarre après un kill"""
+    _, board = headless_game.read_board(os.path.join(headless_game.BOARD_DIRECTORY, 'default.brd'))
+    board = np.array(board.tolist())
+    martin.reset_metrics()
+    legal = martin.legal_moves('0w0', board, '0w01b2')
+    worker = bot_process.BotWorker(chess_bot)
+    try:
+        move, result = worker.play('0w0', board, 0.5, player_order='0w01b2')
+        assert move in legal
+        assert result is not None and result.best_move == move
+
+        worker.ponder('0w0', board, 5.0)
+        worker.stop_pondering()
+        assert not worker.pondering and worker.is_alive()
+
+        # Arrêté pendant un tour : SIGTERM laisse le bot se terminer proprement, sans attendre la fin du tour
+        def interrupted_turn():
+            try:
+                worker.play('0w0', board, 30.0, player_order='0w01b2')
+            except (EOFError, OSError):
+                pass
+
+        turn = threading.Thread(target=interrupted_turn, daemon=True)
+        turn.start()
+        time.sleep(0.5)
+        pid = worker.process.pid
+        t0 = time.perf_counter()
+        worker.kill()
+        assert time.perf_counter() - t0 < 1.0 and worker.process.exitcode == 0
+        turn.join(1.0)
+        try:
+            worker.play('0w0', board, 0.5, player_order='0w01b2')
+            assert False, "un worker tué ne doit pas répondre"
+        except (EOFError, OSError):
+            pass
+        worker.restart()
+        assert worker.process.pid != pid
+        move, _ = worker.play('0w0', board, 0.5, player_order='0w01b2')
+        assert move in legal
+    finally:
+        worker.close()
+    assert worker not in bot_process.WORKERS
+
+
+def test_bitboard_rays_stop_at_edges_and_walls():
+    """Test que les tables des bitboards ne débordent pas sur la rangée voisine et s'arrêtent sur un mur (plateau 5x7)"""
+    board = np.array([['' for _ in range(7)] for _ in range(5)], dtype='O')
+    board[0, 3] = 'XX'
+    martin.init_players(None, 5, 7)
+    root = martin.create_board(board)
+    tables = bitboard.get_tables(root.data, martin.KING_STEPS, martin.KNIGHT_STEPS)
+    square = martin_board.to_square
+
+    knight = {martin_board.to_coords(i, 7) for i in bitboard.iter_bits(tables.knight[square(2, 0, 7)])}
+    assert knight == {(0, 1), (4, 1), (1, 2), (3, 2)}
+    assert tables.king[square(4, 6, 7)] == tables.bits[square(3, 5, 7)] | tables.bits[square(3, 6, 7)] | \
+        tables.bits[square(4, 5, 7)]
+
+    # Rayon vers la droite depuis (0, 0) : arrêté par le mur en (0, 3)
+    right = martin.KING_STEPS.index(1)
+    assert tables.rays[right][square(0, 0, 7)] == tables.bits[square(0, 1, 7)] | tables.bits[square(0, 2, 7)]
+    assert bitboard.slider_attacks(tables, square(4, 6, 7), 0, bitboard.ROOK_DIRECTIONS).bit_count() == 6 + 4
+
+
+def test_bitboard_legal_moves_match_mailbox_generator():
+    """Test que les bitboards donnent les mêmes coups légaux que le générateur de Martin, clouages et échecs compris"""
+    positions = martin_perft.load_positions()
+    pinned = np.array([['' for _ in range(8)] for _ in range(8)], dtype='O')
+    pinned[0, 4], pinned[1, 4], pinned[5, 4], pinned[2, 2], pinned[7, 0], pinned[4, 7] = 'kw', 'rw', 'qb', 'nw', 'kb', 'bb'
+    positions.append(('pinned', '0w01b2', pinned))  # Tour clouée par la reine : elle reste sur sa colonne
+    checked = pinned.copy()
+    checked[1, 4], checked[2, 3] = '', 'nb'  # Échec du cavalier : prendre le cavalier ou déplacer le roi
+    positions.append(('checked', '0w01b2', checked))
+
+    for name, order, board in positions:
+        assert sorted(martin_perft.bitboard_moves(order, board)) == sorted(martin_perft.martin_moves(order, board)), name
+